@@ -0,0 +1,77 @@
+# ============================================================================
+# benchmarks/bench_batch.py
+# ============================================================================
+"""
+Benchmark: MainBot.process_messages vs. process_message in a loop.
+
+Simulates webhook bursts where many users send similar messages.
+
+Usage:
+    python -m benchmarks.bench_batch [--batch 500] [--rounds 20]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+from typing import List, Tuple
+
+from bot.main_bot import MainBot
+
+TEXTS = [
+    "what is the capital of germany?",
+    "what's the weather",
+    "in Tokyo",
+    "Tell me the weather in Paris",
+    "hello there",
+    "can you dance?",
+    "learn capital_of_france = Paris",
+    "tell me about capital_of_france",
+]
+
+
+def build_batch(size: int, users: int, seed: int = 3) -> List[Tuple[str, str]]:
+    """Build a burst of (user_id, text) pairs."""
+    rng = random.Random(seed)
+    return [(f"user_{rng.randrange(users)}", rng.choice(TEXTS)) for _ in range(size)]
+
+
+def new_bot() -> MainBot:
+    """Create a bot with startup output suppressed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = MainBot()
+    bot.knowledge.add_knowledge("capital_of_germany", "Berlin")
+    return bot
+
+
+def main() -> None:
+    """Time both entry points on identical bursts."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    batches = [build_batch(args.batch, args.users, seed) for seed in range(args.rounds)]
+    total = args.batch * args.rounds
+
+    bot = new_bot()
+    start = time.perf_counter()
+    for batch in batches:
+        for user_id, text in batch:
+            bot.process_message(user_id, text)
+    single = time.perf_counter() - start
+
+    bot = new_bot()
+    start = time.perf_counter()
+    for batch in batches:
+        bot.process_messages(batch)
+    batched = time.perf_counter() - start
+
+    print(f"process_message loop: {total / single:10.0f} msg/s")
+    print(f"process_messages:     {total / batched:10.0f} msg/s ({single / batched:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# ============================================================================
+# benchmarks/bench_context_memory.py
+# ============================================================================
+"""
+Benchmark: resident bytes per pending ConversationContext.
+
+Compares the original __dict__/datetime/list representation with the
+compact __slots__ one.
+
+Usage:
+    python -m benchmarks.bench_context_memory [--contexts 100000]
+"""
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from bot.core.context_manager import ConversationContext
+
+
+class LegacyConversationContext:
+    """The original ConversationContext, kept for comparison."""
+
+    def __init__(self, user_id: str, intent: str, entities: Dict[str, str], missing: List[str]):
+        self.user_id = user_id
+        self.intent = intent
+        self.entities = entities
+        self.missing_entities = missing
+        self.timestamp = datetime.now()
+
+
+def measure(factory: Callable[[str], object], count: int) -> float:
+    """Return traced bytes per object created by factory."""
+    user_ids = [f"user_{i}" for i in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    contexts = [factory(user_id) for user_id in user_ids]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del contexts
+    # Exclude the list holding the contexts
+    return (after - before - 8 * count) / count
+
+
+def main() -> None:
+    """Measure both representations for an idle weather follow-up."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contexts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    legacy = measure(
+        lambda uid: LegacyConversationContext(uid, "get_weather".lower(), {"location": None}, ["location"]),
+        args.contexts,
+    )
+    compact = measure(
+        lambda uid: ConversationContext(uid, "get_weather".lower(), {"location": None}, ["location"]),
+        args.contexts,
+    )
+
+    print(f"legacy  {legacy:7.1f} bytes/context")
+    print(f"compact {compact:7.1f} bytes/context ({(1 - compact / legacy) * 100:.0f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# ============================================================================
+# benchmarks/bench_context_store.py
+# ============================================================================
+"""
+Benchmark: conversations spread across bot instances via a shared context store.
+
+Several MainBot instances share one RESP server (the in-process stand-in,
+or Redis with --url). Users ask for the weather on one instance and answer
+the location prompt on a random one. The harness reports turns per second,
+blocking round trips per turn and how many follow-ups were completed,
+next to a single bot with in-process contexts (which cannot continue a
+conversation started elsewhere).
+
+Usage:
+    python -m benchmarks.bench_context_store [--users 5000] [--instances 4] [--url redis://host:port]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+from typing import Dict, List, Optional
+
+from bot.core.context_manager import ContextManager
+from bot.core.context_store import RedisContextStore
+from bot.core.resp import RESPClient, RESPServer
+from bot.main_bot import MainBot
+
+BATCH = 200
+
+
+def new_bot(store: Optional[RedisContextStore]) -> MainBot:
+    """Create a bot with startup output suppressed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return MainBot(context_manager=ContextManager(store=store))
+
+
+def run(bots: List[MainBot], users: int, sticky: bool, seed: int = 5) -> Dict[str, float]:
+    """
+    Run two-turn weather conversations, BATCH users at a time.
+
+    Args:
+        bots: Instances to spread turns over
+        users: Number of conversations
+        sticky: Send each user's follow-up to the instance of the first turn
+
+    Returns:
+        turns/s, round trips per turn and completed follow-up ratio
+    """
+    rng = random.Random(seed)
+    clients = [bot.context_manager.store.client for bot in bots if bot.context_manager.store is not None]
+    trips_before = sum(client.stats["round_trips"] for client in clients)
+    completed = 0
+
+    start = time.perf_counter()
+    for first in range(0, users, BATCH):
+        batch = [(f"user_{i}", rng.randrange(len(bots))) for i in range(first, min(first + BATCH, users))]
+        for user_id, home in batch:
+            bots[home].process_message(user_id, "What's the weather")
+        for user_id, home in batch:
+            bot = bots[home if sticky else rng.randrange(len(bots))]
+            if bot.process_message(user_id, "Tokyo").startswith("The weather in Tokyo"):
+                completed += 1
+    elapsed = time.perf_counter() - start
+
+    trips = sum(client.stats["round_trips"] for client in clients) - trips_before
+    return {"turns_per_s": 2 * users / elapsed, "us_per_turn": elapsed / (2 * users) * 1e6,
+            "round_trips_per_turn": trips / (2 * users), "completed": completed / users}
+
+
+def main() -> None:
+    """Run configurations and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--instances", type=int, default=4)
+    parser.add_argument("--url", default=None, help="Use this Redis server instead of the stand-in")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = RESPServer().start()
+        url = server.url
+
+    def shared(near_cache_size: int) -> List[MainBot]:
+        return [new_bot(RedisContextStore(RESPClient.from_url(url), near_cache_size=near_cache_size))
+                for _ in range(args.instances)]
+
+    configs = [
+        ("in-process, 1 instance", lambda: [new_bot(None)], True),
+        ("in-process, round robin", lambda: [new_bot(None) for _ in range(args.instances)], False),
+        ("shared, no near cache", lambda: shared(0), False),
+        ("shared + near cache, random", lambda: shared(1024), False),
+        ("shared + near cache, sticky", lambda: shared(1024), True),
+    ]
+
+    print(f"{args.users} two-turn conversations over {args.instances} instances ({url if args.url else 'stand-in'}):")
+    print(f"  {'configuration':<30} {'turns/s':>9} {'µs/turn':>9} {'RTT/turn':>9} {'completed':>10}")
+    try:
+        for name, make, sticky in configs:
+            bots = make()
+            result = run(bots, args.users, sticky)
+            print(f"  {name:<30} {result['turns_per_s']:9.0f} {result['us_per_turn']:9.1f} "
+                  f"{result['round_trips_per_turn']:9.2f} {result['completed']:10.1%}")
+            for bot in bots:
+                if bot.context_manager.store is not None:
+                    bot.context_manager.store.close()
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
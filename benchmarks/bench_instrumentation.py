@@ -0,0 +1,117 @@
+# ============================================================================
+# benchmarks/bench_instrumentation.py
+# ============================================================================
+"""
+Benchmark: overhead of MainBot stage instrumentation.
+
+Replays the same message mix through process_message with
+instrumentation disabled and with each sink attached, and times the
+building blocks (one wrapped call, one span per sink) on their own.
+Rounds alternate between configurations and medians are reported, so
+drift on a busy machine affects all of them alike.
+
+Usage:
+    python -m benchmarks.bench_instrumentation [--messages 20000] [--rounds 7]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from bot.core.instrumentation import HistogramSink, Instrumentation, PrometheusSink, Sink
+from bot.main_bot import MainBot
+
+TEXTS = [
+    "what is the capital of germany?",
+    "what's the weather",
+    "in Tokyo",
+    "Tell me the weather in Paris",
+    "hello there",
+    "learn capital_of_france = Paris",
+]
+
+
+class NullSink(Sink):
+    """Discards everything (isolates the cost of the wrappers)."""
+
+    def span(self, stage, seconds, labels):
+        pass
+
+    def count(self, name, value, labels):
+        pass
+
+
+def new_bot(sinks: List[Sink]) -> MainBot:
+    """Create a bot with startup output suppressed and the given sinks."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = MainBot()
+    bot.knowledge.add_knowledge("capital_of_germany", "Berlin")
+    for sink in sinks:
+        bot.instrumentation.add_sink(sink)
+    return bot
+
+
+def per_call(function: Callable[[], object], calls: int) -> float:
+    """Return nanoseconds per call."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main() -> None:
+    """Measure and report overheads."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    messages = [(f"user_{rng.randrange(args.users)}", rng.choice(TEXTS)) for _ in range(args.messages)]
+
+    configs: Dict[str, Callable[[], List[Sink]]] = {
+        "disabled": lambda: [],
+        "null sink": lambda: [NullSink()],
+        "histogram": lambda: [HistogramSink()],
+        "prometheus": lambda: [PrometheusSink()],
+        "histogram+prometheus": lambda: [HistogramSink(), PrometheusSink()],
+    }
+    timings: Dict[str, List[float]] = {name: [] for name in configs}
+    for _ in range(args.rounds):
+        for name, sinks in configs.items():
+            bot = new_bot(sinks())
+            process = bot.process_message
+            start = time.perf_counter()
+            for user_id, text in messages:
+                process(user_id, text)
+            timings[name].append((time.perf_counter() - start) / len(messages))
+
+    baseline = statistics.median(timings["disabled"])
+    print(f"process_message, {args.messages} messages x {args.rounds} rounds (median):")
+    for name, values in timings.items():
+        turn = statistics.median(values)
+        print(f"  {name:<22} {turn * 1e6:7.2f} µs/msg  {1 / turn:9.0f} msg/s  "
+              f"overhead {(turn - baseline) * 1e6:+6.2f} µs ({turn / baseline - 1:+.1%})")
+
+    calls = 200_000
+    instrumentation = Instrumentation(object())
+    print(f"\nBuilding blocks ({calls} calls):")
+    print(f"  Instrumentation.span, disabled     {per_call(lambda: instrumentation.span('intent', 1e-6), calls):7.0f} ns")
+
+    def noop() -> None:
+        pass
+
+    print(f"  plain call                         {per_call(noop, calls):7.0f} ns")
+    for name, sink in (("null", NullSink()), ("histogram", HistogramSink()), ("prometheus", PrometheusSink())):
+        instrumentation.sinks = (sink,)
+        wrapped = instrumentation._wrap(noop, "intent", (), "noop")
+        print(f"  wrapped call, {name:<20} {per_call(wrapped, calls):7.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
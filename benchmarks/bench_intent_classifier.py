@@ -0,0 +1,155 @@
+# ============================================================================
+# benchmarks/bench_intent_classifier.py
+# ============================================================================
+"""
+Benchmark: intent patterns alone vs. patterns with the classifier fallback.
+
+Trains an IntentClassifier on templated messages (paraphrases the intent
+patterns miss, plus chatter labelled "none") and evaluates on messages
+from held-out templates, so test phrasings never occur in training. Also
+reports classifier inference time per message, with the per-token row
+cache warm and cold, and the time to map the model.
+
+Usage:
+    python -m benchmarks.bench_intent_classifier [--train 3000] [--test 1000]
+    python -m benchmarks.bench_intent_classifier --train-file train.jsonl --test-file test.jsonl
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from bot.core.intent_classifier import NO_INTENT, IntentClassifier, read_examples, train
+from bot.core.tokenizer import Message
+from bot.main_bot import MainBot
+
+CITIES = ["London", "Paris", "Tokyo", "New York", "Berlin", "Oslo", "Madrid", "Sydney",
+          "Toronto", "Rome", "Cairo", "Lima", "Seoul", "Dublin", "Vienna", "Nairobi"]
+TOPICS = ["photosynthesis", "the eiffel tower", "python", "black holes", "jazz", "the moon",
+          "bitcoin", "mount everest", "the roman empire", "gravity", "shakespeare", "dna"]
+FACTS = [("wifi_password", "hunter2"), ("office_floor", "4"), ("my_birthday", "may 3"),
+         ("standup_time", "9am"), ("boss_name", "alice"), ("car_plate", "xyz 123")]
+
+# (train templates, held-out test templates) per intent
+TEMPLATES: Dict[str, Tuple[List[str], List[str]]] = {
+    "get_weather": (
+        ["is it going to rain in {city}", "will it snow in {city} tomorrow",
+         "do i need an umbrella in {city}", "how hot is it in {city}", "is it sunny in {city}",
+         "how cold will it be in {city} tonight", "should i bring a jacket to {city}",
+         "weather in {city}", "what's the forecast for {city}", "any rain expected in {city}?"],
+        ["is it raining in {city} right now", "is {city} going to be sunny today",
+         "do i need a coat in {city}", "how warm is it in {city}", "will it be cold in {city}",
+         "what's the weather like in {city}", "temperature in {city} please"],
+    ),
+    "ask_knowledge": (
+        ["who is {topic}", "who invented {topic}", "explain {topic}", "define {topic}",
+         "where is {topic}", "can you explain {topic} to me", "i'd like to know about {topic}",
+         "what is {topic}?", "tell me about {topic}", "how does {topic} work"],
+        ["who was {topic}", "describe {topic}", "could you explain {topic}",
+         "what does {topic} mean", "give me info on {topic}", "what is {topic} exactly",
+         "do you know anything about {topic}"],
+    ),
+    "learn_knowledge": (
+        ["note that {key} is {value}", "keep in mind {key} is {value}", "save {key} as {value}",
+         "store {key} as {value}", "learn {key} = {value}", "remember {key} is {value}",
+         "please note {key} is {value}", "record {key} as {value}"],
+        ["please memorize that {key} is {value}", "don't forget {key} is {value}",
+         "write down {key} as {value}", "make a note that {key} is {value}",
+         "remember that {key} is {value}", "{key} = {value}"],
+    ),
+    NO_INTENT: (
+        ["hi", "hello there", "thanks a lot", "good morning", "how are you", "bye", "lol",
+         "ok cool", "you are great", "haha nice one", "good evening", "sounds good"],
+        ["hey", "thank you so much", "good night", "see you later", "nice", "ok thanks",
+         "is it friday yet", "what a day"],
+    ),
+}
+
+
+def build_examples(count: int, held_out: bool, seed: int) -> List[Tuple[str, str]]:
+    """Return `count` (text, intent) pairs from the train or held-out templates."""
+    rng = random.Random(seed)
+    intents = sorted(TEMPLATES)
+    examples = []
+    for i in range(count):
+        intent = intents[i % len(intents)]
+        template = rng.choice(TEMPLATES[intent][held_out])
+        key, value = rng.choice(FACTS)
+        text = template.format(city=rng.choice(CITIES), topic=rng.choice(TOPICS), key=key, value=value)
+        if rng.random() < 0.3:
+            text = text.capitalize()
+        examples.append((text, intent))
+    return examples
+
+
+def accuracy(detected: List[Optional[str]], examples: List[Tuple[str, str]]) -> float:
+    """Return the fraction of examples detected as their intent (None for NO_INTENT)."""
+    correct = sum(found == (None if intent == NO_INTENT else intent)
+                  for found, (_, intent) in zip(detected, examples))
+    return correct / len(examples)
+
+
+def main() -> None:
+    """Train, evaluate and time the classifier."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--train", type=int, default=3000, help="Synthetic training examples")
+    parser.add_argument("--test", type=int, default=1000, help="Synthetic test examples")
+    parser.add_argument("--train-file", default=None, help="Labelled JSONL to train on instead")
+    parser.add_argument("--test-file", default=None, help="Labelled JSONL to test on instead")
+    parser.add_argument("--buckets", type=int, default=1 << 16)
+    parser.add_argument("--epochs", type=int, default=10)
+    args = parser.parse_args()
+
+    training = read_examples(args.train_file) if args.train_file else build_examples(args.train, False, 1)
+    testing = read_examples(args.test_file) if args.test_file else build_examples(args.test, True, 2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "intents.model"
+        start = time.perf_counter()
+        stats = train(training, path, buckets=args.buckets, epochs=args.epochs)
+        print(f"trained on {stats['examples']} examples ({stats['classes']} classes) in "
+              f"{time.perf_counter() - start:.1f}s, training accuracy {stats['accuracy']:.1%}, "
+              f"model {path.stat().st_size / 1024:.0f} KiB")
+
+        start = time.perf_counter()
+        classifier = IntentClassifier(path)
+        classifier.predict("")
+        print(f"model mapped in {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+        engine = MainBot().intent_engine
+        messages = [Message(text) for text, _ in testing]
+        patterns = [engine.detect_intent(message) for message in messages]
+        classified = [classifier.classify(message) for message in messages]
+        engine.classifier = classifier
+        combined = [engine.detect_intent(message) for message in messages]
+        matched = sum(found is not None for found in patterns)
+        print(f"{len(testing)} held-out messages: patterns match {matched / len(testing):.1%}")
+        print(f"  accuracy  patterns {accuracy(patterns, testing):6.1%} | "
+              f"classifier {accuracy(classified, testing):6.1%} | "
+              f"patterns + classifier {accuracy(combined, testing):6.1%}")
+
+        # Fresh Messages, so tokenization is part of the time
+        texts = [text for text, _ in testing]
+        warm, cold = [], []
+        for text in texts:
+            begin = time.perf_counter()
+            classifier.predict(text)
+            warm.append(time.perf_counter() - begin)
+        for text in texts:
+            classifier._tokens.clear()
+            begin = time.perf_counter()
+            classifier.predict(text)
+            cold.append(time.perf_counter() - begin)
+        for name, timings in (("warm", warm), ("cold", cold)):
+            timings.sort()
+            print(f"  inference ({name} token cache)  p50 {statistics.median(timings) * 1e6:6.1f} µs | "
+                  f"p99 {timings[int(len(timings) * 0.99)] * 1e6:6.1f} µs")
+        classifier.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# ============================================================================
+# benchmarks/bench_intent_matcher.py
+# ============================================================================
+"""
+Benchmark: compiled IntentMatcher vs. the per-pattern re.search loop.
+
+The compiled matcher is timed with chunked alternations only and with the
+literal prefilter (the default). The no-match column is the cost of
+messages that match nothing, the common case for chatter.
+
+Usage:
+    python -m benchmarks.bench_intent_matcher [--messages 2000]
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import Dict, List, Optional
+
+from bot.core.intent_matcher import IntentMatcher
+from bot.core.tokenizer import as_message
+
+
+def build_patterns(count: int, patterns_per_intent: int = 5) -> Dict[str, List[str]]:
+    """Build a synthetic intent pattern table with `count` patterns."""
+    patterns: Dict[str, List[str]] = {}
+    for i in range(count):
+        intent = f"intent_{i // patterns_per_intent}"
+        patterns.setdefault(intent, []).append(rf"\b(keyword{i}|alias{i})\b")
+    return patterns
+
+
+def build_messages(count: int, pattern_count: int, seed: int = 7) -> List[str]:
+    """Build messages: half hit a random pattern, half match nothing."""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        if i % 2:
+            messages.append(f"please tell me about keyword{rng.randrange(pattern_count)} today")
+        else:
+            messages.append("hello there, how are you doing on this fine day?")
+    return messages
+
+
+def legacy_match(intent_patterns: Dict[str, List[str]], text: str) -> Optional[str]:
+    """The original IntentEngine.detect_intent loop."""
+    for intent, patterns in intent_patterns.items():
+        for pattern in patterns:
+            if re.search(pattern, text):
+                return intent
+    return None
+
+
+def run(pattern_count: int, message_count: int) -> None:
+    """Time both matchers for one pattern-table size."""
+    intent_patterns = build_patterns(pattern_count)
+    messages = build_messages(message_count, pattern_count)
+    matcher = IntentMatcher(intent_patterns, prefilter=False)
+    prefiltered = IntentMatcher(intent_patterns)
+
+    # Warm up and check all agree
+    for text in messages[:50]:
+        expected = legacy_match(intent_patterns, text)
+        assert matcher.match(text) == prefiltered.match(text) == expected
+        assert prefiltered.match(text, as_message(text).tokens) == expected
+
+    start = time.perf_counter()
+    for text in messages:
+        legacy_match(intent_patterns, text)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in messages:
+        matcher.match(text)
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in messages:
+        prefiltered.match(text)
+    filtered = time.perf_counter() - start
+
+    misses = [text for text in messages if legacy_match(intent_patterns, text) is None]
+    start = time.perf_counter()
+    for text in misses:
+        matcher.match(text)
+    compiled_miss = time.perf_counter() - start
+    start = time.perf_counter()
+    for text in misses:
+        prefiltered.match(text)
+    filtered_miss = time.perf_counter() - start
+
+    print(f"{pattern_count:>6} patterns | "
+          f"loop {legacy / message_count * 1e6:9.1f} µs/msg | "
+          f"compiled {compiled / message_count * 1e6:9.1f} µs/msg | "
+          f"prefiltered {filtered / message_count * 1e6:7.1f} µs/msg | "
+          f"speedup {legacy / filtered:5.1f}x | "
+          f"no-match {compiled_miss / len(misses) * 1e6:6.1f} -> {filtered_miss / len(misses) * 1e6:5.1f} µs")
+
+
+def main() -> None:
+    """Run the benchmark at 10, 100 and 1000 patterns."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    for pattern_count in (10, 100, 1000):
+        run(pattern_count, args.messages)
+
+
+if __name__ == "__main__":
+    main()
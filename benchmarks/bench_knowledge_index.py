@@ -0,0 +1,140 @@
+# ============================================================================
+# benchmarks/bench_knowledge_index.py
+# ============================================================================
+"""
+Benchmark: indexed fuzzy KnowledgeEngine.query at growing knowledge sizes.
+
+With --store, facts go to a LogKnowledgeStore instead and a fresh engine
+(a new process sharing the store) is timed to its first fuzzy answer,
+with the persisted key index and with every key indexed in memory.
+
+Usage:
+    python -m benchmarks.bench_knowledge_index [--sizes 10000 100000 1000000]
+    python -m benchmarks.bench_knowledge_index --store --sizes 200000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from bot.core.knowledge_engine import KnowledgeEngine
+from bot.core.knowledge_store import LogKnowledgeStore
+
+WORDS = [
+    "capital", "population", "river", "mountain", "language", "currency",
+    "president", "anthem", "flag", "area", "climate", "export", "museum",
+    "airport", "university", "festival", "dish", "sport", "team", "city",
+]
+
+
+def build_keys(count: int, seed: int = 11) -> List[str]:
+    """Build `count` distinct underscore-joined keys."""
+    rng = random.Random(seed)
+    return [f"{rng.choice(WORDS)}_of_{rng.choice(WORDS)}_{i}" for i in range(count)]
+
+
+def build_questions(keys: List[str], count: int, seed: int = 13) -> List[str]:
+    """Build questions mixing key-in-question, question-in-key and misses."""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(count):
+        key = rng.choice(keys)
+        kind = i % 3
+        if kind == 0:
+            questions.append(f"tell_me_{key}_please")
+        elif kind == 1:
+            questions.append(key[2:-1])
+        else:
+            questions.append(f"unknown_thing_{i}")
+    return questions
+
+
+def legacy_query(knowledge: Dict[str, str], normalized: str) -> str:
+    """The original linear fuzzy scan."""
+    if normalized in knowledge:
+        return knowledge[normalized]
+    for key, value in knowledge.items():
+        if key in normalized or normalized in key:
+            return value
+    return "I don't know that yet. Try teaching me!"
+
+
+def run(size: int, question_count: int, check: int) -> None:
+    """Build an engine with `size` facts and time fuzzy queries."""
+    keys = build_keys(size)
+    engine = KnowledgeEngine()
+    engine.query("")  # Build the (empty) index now, so adds index incrementally
+
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        engine.add_knowledge(key, f"value {i}")
+    build = time.perf_counter() - start
+
+    questions = build_questions(keys, question_count)
+
+    for question in questions[:check]:
+        assert engine.query(question) == legacy_query(engine.knowledge, question), question
+
+    start = time.perf_counter()
+    for question in questions:
+        engine.query(question)
+    elapsed = time.perf_counter() - start
+
+    print(f"{size:>8} keys | build {build:6.2f} s | "
+          f"query {elapsed / question_count * 1e6:8.1f} µs avg")
+
+
+def run_store(size: int, question_count: int, check: int) -> None:
+    """Time a fresh engine over a shared store, with and without the persisted key index."""
+    keys = build_keys(size)
+    questions = build_questions(keys, question_count)
+    with tempfile.TemporaryDirectory() as path:
+        store = LogKnowledgeStore(path)
+        for i, key in enumerate(keys):
+            store.put(key, f"value {i}")
+        start = time.perf_counter()
+        store.save_key_index()
+        save = time.perf_counter() - start
+        # Keys learned after the index was saved are indexed in memory
+        for i, key in enumerate(build_keys(size // 100, seed=17)):
+            store.put(f"late_{key}", f"late {i}")
+        store.close()
+
+        answers = {}
+        for mode in ("persisted", "in-memory"):
+            store = LogKnowledgeStore(path)
+            if mode == "in-memory":
+                store.key_index = lambda: None
+            start = time.perf_counter()
+            engine = KnowledgeEngine(store)
+            engine.query(questions[-1])
+            first = time.perf_counter() - start
+
+            start = time.perf_counter()
+            answers[mode] = [engine.query(question) for question in questions]
+            elapsed = time.perf_counter() - start
+            print(f"{size:>8} keys | {mode:>9} | first answer {first * 1e3:8.1f} ms | "
+                  f"query {elapsed / question_count * 1e6:8.1f} µs avg | index saved in {save:5.2f} s")
+            store.close()
+        assert answers["persisted"] == answers["in-memory"]
+
+
+def main() -> None:
+    """Run the benchmark at each requested size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--questions", type=int, default=3000)
+    parser.add_argument("--check", type=int, default=30,
+                        help="questions cross-checked against the linear scan")
+    parser.add_argument("--store", action="store_true",
+                        help="time fresh engines over a shared LogKnowledgeStore")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        (run_store if args.store else run)(size, args.questions, args.check)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# ============================================================================
+# benchmarks/bench_knowledge_journal.py
+# ============================================================================
+"""
+Benchmark: JournaledKnowledgeStore learns per second and recovery time.
+
+Learns: concurrent writers call KnowledgeEngine.add_knowledge on a journaled
+store under each fsync policy; fsyncs per learn shows how many commits the
+"group" policy shares. Recovery: reopening a store whose facts are all in
+the journal, versus one with a snapshot and a short journal tail.
+
+Usage:
+    python -m benchmarks.bench_knowledge_journal [--learns 2000] [--threads 1 16] [--facts 100000]
+"""
+
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict
+
+from bot.core.knowledge_engine import KnowledgeEngine
+from bot.core.knowledge_journal import FSYNC_POLICIES, JournaledKnowledgeStore
+
+
+def bench_learns(policy: str, threads: int, learns: int, directory: str) -> Dict[str, float]:
+    """
+    Time `learns` add_knowledge calls spread over `threads` threads.
+
+    Returns:
+        learns/s and fsyncs per learn
+    """
+    store = JournaledKnowledgeStore(directory, fsync=policy)
+    engine = KnowledgeEngine(store)
+    per_thread = learns // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def writer(t: int) -> None:
+        barrier.wait()
+        for i in range(per_thread):
+            engine.add_knowledge(f"fact {t} {i}", f"value {i}")
+
+    workers = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    store.close()
+
+    total = per_thread * threads
+    return {"learns_per_s": total / elapsed, "fsyncs_per_learn": store.stats["fsyncs"] / total}
+
+
+def bench_recovery(facts: int, tail: int, directory: str) -> Dict[str, float]:
+    """
+    Build a store of `facts` facts and time reopening it.
+
+    Returns:
+        Open time with everything in the journal and with snapshot + tail
+    """
+    store = JournaledKnowledgeStore(directory, fsync="never")
+    store.put_many((f"fact {i}", f"value of fact {i}") for i in range(facts))
+    store.close()
+
+    start = time.perf_counter()
+    store = JournaledKnowledgeStore(directory, fsync="never")
+    journal_only = time.perf_counter() - start
+
+    store.snapshot()
+    store.put_many((f"late fact {i}", f"value {i}") for i in range(tail))
+    store.close()
+    start = time.perf_counter()
+    store = JournaledKnowledgeStore(directory, fsync="never")
+    with_snapshot = time.perf_counter() - start
+    assert len(store) == facts + tail
+    store.close()
+    return {"journal_only": journal_only, "with_snapshot": with_snapshot}
+
+
+def main() -> None:
+    """Run benchmarks and print results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learns", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--facts", type=int, default=100_000)
+    parser.add_argument("--tail", type=int, default=1000)
+    parser.add_argument("--dir", default=None, help="Directory on the disk to test (default: a temp dir)")
+    args = parser.parse_args()
+
+    print(f"add_knowledge, {args.learns} learns:")
+    print(f"  {'policy':<10} {'threads':>7} {'learns/s':>10} {'fsyncs/learn':>13}")
+    for policy in FSYNC_POLICIES:
+        for threads in args.threads:
+            directory = tempfile.mkdtemp(dir=args.dir)
+            try:
+                result = bench_learns(policy, threads, args.learns, directory)
+            finally:
+                shutil.rmtree(directory)
+            print(f"  {policy:<10} {threads:7d} {result['learns_per_s']:10.0f} {result['fsyncs_per_learn']:13.3f}")
+
+    directory = tempfile.mkdtemp(dir=args.dir)
+    try:
+        result = bench_recovery(args.facts, args.tail, directory)
+    finally:
+        shutil.rmtree(directory)
+    print(f"\nRecovery of {args.facts} facts:")
+    print(f"  journal replay only          {result['journal_only'] * 1e3:8.1f} ms")
+    print(f"  snapshot + {args.tail}-record tail  {result['with_snapshot'] * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
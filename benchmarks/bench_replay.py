@@ -0,0 +1,394 @@
+# ============================================================================
+# benchmarks/bench_replay.py
+# ============================================================================
+"""
+Benchmark: replay a JSONL conversation log through MainBot.process_message.
+
+Each line of the corpus is one message:
+
+    {"user_id": "u1", "channel": "telegram", "text": "what's the weather", "timestamp": 1700000000.0}
+
+The corpus is streamed (read, parsed and replayed one line at a time), so
+memory stays constant however large the log is. Replies are "sent" on a
+channel that discards them, so the send stage measures the bot's side of
+delivery only.
+
+Reported per stage (intent detection, entity extraction, context lookups
+and updates, action routing, send, and the whole turn):
+- call count and latency percentiles from a log-scale histogram
+- net memory blocks allocated per call (sys.getallocatedblocks deltas,
+  less the int holding the first reading; a steady positive number means
+  every call leaves something behind, such as its return value)
+and overall throughput in messages per second.
+
+Comparing builds: --save writes the results as JSON, --compare prints the
+change against saved results (exit status 1 past --tolerance), and
+--against DIR replays the same corpus with the bot package of another
+checkout (e.g. a git worktree of the previous release) in a subprocess:
+
+    python -m benchmarks.bench_replay --generate 200000 --corpus /tmp/corpus.jsonl
+    python -m benchmarks.bench_replay --corpus /tmp/corpus.jsonl --against ../bot-main
+
+Usage:
+    python -m benchmarks.bench_replay --corpus FILE [--limit N] [--histograms]
+"""
+
+import argparse
+import bisect
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+STAGES = ("intent", "extraction", "context", "routing", "send", "turn")
+
+# Methods timed as each stage: (attribute path on the bot, stage)
+HOOKS = (
+    ("intent_engine.detect_intent", "intent"),
+    ("intent_engine.extract_entities", "extraction"),
+    ("context_manager.get_pending", "context"),
+    ("context_manager.set_pending", "context"),
+    ("context_manager.update_entities", "context"),
+    ("context_manager.clear", "context"),
+    ("action_router.route", "routing"),
+)
+
+CITIES = ["Tokyo", "Paris", "Oslo", "New York", "Berlin", "Lima", "Cairo", "Sydney", "tokyo please"]
+SUBJECTS = ["germany", "france", "italy", "spain", "japan", "peru"]
+
+
+class Message(NamedTuple):
+    """One corpus line."""
+
+    user_id: str
+    channel: str
+    text: str
+    timestamp: float
+
+
+class Histogram:
+    """Log-scale latency histogram in microseconds (~12% bucket width)."""
+
+    BOUNDS_US = [0.25 * 1.12 ** i for i in range(180)]
+
+    def __init__(self):
+        """Initialize empty histogram."""
+        self.counts = [0] * (len(self.BOUNDS_US) + 1)
+        self.total = 0
+        self.sum_us = 0.0
+        self.max_us = 0.0
+        self.blocks = 0
+
+    def record(self, seconds: float, blocks: int = 0) -> None:
+        """Add one observation."""
+        us = seconds * 1e6
+        self.counts[bisect.bisect_left(self.BOUNDS_US, us)] += 1
+        self.total += 1
+        self.sum_us += us
+        self.blocks += blocks
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, q: float) -> float:
+        """Return the bucket upper bound containing quantile q (0..1)."""
+        if not self.total:
+            return 0.0
+        rank, seen = q * self.total, 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.BOUNDS_US[i] if i < len(self.BOUNDS_US) else self.max_us
+        return self.max_us
+
+    def summary(self) -> Dict[str, float]:
+        """Return count, percentiles, mean, max and blocks per call."""
+        calls = self.total or 1
+        return {"calls": self.total, "p50_us": self.percentile(0.5), "p90_us": self.percentile(0.9),
+                "p99_us": self.percentile(0.99), "max_us": self.max_us,
+                "mean_us": self.sum_us / calls, "blocks_per_call": self.blocks / calls}
+
+    def bars(self, width: int = 40) -> List[str]:
+        """Return one text bar per non-empty bucket."""
+        peak = max(self.counts) or 1
+        lines = []
+        for i, count in enumerate(self.counts):
+            if count:
+                bound = f"{self.BOUNDS_US[i]:10.1f}" if i < len(self.BOUNDS_US) else "       inf"
+                lines.append(f"    <= {bound} µs {'#' * max(1, count * width // peak):<{width}} {count}")
+        return lines
+
+
+def read_corpus(path: str, limit: Optional[int] = None) -> Iterator[Message]:
+    """
+    Stream messages from a JSONL file.
+
+    Args:
+        path: Corpus file
+        limit: Stop after this many messages
+
+    Yields:
+        Messages in file order (malformed lines are skipped)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        count = 0
+        for line in f:
+            if limit is not None and count >= limit:
+                return
+            try:
+                record = json.loads(line)
+                yield Message(str(record["user_id"]), record.get("channel", "internal"),
+                              record["text"], float(record.get("timestamp", 0.0)))
+            except (ValueError, KeyError, TypeError):
+                continue
+            count += 1
+
+
+def generate_corpus(path: str, count: int, users: int, seed: int = 7) -> None:
+    """
+    Write a synthetic corpus of short conversations.
+
+    Users interleave; each conversation is a multi-turn weather query, a
+    direct weather query, a learn command, a knowledge question or
+    small talk the bot does not understand.
+    """
+    rng = random.Random(seed)
+    now = 1_700_000_000.0
+    queues: Dict[int, List[str]] = {}
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(count):
+            user = rng.randrange(users)
+            if not queues.get(user):
+                kind = rng.random()
+                subject = rng.choice(SUBJECTS)
+                if kind < 0.25:
+                    queues[user] = ["what's the weather", f"in {rng.choice(CITIES)}"]
+                elif kind < 0.5:
+                    queues[user] = [f"Tell me the weather in {rng.choice(CITIES)}"]
+                elif kind < 0.65:
+                    queues[user] = [f"learn capital_of_{subject} = {subject.title()}ville"]
+                elif kind < 0.9:
+                    queues[user] = [f"what is the capital of {subject}?"]
+                else:
+                    queues[user] = [rng.choice(["hello there", "can you dance?", "thanks!"])]
+            now += rng.expovariate(50.0)
+            record = {"user_id": f"user_{user}", "channel": rng.choice(("telegram", "whatsapp", "mattermost")),
+                      "text": queues[user].pop(0), "timestamp": round(now, 3)}
+            f.write(json.dumps(record) + "\n")
+
+
+class _NullChannel:
+    """Channel that accepts and discards replies."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.sent = 0
+
+    def send_message(self, recipient_id: str, message: str) -> None:
+        self.sent += 1
+
+
+def _timed(function: Callable[..., Any], histogram: Histogram) -> Callable[..., Any]:
+    """Wrap function so each call is recorded in histogram."""
+    clock, blocks = time.perf_counter, sys.getallocatedblocks
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = clock()
+        before = blocks()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            after = blocks()
+            # The int returned by the first reading is itself a new block
+            histogram.record(clock() - start, after - before - 1)
+
+    return wrapper
+
+
+def replay(path: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Replay a corpus through a fresh bot.
+
+    Args:
+        path: Corpus file
+        limit: Stop after this many messages
+
+    Returns:
+        Results: throughput, per-stage summaries and histogram counts
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        from bot.main_bot import MainBot
+        bot = MainBot()
+
+    histograms = {stage: Histogram() for stage in STAGES}
+    for attribute, stage in HOOKS:
+        owner_name, _, method = attribute.partition(".")
+        owner = getattr(bot, owner_name, None)
+        if owner is not None and hasattr(owner, method):
+            setattr(owner, method, _timed(getattr(owner, method), histograms[stage]))
+
+    channels: Dict[str, _NullChannel] = {}
+    send = histograms["send"]
+    turn = histograms["turn"]
+    process = bot.process_message
+    clock, blocks = time.perf_counter, sys.getallocatedblocks
+    errors = 0
+
+    start = clock()
+    for message in read_corpus(path, limit):
+        channel = channels.get(message.channel)
+        if channel is None:
+            channel = channels[message.channel] = _NullChannel(message.channel)
+
+        began = clock()
+        before = blocks()
+        try:
+            response = process(message.user_id, message.text, message.channel)
+        except Exception:
+            errors += 1
+            continue
+        after = blocks()
+        turn.record(clock() - began, after - before)
+
+        began = clock()
+        before = blocks()
+        channel.send_message(message.user_id, response)
+        after = blocks()
+        send.record(clock() - began, after - before)
+    elapsed = clock() - start
+
+    messages = turn.total
+    return {
+        "messages": messages,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": messages / elapsed if elapsed else 0.0,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "stages": {stage: histograms[stage].summary() for stage in STAGES},
+        "histograms": {stage: histograms[stage].counts for stage in STAGES},
+    }
+
+
+def print_results(results: Dict[str, Any], show_histograms: bool = False) -> None:
+    """Print a results table."""
+    print(f"{results['messages']} messages in {results['seconds']:.2f}s: "
+          f"{results['throughput']:.0f} msg/s ({results['errors']} errors, "
+          f"max RSS {results['max_rss_kb'] / 1024:.1f} MiB)")
+    print(f"  {'stage':<11}{'calls':>9}{'p50 µs':>10}{'p90 µs':>10}{'p99 µs':>10}"
+          f"{'max µs':>11}{'mean µs':>10}{'blocks':>9}")
+    for stage, s in results["stages"].items():
+        print(f"  {stage:<11}{s['calls']:>9}{s['p50_us']:>10.1f}{s['p90_us']:>10.1f}{s['p99_us']:>10.1f}"
+              f"{s['max_us']:>11.1f}{s['mean_us']:>10.1f}{s['blocks_per_call']:>9.2f}")
+    if show_histograms:
+        for stage, counts in results["histograms"].items():
+            histogram = Histogram()
+            histogram.counts = counts
+            print(f"\n  {stage}:")
+            for line in histogram.bars():
+                print(line)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float,
+            labels: str = "baseline -> current") -> bool:
+    """
+    Print throughput and per-stage latency changes.
+
+    Returns:
+        True if anything got slower by more than tolerance
+    """
+    regressed = False
+
+    def line(name: str, old: float, new: float, higher_is_better: bool = False) -> None:
+        nonlocal regressed
+        change = new / old - 1 if old else 0.0
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        regressed = regressed or bool(flag)
+        print(f"  {name:<22} {old:10.1f} -> {new:10.1f} ({change:+.0%}) {flag}")
+
+    print(f"\nCompared ({labels}, tolerance {tolerance:.0%}):")
+    line("throughput msg/s", baseline["throughput"], current["throughput"], higher_is_better=True)
+    for stage, new in current["stages"].items():
+        old = baseline["stages"].get(stage)
+        if old and old["calls"] and new["calls"]:
+            line(f"{stage} p50 µs", old["p50_us"], new["p50_us"])
+            line(f"{stage} p99 µs", old["p99_us"], new["p99_us"])
+    return regressed
+
+
+def replay_other_build(tree: str, corpus: str, limit: Optional[int]) -> Dict[str, Any]:
+    """
+    Replay the corpus with the bot package from another checkout.
+
+    This script runs in a subprocess with that checkout first on the path,
+    so the other build needs no copy of the harness.
+    """
+    with tempfile.NamedTemporaryFile("r", suffix=".json") as out:
+        command = [sys.executable, os.path.abspath(__file__), "--corpus", corpus, "--save", out.name, "--quiet"]
+        if limit is not None:
+            command += ["--limit", str(limit)]
+        env = dict(os.environ, PYTHONPATH=os.path.abspath(tree))
+        subprocess.run(command, cwd=tree, env=env, check=True)
+        return json.load(out)
+
+
+def main() -> None:
+    """Generate or replay a corpus and report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=None, help="JSONL conversation log")
+    parser.add_argument("--generate", type=int, default=None, metavar="N",
+                        help="Write a synthetic corpus of N messages to --corpus first")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--histograms", action="store_true", help="Print per-stage histograms")
+    parser.add_argument("--save", default=None, help="Write results to this JSON file")
+    parser.add_argument("--compare", default=None, help="Compare with results saved by --save")
+    parser.add_argument("--against", default=None, metavar="DIR",
+                        help="Also replay with the bot package of another checkout and compare")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--quiet", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    corpus = args.corpus
+    cleanup = None
+    if corpus is None:
+        cleanup = corpus = tempfile.mkstemp(suffix=".jsonl")[1]
+        args.generate = args.generate or 50_000
+    try:
+        if args.generate:
+            generate_corpus(corpus, args.generate, args.users)
+            if not args.quiet:
+                print(f"Wrote {args.generate} messages to {corpus}")
+
+        results = replay(corpus, args.limit)
+        if not args.quiet:
+            print_results(results, args.histograms)
+
+        if args.save:
+            with open(args.save, "w") as out:
+                json.dump(results, out)
+
+        regressed = False
+        if args.compare:
+            with open(args.compare, "r") as baseline_file:
+                regressed = compare(json.load(baseline_file), results, args.tolerance)
+        if args.against:
+            other = replay_other_build(args.against, corpus, args.limit)
+            print(f"\nOther build ({args.against}):")
+            print_results(other, args.histograms)
+            regressed = compare(other, results, args.tolerance, "other build -> this build") or regressed
+        if regressed:
+            sys.exit(1)
+    finally:
+        if cleanup:
+            os.unlink(cleanup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# ============================================================================
+# benchmarks/bench_startup.py
+# ============================================================================
+"""
+Benchmark: cold-start cost of the bot.
+
+Each run is a fresh interpreter and measures:
+- import time of bot.main_bot (python -X importtime), with the heaviest modules
+- wall clock from interpreter start to the first response, for a config
+  that lists every channel (channels themselves are built on first use)
+
+Results can be saved and compared to catch regressions:
+
+    python -m benchmarks.bench_startup --save startup.json
+    python -m benchmarks.bench_startup --compare startup.json [--tolerance 0.25]
+
+--compare exits with status 1 if a median got slower than the baseline by
+more than the tolerance.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 15] [--top 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_RESPONSE = """
+import contextlib, io, sys, time
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    from bot.main_bot import MainBot
+    imported = time.perf_counter()
+    bot = MainBot(sys.argv[1])
+    built = time.perf_counter()
+    bot.process_message("user", "what's the weather in Oslo", "telegram")
+done = time.perf_counter()
+print(imported - start, built - imported, done - built)
+"""
+
+
+def import_profile() -> Tuple[float, List[Tuple[float, str]]]:
+    """
+    Import bot.main_bot under -X importtime.
+
+    Returns:
+        (total cumulative seconds, [(self seconds, module)] heaviest first)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import bot.main_bot"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    total = 0.0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(own) / 1e6, name.strip()))
+        if name.strip() == "bot.main_bot":
+            total = int(cumulative) / 1e6
+    modules.sort(reverse=True)
+    return total, modules
+
+
+def first_response(config_path: str) -> Tuple[float, float, float, float]:
+    """
+    Start a fresh interpreter and answer one message.
+
+    Returns:
+        (process wall clock, import, MainBot(), first process_message) in seconds
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", FIRST_RESPONSE, config_path],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    imported, built, answered = map(float, result.stdout.split())
+    return wall, imported, built, answered
+
+
+def main() -> None:
+    """Run the measurements and report medians."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--save", default=None, help="Write medians to this JSON file")
+    parser.add_argument("--compare", default=None, help="Compare medians with this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    config = {"telegram": {"api_token": "TOKEN"}, "whatsapp": {"api_key": "KEY"},
+              "mattermost": {"webhook_url": "https://mattermost.example.com/hooks/x"}}
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(config, f)
+    try:
+        profiles = [import_profile() for _ in range(args.runs)]
+        runs = [first_response(f.name) for _ in range(args.runs)]
+    finally:
+        os.unlink(f.name)
+
+    medians: Dict[str, float] = {
+        "import_ms": statistics.median(total for total, _ in profiles) * 1000,
+        "process_wall_ms": statistics.median(run[0] for run in runs) * 1000,
+        "import_in_process_ms": statistics.median(run[1] for run in runs) * 1000,
+        "init_ms": statistics.median(run[2] for run in runs) * 1000,
+        "first_response_ms": statistics.median(run[3] for run in runs) * 1000,
+    }
+
+    print(f"Median of {args.runs} fresh interpreters:")
+    for name, value in medians.items():
+        print(f"  {name:<22} {value:8.2f}")
+
+    heaviest: Dict[str, List[float]] = {}
+    for _, modules in profiles:
+        for own, name in modules:
+            heaviest.setdefault(name, []).append(own)
+    ranked = sorted(((statistics.median(v), name) for name, v in heaviest.items()), reverse=True)
+    print(f"\nHeaviest imports (self time, median):")
+    for own, name in ranked[:args.top]:
+        print(f"  {own * 1000:7.2f} ms  {name}")
+
+    if args.save:
+        with open(args.save, "w") as out:
+            json.dump(medians, out, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressed = False
+        print(f"\nCompared with {args.compare} (tolerance {args.tolerance:.0%}):")
+        for name, value in medians.items():
+            if name not in baseline:
+                continue
+            change = value / baseline[name] - 1 if baseline[name] else 0.0
+            flag = "REGRESSION" if change > args.tolerance else ""
+            regressed = regressed or bool(flag)
+            print(f"  {name:<22} {baseline[name]:8.2f} -> {value:8.2f} ({change:+.0%}) {flag}")
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
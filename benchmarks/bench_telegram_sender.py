@@ -0,0 +1,123 @@
+# ============================================================================
+# benchmarks/bench_telegram_sender.py
+# ============================================================================
+"""
+Benchmark: TelegramSender against a local stub Bot API server.
+
+The stub records every request and answers like sendMessage after a
+configurable delay, so pooling and pipelining gains are visible.
+
+Usage:
+    python -m benchmarks.bench_telegram_sender [--messages 2000] [--latency-ms 5]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from bot.channels.telegram_channel import TelegramSender
+
+
+class StubBotAPI:
+    """Minimal HTTP/1.1 keep-alive server imitating sendMessage."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests: List[Tuple[float, str, Dict]] = []
+        self.connections = 0
+        self._server = None
+
+    async def start(self) -> int:
+        """Start listening on a free port and return it."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve pipelined requests on one connection, answering in order."""
+        self.connections += 1
+        replies: asyncio.Queue = asyncio.Queue()
+        sender = asyncio.create_task(self._write_replies(replies, writer))
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                path = lines[0].split(" ")[1]
+                length = next(int(line.split(":")[1]) for line in lines
+                              if line.lower().startswith("content-length"))
+                payload = json.loads(await reader.readexactly(length))
+                self.requests.append((time.perf_counter(), path, payload))
+                message_id = len(self.requests)
+                replies.put_nowait(asyncio.get_running_loop().time() + self.latency)
+                replies.put_nowait(message_id)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            sender.cancel()
+            writer.close()
+
+    async def _write_replies(self, replies: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        """Write responses in request order once their latency elapsed."""
+        loop = asyncio.get_running_loop()
+        while True:
+            due = await replies.get()
+            message_id = await replies.get()
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            body = json.dumps({"ok": True, "result": {"message_id": message_id}}).encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+
+
+async def run(label: str, messages: int, chats: int, latency: float, **options) -> None:
+    """Send `messages` spread over `chats` and report throughput."""
+    stub = StubBotAPI(latency)
+    port = await stub.start()
+    sender = TelegramSender("TOKEN", f"http://127.0.0.1:{port}", **options)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[sender.send(str(i % chats), f"message {i}") for i in range(messages)])
+    elapsed = time.perf_counter() - start
+    await sender.close()
+    await stub.stop()
+
+    per_chat: Dict[str, List[float]] = defaultdict(list)
+    for at, _, payload in stub.requests:
+        per_chat[payload["chat_id"]].append(at)
+    gaps = [b - a for times in per_chat.values() for a, b in zip(times, times[1:])]
+
+    print(f"{label:<28} {messages / elapsed:9.0f} sends/s | "
+          f"{stub.connections} connection(s) | "
+          f"min per-chat gap {min(gaps) * 1000 if gaps else 0:7.1f} ms")
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    """Run the benchmark scenarios."""
+    latency = args.latency_ms / 1000
+    unlimited = {"global_rate": 1e9, "chat_rate": 1e9, "chat_burst": 1e9}
+    await run("1 conn, no pipelining", args.messages, args.chats, latency,
+              max_connections=1, pipeline_depth=1, **unlimited)
+    await run("4 conns, no pipelining", args.messages, args.chats, latency,
+              max_connections=4, pipeline_depth=1, **unlimited)
+    await run("4 conns, pipeline depth 16", args.messages, args.chats, latency,
+              max_connections=4, pipeline_depth=16, **unlimited)
+    await run("Telegram limits (30/s, 1/s)", 60, 20, latency)
+
+
+def main() -> None:
+    """Parse arguments and run."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
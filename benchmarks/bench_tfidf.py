@@ -0,0 +1,116 @@
+# ============================================================================
+# benchmarks/bench_tfidf.py
+# ============================================================================
+"""
+Benchmark: TF-IDF knowledge retrieval on a large synthetic fact base.
+
+Builds facts like "capital_of_<place>" = "<city>" or "<thing>_<attribute>"
+from a random vocabulary, adds them one by one (incremental indexing),
+then times KnowledgeEngine.query on paraphrased questions. First checks
+that MainBot's response cache drops ranked answers a new fact changes.
+
+Usage:
+    python -m benchmarks.bench_tfidf [--facts 100000] [--queries 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+from typing import List, Tuple
+
+from bot.core.knowledge_engine import KnowledgeEngine
+from bot.main_bot import MainBot
+
+ATTRIBUTES = ["capital", "population", "area", "currency", "language", "founder", "height",
+              "speed", "color", "author", "price", "weight", "inventor", "president"]
+CONNECTORS = ["of", "for", "the", "in"]
+TEMPLATES = ["what is the {attr} of {name}?", "tell me about the {attr} of {name}",
+             "{name} {attr}", "do you know the {attr} for {name}"]
+
+
+def make_words(count: int, rng: random.Random) -> List[str]:
+    """Return distinct pronounceable pseudo-words."""
+    consonants, vowels = "bcdfghklmnprstvz", "aeiou"
+    words = set()
+    while len(words) < count:
+        length = rng.randint(2, 4)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+    return sorted(words)
+
+
+def build_facts(count: int, seed: int = 11) -> List[Tuple[str, str, str, str]]:
+    """Return (key, value, attribute, name) tuples."""
+    rng = random.Random(seed)
+    names = make_words(count // 4 + 1, rng)
+    facts, seen = [], set()
+    while len(facts) < count:
+        attr, name = rng.choice(ATTRIBUTES), rng.choice(names)
+        if (attr, name) in seen:
+            continue
+        seen.add((attr, name))
+        key = f"{attr}_{rng.choice(CONNECTORS)}_{name}"
+        facts.append((key, f"{rng.choice(names).title()} {rng.randint(1, 999)}", attr, name))
+    return facts
+
+
+def check_response_cache() -> None:
+    """Assert cached tfidf answers follow a fact being learned and relearned."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = MainBot(knowledge=KnowledgeEngine(retrieval="tfidf"))
+    question = "what is the capital of germany?"
+    steps = [(None, "I don't know that yet. Try teaching me!"),
+             ("germany_capital = Berlin", "Berlin"),
+             ("germany_capital = Bonn", "Bonn")]
+    for fact, expected in steps:
+        if fact is not None:
+            bot.process_message("bench", f"learn {fact}")
+        for _ in range(2):  # miss, then cache hit
+            answer = bot.process_message("bench", question)
+            assert answer == expected, f"cached answer {answer!r}, expected {expected!r}"
+    print("response cache follows learned facts: ok")
+
+
+def main() -> None:
+    """Build the index and time queries."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--facts", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    check_response_cache()
+    facts = build_facts(args.facts)
+    engine = KnowledgeEngine(retrieval="tfidf")
+    engine.query("")  # Build the (empty) index now, so adds index incrementally
+    start = time.perf_counter()
+    for key, value, _, _ in facts:
+        engine.add_knowledge(key, value)
+    build = time.perf_counter() - start
+    print(f"Indexed {len(facts)} facts in {build:.2f}s ({build / len(facts) * 1e6:.1f} µs/add)")
+
+    rng = random.Random(5)
+    sample = [rng.choice(facts) for _ in range(args.queries)]
+    questions = [rng.choice(TEMPLATES).format(attr=attr, name=name) for _, _, attr, name in sample]
+
+    latencies, correct = [], 0
+    for (_, value, _, _), question in zip(sample, questions):
+        start = time.perf_counter()
+        answer = engine.query(question)
+        latencies.append(time.perf_counter() - start)
+        correct += answer == value
+
+    misses = [f"what is the {attr} of zzqx?" for attr in ATTRIBUTES]
+    false_hits = sum(engine.query(q) != engine.query("zzqx zzqy") for q in misses)
+
+    latencies.sort()
+    print(f"query p50 {statistics.median(latencies) * 1e3:.3f} ms | "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.3f} ms | "
+          f"max {latencies[-1] * 1e3:.3f} ms")
+    print(f"paraphrased questions answered correctly: {correct}/{len(questions)}")
+    print(f"unknown-entity questions answered anyway: {false_hits}/{len(misses)}")
+
+
+if __name__ == "__main__":
+    main()
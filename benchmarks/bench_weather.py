@@ -0,0 +1,88 @@
+# ============================================================================
+# benchmarks/bench_weather.py
+# ============================================================================
+"""
+Benchmark: weather cache hit rate, request coalescing and tail latency.
+
+Many concurrent workers ask for the weather in locations drawn from a
+skewed (Zipf-like) distribution, against a FakeWeatherProvider with
+simulated upstream latency. The same workload runs once straight against
+the provider and once through WeatherService.
+
+Usage:
+    python -m benchmarks.bench_weather [--requests 5000] [--workers 32]
+        [--locations 500] [--latency 0.02] [--ttl 600]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from bot.skills.weather_provider import FakeWeatherProvider, WeatherReport, WeatherService
+
+
+def workload(requests: int, locations: int, seed: int = 3) -> List[str]:
+    """Return location names; location i is picked with weight 1/(i+1)."""
+    rng = random.Random(seed)
+    names = [f"City {i}" for i in range(locations)]
+    weights = [1 / (i + 1) for i in range(locations)]
+    return rng.choices(names, weights, k=requests)
+
+
+def run(fetch: Callable[[str], WeatherReport], queries: List[str], workers: int) -> List[float]:
+    """Run queries on a thread pool and return per-request latencies."""
+    def timed(location: str) -> float:
+        start = time.perf_counter()
+        fetch(location)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(timed, queries))
+
+
+def report(label: str, latencies: List[float], elapsed: float, upstream: int) -> None:
+    """Print a result line."""
+    latencies = sorted(latencies)
+    print(f"{label:<10} {len(latencies) / elapsed:9.0f} req/s | "
+          f"p50 {statistics.median(latencies) * 1e3:7.3f} ms | "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:7.3f} ms | "
+          f"upstream fetches {upstream}")
+
+
+def main() -> None:
+    """Compare uncached and cached weather lookups."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--locations", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--ttl", type=float, default=600.0)
+    parser.add_argument("--max-entries", type=int, default=1024)
+    args = parser.parse_args()
+
+    queries = workload(args.requests, args.locations)
+    print(f"{args.requests} requests over {len(set(queries))} locations, {args.workers} workers, "
+          f"upstream {args.latency * 1e3:.0f}+{args.jitter * 1e3:.0f} ms")
+
+    direct = FakeWeatherProvider(args.latency, args.jitter, seed=1)
+    start = time.perf_counter()
+    latencies = run(direct.fetch, queries, args.workers)
+    report("direct", latencies, time.perf_counter() - start, direct.calls)
+
+    provider = FakeWeatherProvider(args.latency, args.jitter, seed=1)
+    service = WeatherService(provider, ttl=args.ttl, max_entries=args.max_entries)
+    start = time.perf_counter()
+    latencies = run(service.get, queries, args.workers)
+    report("cached", latencies, time.perf_counter() - start, provider.calls)
+
+    stats = service.stats()
+    print(f"hit rate {stats['hits'] / len(queries):.1%} | coalesced {stats['coalesced']} | "
+          f"cached locations {stats['cached']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# ============================================================================
+# benchmarks/bench_webhook.py
+# ============================================================================
+"""
+Load test: replay webhook payloads against WebhookServer at a fixed rate.
+
+Requests are sent open-loop on a schedule (one every 1/rps seconds) over
+a pool of keep-alive connections. Latency is measured from each request's
+scheduled time, so a stalled server shows up as queueing delay instead of
+silently lowering the offered load.
+
+Payload files are JSON lines: {"channel": "telegram", "payload": {...}}.
+Without --payloads a synthetic recording covering all three channels is used.
+
+Usage:
+    python -m benchmarks.bench_webhook [--rps 2000] [--duration 5] [--payloads FILE]
+    python -m benchmarks.bench_webhook --url http://host:8080   # external server
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from bot.channels.mattermost_channel import MattermostChannel
+from bot.channels.telegram_channel import TelegramChannel
+from bot.channels.whatsapp_channel import WhatsAppChannel
+from bot.core.http_pool import HTTPConnectionPool
+from bot.main_bot import MainBot
+from bot.webhook_server import WebhookServer
+
+TEXTS = [
+    "what is the capital of germany?",
+    "what's the weather",
+    "in Tokyo",
+    "Tell me the weather in Paris",
+    "hello there",
+    "learn capital_of_france = Paris",
+]
+
+
+def synthetic_payloads(count: int, users: int, seed: int = 5) -> List[Tuple[str, Dict[str, Any]]]:
+    """Build payloads shaped like each platform's webhook."""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        user = rng.randrange(users)
+        text = rng.choice(TEXTS)
+        channel = rng.choice(("telegram", "whatsapp", "mattermost"))
+        if channel == "telegram":
+            payload = {"update_id": i, "message": {"message_id": i, "chat": {"id": user}, "text": text}}
+        elif channel == "whatsapp":
+            payload = {"phone": f"+1555{user:07d}", "message": text}
+        else:
+            payload = {"user_id": f"mm{user}", "text": text, "channel_id": "town-square"}
+        payloads.append((channel, payload))
+    return payloads
+
+
+def load_payloads(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Read recorded payloads from a JSON lines file."""
+    with open(path, "r") as f:
+        return [(record["channel"], record["payload"]) for record in map(json.loads, f) if record]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Return the q-quantile (0..1) of sorted values."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def replay(url: str, payloads: List[Tuple[str, Dict[str, Any]]], rps: float,
+                 duration: float, connections: int) -> None:
+    """Send payloads on schedule and print the latency report."""
+    pool = HTTPConnectionPool(url, max_connections=connections, pipeline_depth=1, timeout=30.0)
+    loop = asyncio.get_running_loop()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def send(at: float, channel: str, payload: Dict[str, Any]) -> None:
+        try:
+            response = await pool.post_json(f"/webhook/{channel}", payload)
+            statuses[response.status] += 1
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            statuses[type(e).__name__] += 1
+        latencies.append(loop.time() - at)
+
+    total = int(rps * duration)
+    start = loop.time() + 0.05
+    tasks = []
+    for i in range(total):
+        at = start + i / rps
+        delay = at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        channel, payload = payloads[i % len(payloads)]
+        tasks.append(loop.create_task(send(at, channel, payload)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+    await pool.close()
+
+    latencies.sort()
+    print(f"offered {rps:.0f} req/s for {duration:.1f}s -> {total / elapsed:.0f} req/s completed")
+    print(f"  statuses: {dict(statuses)}")
+    print(f"  latency p50 {percentile(latencies, 0.50) * 1000:.2f} ms | "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms | "
+          f"max {latencies[-1] * 1000 if latencies else 0:.2f} ms")
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    """Run against a local server unless --url is given."""
+    payloads = load_payloads(args.payloads) if args.payloads else synthetic_payloads(5000, args.users)
+
+    server: Optional[WebhookServer] = None
+    url = args.url
+    if url is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            bot = MainBot()
+            # Replies go back in the HTTP response instead of to the platforms
+            bot.channels.update(telegram=TelegramChannel("TOKEN"), whatsapp=WhatsAppChannel("KEY"),
+                                mattermost=MattermostChannel("http://localhost/hooks/x"))
+        bot.knowledge.add_knowledge("capital_of_germany", "Berlin")
+        server = WebhookServer(bot, port=0, reply=False)
+        url = f"http://127.0.0.1:{await server.start()}"
+
+    try:
+        for rps in args.rps:
+            await replay(url, payloads, rps, args.duration, args.connections)
+    finally:
+        if server is not None:
+            await server.stop()
+
+
+def main() -> None:
+    """Parse arguments and run."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Target server (default: start one in-process)")
+    parser.add_argument("--payloads", default=None, help="JSON lines file of recorded payloads")
+    parser.add_argument("--rps", type=float, nargs="+", default=[500, 2000])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--users", type=int, default=1000)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 # ============================================================================
 """Mattermost channel implementation."""
 
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from bot.core.base_channel import BaseChannel
 
 
@@ -14,14 +14,17 @@ class MattermostChannel(BaseChannel):
     In production, this would use mattermostdriver library.
     """
 
-    def __init__(self, webhook_url: str):
+    def __init__(self, webhook_url: str, merge_posts: bool = False):
         """
         Initialize Mattermost channel.
 
         Args:
             webhook_url: Mattermost incoming webhook URL
+            merge_posts: Let send_batch() join a recipient's queued messages
+                into one post (they then show as a single message)
         """
         self.webhook_url = webhook_url
+        self.merge_posts = merge_posts
 
     @property
     def name(self) -> str:
@@ -38,6 +41,36 @@ class MattermostChannel(BaseChannel):
         """
         print(f"[Mattermost] → {recipient_id}: {message}")
 
+    def send_batch(self, messages: Sequence[Tuple[str, str]]) -> List[Optional[Exception]]:
+        """
+        Send several messages.
+
+        Each message is its own post unless merge_posts is set; then
+        messages to the same recipient are joined into one post, keeping
+        their order, so a burst costs one webhook call per recipient.
+
+        Args:
+            messages: (recipient_id, message) pairs
+
+        Returns:
+            One entry per message: None if sent, else the error
+        """
+        if not self.merge_posts:
+            return super().send_batch(messages)
+
+        by_recipient: Dict[str, List[int]] = {}
+        for position, (recipient_id, _) in enumerate(messages):
+            by_recipient.setdefault(recipient_id, []).append(position)
+
+        errors: List[Optional[Exception]] = [None] * len(messages)
+        for recipient_id, positions in by_recipient.items():
+            try:
+                self.send_message(recipient_id, "\n".join(messages[p][1] for p in positions))
+            except Exception as e:
+                for position in positions:
+                    errors[position] = e
+        return errors
+
     def receive_message(self, payload: Any) -> Dict[str, str]:
         """
         Process Mattermost webhook payload.
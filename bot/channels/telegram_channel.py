@@ -4,25 +4,142 @@
 # ============================================================================
 """Telegram channel implementation."""
 
-from typing import Any, Dict
+import asyncio
+import inspect
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from bot.core.async_support import BackgroundLoop
 from bot.core.base_channel import BaseChannel
+from bot.core.http_pool import HTTPConnectionPool
+from bot.core.rate_limit import RateLimiter
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+# Event loop used when send_message() is called from sync code
+_delivery_loop = BackgroundLoop("telegram-delivery")
+
+
+class TelegramAPIError(Exception):
+    """Raised when the Bot API rejects a request."""
+
+    def __init__(self, status: int, description: str, retry_after: Optional[float] = None):
+        super().__init__(f"Telegram API error {status}: {description}")
+        self.status = status
+        self.description = description
+        self.retry_after = retry_after
+
+
+class TelegramSender:
+    """
+    Delivers messages through the Bot API sendMessage method.
+
+    Features:
+    - Persistent keep-alive connections with request pipelining
+    - Global and per-chat token buckets; each send is scheduled for its
+      slot instead of retrying after a 429
+    """
+
+    def __init__(self, api_token: str, api_url: str = TELEGRAM_API_URL, max_connections: int = 4,
+                 pipeline_depth: int = 8, global_rate: float = 30.0, chat_rate: float = 1.0,
+                 global_burst: float = 1.0, chat_burst: float = 1.0, timeout: float = 10.0):
+        """
+        Initialize sender.
+
+        Args:
+            api_token: Telegram Bot API token
+            api_url: Bot API origin
+            max_connections: Keep-alive connections per event loop
+            pipeline_depth: In-flight requests per connection
+            global_rate: Messages per second across all chats
+            chat_rate: Messages per second to one chat
+            global_burst: Messages sent back to back across all chats (kept
+                small: a full bucket plus a second of refill must stay
+                within Telegram's 30 per second)
+            chat_burst: Messages one chat may receive back to back
+            timeout: Seconds to wait for each response
+        """
+        self.api_url = api_url
+        self.max_connections = max_connections
+        self.pipeline_depth = pipeline_depth
+        self.timeout = timeout
+        self.limiter = RateLimiter(global_rate, chat_rate, global_burst=global_burst, per_key_burst=chat_burst)
+        self.sent = 0
+
+        self._path = f"/bot{api_token}/sendMessage"
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, HTTPConnectionPool]" = \
+            weakref.WeakKeyDictionary()
+
+    def _pool(self) -> HTTPConnectionPool:
+        """Return the connection pool for the running event loop."""
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = HTTPConnectionPool(
+                self.api_url, self.max_connections, self.pipeline_depth, self.timeout)
+        return pool
+
+    async def send(self, chat_id: str, text: str) -> Dict[str, Any]:
+        """
+        Send a text message.
+
+        Args:
+            chat_id: Telegram chat ID
+            text: Message text
+
+        Returns:
+            The sent Message object
+
+        Raises:
+            TelegramAPIError: If the API rejects the message
+            ConnectionError: If the connection dropped
+        """
+        delay = self.limiter.reserve(chat_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        response = await self._pool().post_json(self._path, {"chat_id": chat_id, "text": text})
+        try:
+            data = response.json()
+        except ValueError:
+            raise TelegramAPIError(response.status, "invalid JSON response")
+
+        if response.status != 200 or not data.get("ok"):
+            retry_after = (data.get("parameters") or {}).get("retry_after")
+            raise TelegramAPIError(response.status, data.get("description", "unknown error"), retry_after)
+
+        self.sent += 1
+        return data.get("result", {})
+
+    async def close(self) -> None:
+        """Close the connection pool of the running event loop."""
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.close()
 
 
 class TelegramChannel(BaseChannel):
     """
-    Telegram messaging channel (mocked implementation).
+    Telegram messaging channel.
 
-    In production, this would use python-telegram-bot library.
+    Messages are delivered through TelegramSender. Async callers share the
+    caller's event loop; sync callers go through a background loop.
     """
 
-    def __init__(self, api_token: str):
+    def __init__(self, api_token: str, api_url: str = TELEGRAM_API_URL, **sender_options: Any):
         """
         Initialize Telegram channel.
 
         Args:
             api_token: Telegram Bot API token
+            api_url: Bot API origin (override for a local Bot API server)
+            **sender_options: Extra TelegramSender options
         """
         self.api_token = api_token
+        self.sender = TelegramSender(api_token, api_url, **sender_options)
+
+    # Options are forwarded to TelegramSender, so report its signature
+    # (checked against channels.json when the config is loaded)
+    __signature__ = inspect.signature(TelegramSender)
 
     @property
     def name(self) -> str:
@@ -31,13 +148,37 @@ class TelegramChannel(BaseChannel):
 
     def send_message(self, recipient_id: str, message: str) -> None:
         """
-        Send message via Telegram (mocked).
+        Send message via Telegram, blocking until it is delivered.
+
+        Args:
+            recipient_id: Telegram chat ID
+            message: Message text
+        """
+        _delivery_loop.run(self.sender.send(recipient_id, message))
+
+    async def send_message_async(self, recipient_id: str, message: str) -> None:
+        """
+        Send message via Telegram from asyncio.
 
         Args:
             recipient_id: Telegram chat ID
             message: Message text
         """
-        print(f"[Telegram] → {recipient_id}: {message}")
+        await self.sender.send(recipient_id, message)
+
+    async def send_batch_async(self, messages: Sequence[Tuple[str, str]]) -> List[Optional[Exception]]:
+        """
+        Send several messages concurrently over the pooled connections.
+
+        Args:
+            messages: (chat_id, text) pairs
+
+        Returns:
+            One entry per message: None if sent, else the error
+        """
+        results = await asyncio.gather(
+            *[self.sender.send(chat_id, text) for chat_id, text in messages], return_exceptions=True)
+        return [result if isinstance(result, Exception) else None for result in results]
 
     def receive_message(self, payload: Any) -> Dict[str, str]:
         """
@@ -49,6 +190,14 @@ class TelegramChannel(BaseChannel):
         Returns:
             Normalized message dict
         """
+        # Bot API Update: {"update_id": ..., "message": {"chat": {"id": ...}, "text": ...}}
+        if isinstance(payload, dict) and isinstance(payload.get("message"), dict):
+            message = payload["message"]
+            return {
+                "user_id": str((message.get("chat") or {}).get("id", "unknown")),
+                "text": message.get("text", "")
+            }
+
         # Mock implementation
         if isinstance(payload, dict):
             return {
@@ -57,4 +206,3 @@ class TelegramChannel(BaseChannel):
             }
         return {"user_id": "unknown", "text": str(payload)}
 
-
@@ -3,7 +3,7 @@
 # ============================================================================
 """Routes intents to appropriate skill handlers."""
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from .base_action import BaseAction
 
 
@@ -13,13 +13,21 @@ class ActionRouter:
 
     Features:
     - Action registration
-    - Intent-to-action routing
+    - O(1) intent-to-action dispatch table
+    - Cached required entities per intent
     - Graceful fallback for unhandled intents
+
+    The dispatch table is filled at register time for declared intents
+    (BaseAction.intents) and on first use for anything else by probing
+    can_handle(). Either way the first registered action that handles an
+    intent wins, exactly like a linear scan.
     """
 
     def __init__(self):
         """Initialize with empty action list."""
         self.actions: List[BaseAction] = []
+        self._dispatch: Dict[str, Optional[BaseAction]] = {}
+        self._required: Dict[str, List[str]] = {}
 
     def register(self, action: BaseAction) -> None:
         """
@@ -30,6 +38,31 @@ class ActionRouter:
         """
         self.actions.append(action)
 
+        # Intents nobody handled so far may be handled now
+        for intent, handler in self._dispatch.items():
+            if handler is None and action.can_handle(intent):
+                self._dispatch[intent] = action
+                self._required.pop(intent, None)
+
+        for intent in action.intents:
+            if intent not in self._dispatch:
+                self._dispatch[intent] = self._probe(intent)
+
+    def _probe(self, intent: str) -> Optional[BaseAction]:
+        """Return the first registered action handling intent."""
+        for action in self.actions:
+            if action.can_handle(intent):
+                return action
+        return None
+
+    def _find(self, intent: str) -> Optional[BaseAction]:
+        """Look up the action for intent, probing once for unknown intents."""
+        try:
+            return self._dispatch[intent]
+        except KeyError:
+            action = self._dispatch[intent] = self._probe(intent)
+            return action
+
     def route(self, intent: str, params: Dict[str, Any]) -> str:
         """
         Route intent to appropriate action handler.
@@ -41,27 +74,50 @@ class ActionRouter:
         Returns:
             Response string from action or fallback message
         """
-        for action in self.actions:
-            if action.can_handle(intent):
-                try:
-                    return action.execute(params)
-                except Exception as e:
-                    return f"Sorry, an error occurred: {str(e)}"
+        action = self._find(intent)
+        if action is None:
+            return f"Sorry, I don't have an action for '{intent}'."
+
+        try:
+            return action.execute(params)
+        except Exception as e:
+            return f"Sorry, an error occurred: {str(e)}"
+
+    async def route_async(self, intent: str, params: Dict[str, Any]) -> str:
+        """
+        Route intent to appropriate action handler from asyncio.
 
-        return f"Sorry, I don't have an action for '{intent}'."
+        Args:
+            intent: Detected intent string
+            params: Extracted entities and parameters
+
+        Returns:
+            Response string from action or fallback message
+        """
+        action = self._find(intent)
+        if action is None:
+            return f"Sorry, I don't have an action for '{intent}'."
+
+        try:
+            return await action.execute_async(params)
+        except Exception as e:
+            return f"Sorry, an error occurred: {str(e)}"
 
     def get_required_entities(self, intent: str) -> List[str]:
         """
         Get required entities for an intent.
 
+        The result is computed once per intent; callers must not mutate it.
+
         Args:
             intent: Intent string
 
         Returns:
             List of required entity names
         """
-        for action in self.actions:
-            if action.can_handle(intent):
-                return action.required_entities()
-        return []
-
+        required = self._required.get(intent)
+        if required is None:
+            action = self._find(intent)
+            required = action.required_entities() if action is not None else []
+            self._required[intent] = required
+        return required
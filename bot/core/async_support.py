@@ -0,0 +1,157 @@
+# ============================================================================
+# bot/core/async_support.py
+# ============================================================================
+"""Helpers for running the sync bot API inside asyncio."""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future as ConcurrentFuture
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Coroutine, Dict, Optional, Tuple
+
+DEFAULT_MAX_WORKERS = 32
+
+_executor: Optional[ThreadPoolExecutor] = None
+_max_workers = DEFAULT_MAX_WORKERS
+
+
+def set_max_workers(max_workers: int) -> None:
+    """
+    Set the size of the shared thread pool for sync skills and channels.
+
+    Takes effect for a pool that has not been created yet.
+
+    Args:
+        max_workers: Maximum number of concurrently running sync calls
+    """
+    global _max_workers
+    _max_workers = max_workers
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared bounded thread pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="bot-sync")
+    return _executor
+
+
+async def run_sync(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking callable in the shared thread pool.
+
+    Args:
+        func: Callable to run
+        *args: Positional arguments
+
+    Returns:
+        The callable's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
+
+
+class KeyedLock:
+    """
+    One asyncio.Lock per key, dropped when nobody holds or waits for it.
+
+    Used to keep messages from the same user strictly ordered while
+    messages from different users run concurrently.
+    """
+
+    def __init__(self):
+        """Initialize with no locks."""
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    def __len__(self) -> int:
+        """Return number of keys currently held or awaited."""
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: str):
+        """Acquire the lock for key."""
+        lock, users = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+
+class BackgroundLoop:
+    """
+    Event loop running in a daemon thread, for sync callers of async code.
+
+    The loop starts on first use and lives for the rest of the process.
+    """
+
+    def __init__(self, name: str = "bot-loop"):
+        """
+        Initialize (the thread starts lazily).
+
+        Args:
+            name: Thread name
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the running background loop, starting it if needed."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                    thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> ConcurrentFuture:
+        """
+        Schedule a coroutine on the background loop.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            concurrent.futures.Future for its result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the background loop and wait for its result.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait, None for no limit
+
+        Returns:
+            The coroutine's result
+        """
+        return self.submit(coro).result(timeout)
+
+
+_background: Optional[BackgroundLoop] = None
+_background_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Return the shared background loop for sync callers of async skills."""
+    global _background
+    if _background is None:
+        with _background_lock:
+            if _background is None:
+                _background = BackgroundLoop("bot-async")
+    return _background
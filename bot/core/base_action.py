@@ -4,17 +4,44 @@
 """Base class for all bot actions/skills."""
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
 
 class BaseAction(ABC):
     """
     Abstract base class for bot actions (skills).
 
-    All skills must implement can_handle() and execute().
+    All skills must implement execute(), and either declare `intents` or
+    override can_handle(). Declared intents let ActionRouter build its
+    dispatch table at register time instead of probing can_handle().
+
+    The remaining class attributes describe everything else the bot needs
+    to know about a skill; SkillRegistry compiles them into the intent
+    matcher, entity extraction and prompts, so adding a skill needs no
+    change to core modules. They are read-only class-level metadata.
+
+    Async callers use execute_async(), which runs execute() in the shared
+    bounded thread pool unless a skill overrides it (see AsyncAction).
     """
 
-    @abstractmethod
+    # Intents this action handles; empty for legacy actions
+    intents: Tuple[str, ...] = ()
+
+    # Intent -> trigger regexes (matched against lowercased text)
+    patterns: Mapping[str, Tuple[str, ...]] = {}
+
+    # Entities that must be collected before execute() is called
+    required: Tuple[str, ...] = ()
+
+    # Entity -> extractor(text) returning the value or None
+    extractors: Mapping[str, Callable[[str], Optional[str]]] = {}
+
+    # Entity -> question asked when it is missing
+    prompts: Mapping[str, str] = {}
+
+    # Intent priority against other intents (built-in ones have 0)
+    priority: int = 0
+
     def can_handle(self, intent: str) -> bool:
         """
         Check if this action can handle the given intent.
@@ -25,7 +52,7 @@ class BaseAction(ABC):
         Returns:
             True if this action handles the intent
         """
-        pass
+        return intent in self.intents
 
     @abstractmethod
     def execute(self, params: Dict[str, Any]) -> str:
@@ -40,13 +67,54 @@ class BaseAction(ABC):
         """
         pass
 
-    @abstractmethod
+    async def execute_async(self, params: Dict[str, Any]) -> str:
+        """
+        Execute the action from asyncio without blocking the event loop.
+
+        Args:
+            params: Dictionary of extracted entities and parameters
+
+        Returns:
+            Response string to send to user
+        """
+        from .async_support import run_sync  # keeps asyncio out of sync-only startup
+        return await run_sync(self.execute, params)
+
     def required_entities(self) -> List[str]:
         """
         Return list of required entity names for this action.
 
+        Defaults to the declared `required` entities.
+
         Returns:
             List of required entity names
         """
+        return list(self.required)
+
+
+class AsyncAction(BaseAction):
+    """
+    Base class for asyncio-native skills.
+
+    Implement execute_async(); execute() is provided for sync callers and
+    runs it on the shared background loop, so it also works from a thread
+    that is already running an event loop.
+    """
+
+    @abstractmethod
+    async def execute_async(self, params: Dict[str, Any]) -> str:
+        """
+        Execute the action.
+
+        Args:
+            params: Dictionary of extracted entities and parameters
+
+        Returns:
+            Response string to send to user
+        """
         pass
 
+    def execute(self, params: Dict[str, Any]) -> str:
+        """Run execute_async() for sync callers and wait for its result."""
+        from .async_support import get_background_loop
+        return get_background_loop().run(self.execute_async(params))
@@ -4,7 +4,7 @@
 """Base class for all communication channels."""
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 
 class BaseChannel(ABC):
@@ -12,6 +12,10 @@ class BaseChannel(ABC):
     Abstract base class for all messaging channels.
 
     All channels must implement name, send_message, and receive_message.
+
+    The *_async variants are used by the asyncio pipeline; by default a
+    sync send runs in the shared bounded thread pool. Channels whose API
+    can deliver several messages in one call override send_batch().
     """
 
     @property
@@ -43,3 +47,63 @@ class BaseChannel(ABC):
             Normalized message dict with 'user_id' and 'text' keys
         """
         pass
+
+    async def send_message_async(self, recipient_id: str, message: str) -> None:
+        """
+        Send message without blocking the event loop.
+
+        Args:
+            recipient_id: Recipient identifier
+            message: Message text to send
+        """
+        from .async_support import run_sync  # keeps asyncio out of sync-only startup
+        await run_sync(self.send_message, recipient_id, message)
+
+    def send_batch(self, messages: Sequence[Tuple[str, str]]) -> List[Optional[Exception]]:
+        """
+        Send several messages.
+
+        The default sends them one by one.
+
+        Args:
+            messages: (recipient_id, message) pairs
+
+        Returns:
+            One entry per message: None if sent, else the error
+        """
+        errors: List[Optional[Exception]] = []
+        for recipient_id, message in messages:
+            try:
+                self.send_message(recipient_id, message)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    async def send_batch_async(self, messages: Sequence[Tuple[str, str]]) -> List[Optional[Exception]]:
+        """
+        Send several messages without blocking the event loop.
+
+        Args:
+            messages: (recipient_id, message) pairs
+
+        Returns:
+            One entry per message: None if sent, else the error
+        """
+        from .async_support import run_sync
+        return await run_sync(self.send_batch, messages)
+
+    async def receive_message_async(self, payload: Any) -> Dict[str, str]:
+        """
+        Process incoming message payload from asyncio.
+
+        Normalizing a payload is pure CPU work, so the default calls
+        receive_message() inline rather than paying for a thread hop.
+
+        Args:
+            payload: Raw message payload from channel
+
+        Returns:
+            Normalized message dict with 'user_id' and 'text' keys
+        """
+        return self.receive_message(payload)
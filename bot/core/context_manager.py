@@ -3,23 +3,74 @@
 # ============================================================================
 """Manages conversation context for multi-turn dialogs."""
 
-from typing import Any, Dict, List, Optional
-from datetime import datetime, timedelta
+import heapq
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .context_store import ContextStore
+
+# Entity name tables shared by every context missing the same names
+_ENTITY_NAMES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _entity_names(names: List[str]) -> Tuple[str, ...]:
+    """Return the interned entity name table for names, in their order."""
+    key = tuple(names)
+    table = _ENTITY_NAMES.get(key)
+    if table is None:
+        table = _ENTITY_NAMES[key] = tuple(sys.intern(name) for name in dict.fromkeys(names))
+    return table
 
 
 class ConversationContext:
-    """Holds context for a single conversation."""
+    """
+    Holds context for a single conversation.
+
+    Compact representation for millions of idle contexts: no instance
+    __dict__, float monotonic timestamps, interned intent/entity names
+    and missing entities stored as a bitmask over a name table shared by
+    contexts that were missing the same names (in the same order).
 
-    def __init__(self, user_id: str, intent: str, entities: Dict[str, str], missing: List[str]):
+    The expiry deadline is set by the ContextManager holding the context
+    in memory (None for contexts read from a shared store).
+    """
+
+    __slots__ = ("user_id", "intent", "entities", "timestamp", "deadline", "_names", "_missing")
+
+    def __init__(self, user_id: str, intent: str, entities: Dict[str, str], missing: List[str],
+                 timestamp: Optional[float] = None):
         self.user_id = user_id
-        self.intent = intent
-        self.entities = entities
+        self.intent = sys.intern(intent)
+        self.entities = {sys.intern(name): value for name, value in entities.items()}
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+        self.deadline: Optional[float] = None
+        self._names: Tuple[str, ...] = ()
+        self._missing = 0
         self.missing_entities = missing
-        self.timestamp = datetime.now()
 
-    def is_expired(self, timeout_minutes: int = 5) -> bool:
-        """Check if context has expired."""
-        return datetime.now() - self.timestamp > timedelta(minutes=timeout_minutes)
+    @property
+    def missing_entities(self) -> List[str]:
+        """Missing entity names, in the order they were given."""
+        names = self._names
+        mask = self._missing
+        return [names[bit] for bit in range(len(names)) if mask >> bit & 1]
+
+    @missing_entities.setter
+    def missing_entities(self, missing: List[str]) -> None:
+        """Store missing entity names as a bitmask over a name table."""
+        names = self._names
+        positions = [names.index(name) if name in names else -1 for name in missing]
+        # Filling entities keeps the table; other orders get their own
+        if -1 in positions or positions != sorted(set(positions)):
+            names = self._names = _entity_names(missing)
+            positions = range(len(names))
+        mask = 0
+        for bit in positions:
+            mask |= 1 << bit
+        self._missing = mask
 
 
 class ContextManager:
@@ -31,17 +82,41 @@ class ContextManager:
     - Pending intent tracking
     - Missing entity management
     - Context timeout handling
+
+    Expiry uses monotonic deadlines kept in a min-heap, so a sweep only
+    touches contexts that actually expired (amortized O(log n) each)
+    instead of scanning every live conversation. Replaced or cleared
+    contexts leave stale heap entries that are skipped when popped and
+    compacted away when they outnumber live ones.
+
+    With a shared store (see context_store) contexts live there instead of
+    in `contexts`, expire by the store's TTL, and can be continued by any
+    process using the same store.
     """
 
-    def __init__(self, timeout_minutes: int = 5):
+    # Expired heap entries evicted opportunistically on each set_pending
+    SWEEP_BATCH = 8
+
+    def __init__(self, timeout_minutes: int = 5, clock: Callable[[], float] = time.monotonic,
+                 store: Optional["ContextStore"] = None):
         """
         Initialize context manager.
 
         Args:
             timeout_minutes: Minutes before context expires
+            clock: Monotonic time source in seconds
+            store: Shared context store (defaults to this process's memory)
         """
+        self.store = store
         self.contexts: Dict[str, ConversationContext] = {}
         self.timeout_minutes = timeout_minutes
+        self.clock = clock
+        self.stats = {"evictions": 0, "expired_on_access": 0, "swept": 0, "sweeps": 0}
+
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
 
     def set_pending(self, user_id: str, intent: str, entities: Dict[str, str], missing: List[str]) -> None:
         """
@@ -53,7 +128,18 @@ class ContextManager:
             entities: Already extracted entities
             missing: List of missing entity names
         """
-        self.contexts[user_id] = ConversationContext(user_id, intent, entities, missing)
+        now = self.clock()
+        if self.store is not None:
+            self.store.put(user_id, ConversationContext(user_id, intent, entities, missing, now),
+                           self.timeout_minutes * 60)
+            return
+
+        context = ConversationContext(user_id, intent, entities, missing, now)
+        deadline = context.deadline = now + self.timeout_minutes * 60
+        with self._lock:
+            self.contexts[user_id] = context
+            heapq.heappush(self._expiry, (deadline, user_id))
+            self._sweep(now, self.SWEEP_BATCH)
 
     def get_pending(self, user_id: str) -> Optional[ConversationContext]:
         """
@@ -65,25 +151,44 @@ class ContextManager:
         Returns:
             ConversationContext if exists and not expired, None otherwise
         """
-        if user_id not in self.contexts:
-            return None
+        if self.store is not None:
+            return self.store.get(user_id)
 
-        context = self.contexts[user_id]
+        context = self.contexts.get(user_id)
+        if context is None:
+            return None
 
-        if context.is_expired(self.timeout_minutes):
-            self.clear(user_id)
+        if self.clock() >= context.deadline:
+            with self._lock:
+                if self.contexts.get(user_id) is context:
+                    del self.contexts[user_id]
+                    self.stats["evictions"] += 1
+                    self.stats["expired_on_access"] += 1
             return None
 
         return context
 
-    def update_entities(self, user_id: str, new_entities: Dict[str, str]) -> None:
+    def update_entities(self, user_id: str, new_entities: Dict[str, str],
+                        context: Optional[ConversationContext] = None) -> None:
         """
         Update entities for pending context.
 
         Args:
             user_id: User identifier
             new_entities: New entities to merge
+            context: Context returned by get_pending() for this turn; with a
+                shared store it is updated in place instead of re-read
         """
+        if self.store is not None:
+            if context is None:
+                context = self.store.get(user_id)
+            if context is not None:
+                context.entities.update(new_entities)
+                context.missing_entities = [e for e in context.missing_entities
+                                            if e not in new_entities or not new_entities[e]]
+                self.store.put(user_id, context, None)
+            return
+
         if user_id in self.contexts:
             self.contexts[user_id].entities.update(new_entities)
             # Remove filled entities from missing list
@@ -99,8 +204,96 @@ class ContextManager:
         Args:
             user_id: User identifier
         """
-        if user_id in self.contexts:
-            del self.contexts[user_id]
+        if self.store is not None:
+            self.store.delete(user_id)
+            return
+
+        with self._lock:
+            self.contexts.pop(user_id, None)
+
+    def export_contexts(self, user_ids: Iterable[str], remove: bool = True) -> List[Tuple[Any, ...]]:
+        """
+        Serialize live contexts, e.g. to migrate them to another process.
+
+        Monotonic timestamps are process-local, so each record carries the
+        context's age instead. Contexts in a shared store never need moving
+        (and are not listed in `contexts`).
+
+        Args:
+            user_ids: Users whose contexts to export
+            remove: Drop exported contexts from this manager
+
+        Returns:
+            (user_id, intent, entities, missing, age_seconds) records
+        """
+        now = self.clock()
+        records = []
+        for user_id in list(user_ids):
+            context = self.get_pending(user_id)
+            if context is None:
+                continue
+            records.append((user_id, context.intent, dict(context.entities),
+                            context.missing_entities, now - context.timestamp))
+            if remove:
+                self.clear(user_id)
+        return records
+
+    def import_contexts(self, records: Iterable[Tuple[Any, ...]]) -> None:
+        """
+        Restore contexts produced by export_contexts().
+
+        Args:
+            records: (user_id, intent, entities, missing, age_seconds) records
+        """
+        now = self.clock()
+        timeout = self.timeout_minutes * 60
+        if self.store is not None:
+            for user_id, intent, entities, missing, age in records:
+                if age < timeout:
+                    context = ConversationContext(user_id, intent, entities, missing, now - age)
+                    self.store.put(user_id, context, timeout - age)
+            return
+
+        with self._lock:
+            for user_id, intent, entities, missing, age in records:
+                context = ConversationContext(user_id, intent, entities, missing, now - age)
+                context.deadline = context.timestamp + timeout
+                self.contexts[user_id] = context
+                heapq.heappush(self._expiry, (context.deadline, user_id))
+
+    def _sweep(self, now: float, limit: Optional[int] = None) -> int:
+        """
+        Evict expired contexts from the heap front (lock held).
+
+        Args:
+            now: Current clock value
+            limit: Maximum heap entries to pop, None for all expired
+
+        Returns:
+            Number of contexts evicted
+        """
+        expiry = self._expiry
+        contexts = self.contexts
+        evicted = 0
+        popped = 0
+
+        while expiry and expiry[0][0] <= now and (limit is None or popped < limit):
+            deadline, user_id = heapq.heappop(expiry)
+            popped += 1
+            context = contexts.get(user_id)
+            # Entries of replaced contexts carry an older deadline
+            if context is not None and context.deadline == deadline:
+                del contexts[user_id]
+                evicted += 1
+
+        # Drop stale entries left behind by replaced or cleared contexts
+        if len(expiry) > 2 * len(contexts) + 64:
+            self._expiry = [(ctx.deadline, user_id) for user_id, ctx in contexts.items()]
+            heapq.heapify(self._expiry)
+
+        self.stats["evictions"] += evicted
+        self.stats["swept"] += evicted
+        return evicted
 
     def cleanup_expired(self) -> int:
         """
@@ -109,12 +302,34 @@ class ContextManager:
         Returns:
             Number of contexts cleaned up
         """
-        expired_users = [
-            user_id for user_id, ctx in self.contexts.items()
-            if ctx.is_expired(self.timeout_minutes)
-        ]
+        if self.store is not None:
+            return 0    # the store expires contexts itself
+
+        with self._lock:
+            self.stats["sweeps"] += 1
+            return self._sweep(self.clock())
+
+    def start_sweeper(self, interval: float = 1.0) -> None:
+        """
+        Run cleanup_expired() periodically in a background thread.
+
+        Args:
+            interval: Seconds between sweeps
+        """
+        if self._sweeper is not None:
+            return
+
+        def run():
+            while not self._sweeper_stop.wait(interval):
+                self.cleanup_expired()
 
-        for user_id in expired_users:
-            del self.contexts[user_id]
+        self._sweeper_stop.clear()
+        self._sweeper = threading.Thread(target=run, name="context-sweeper", daemon=True)
+        self._sweeper.start()
 
-        return len(expired_users)
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper, if running."""
+        if self._sweeper is not None:
+            self._sweeper_stop.set()
+            self._sweeper.join()
+            self._sweeper = None
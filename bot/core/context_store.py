@@ -0,0 +1,172 @@
+# ============================================================================
+# bot/core/context_store.py
+# ============================================================================
+"""Shared storage backends for conversation contexts."""
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from .context_manager import ConversationContext
+from .resp import RESPClient
+
+
+class ContextStore(ABC):
+    """
+    Abstract storage for pending conversation contexts, used by ContextManager.
+
+    A store shared by several bot processes lets any of them continue any
+    conversation. Stores expire contexts themselves (ContextManager passes
+    the timeout as a TTL), so expiry needs no sweeping on the bot side.
+
+    Store calls may block on network round trips. They are made from the
+    turn planning, which MainBot.process_message_async runs in the shared
+    thread pool, so they never stall the event loop.
+    """
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[ConversationContext]:
+        """Return the user's live context, or None."""
+        pass
+
+    @abstractmethod
+    def put(self, user_id: str, context: ConversationContext, ttl: Optional[float]) -> None:
+        """
+        Store or replace the user's context.
+
+        Args:
+            user_id: User identifier
+            context: Context to store
+            ttl: Seconds until it expires, None to keep the current expiry
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, user_id: str) -> None:
+        """Remove the user's context, if any."""
+        pass
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+        pass
+
+
+class RedisContextStore(ContextStore):
+    """
+    Contexts in Redis (or any RESP server, see bot.core.resp.RESPServer).
+
+    Each context is one JSON string key, <prefix><user_id>, with a
+    server-side TTL. Writes are pipelined (sent without waiting for the
+    reply), so a turn costs at most one round trip: the GET at its start.
+    They reach the server long before a user can answer, but are only
+    guaranteed applied once the next read returns (or after flush()).
+
+    An opt-in near cache (near_cache_size > 0) keeps contexts this process
+    recently read or wrote for near_ttl seconds; a turn it answers costs no
+    round trip at all. The trade-off: a write by another process becomes
+    visible here only after up to near_ttl, so enable it when a user's
+    requests stick to one instance, or keep near_ttl below the time
+    between a user's messages. "No context" is never cached, so a
+    conversation started on another instance is always seen.
+    """
+
+    def __init__(self, client: Optional[RESPClient] = None, url: str = "redis://127.0.0.1:6379",
+                 prefix: str = "bot:ctx:", near_cache_size: int = 0, near_ttl: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize store.
+
+        Args:
+            client: Connected RESP client (created from url if None)
+            url: redis://host:port of the server, used if no client is given
+            prefix: Key prefix
+            near_cache_size: Contexts kept in the near cache (0, the default, disables it)
+            near_ttl: Seconds a near cache entry is trusted
+            clock: Monotonic time source in seconds
+        """
+        self.client = client if client is not None else RESPClient.from_url(url)
+        self.prefix = prefix
+        self.near_cache_size = near_cache_size
+        self.near_ttl = near_ttl
+        self.clock = clock
+        self.stats = {"near_hits": 0, "near_misses": 0, "reads": 0, "writes": 0}
+
+        self._near: "OrderedDict[str, Tuple[float, ConversationContext]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, user_id: str) -> bytes:
+        return (self.prefix + user_id).encode()
+
+    @staticmethod
+    def encode(context: ConversationContext) -> bytes:
+        """Serialize a context (intent, entities, missing entity names)."""
+        return json.dumps([context.intent, context.entities, context.missing_entities],
+                          separators=(",", ":")).encode()
+
+    @staticmethod
+    def decode(user_id: str, data: bytes) -> ConversationContext:
+        """Deserialize a context stored by encode()."""
+        intent, entities, missing = json.loads(data)
+        return ConversationContext(user_id, intent, entities, missing)
+
+    def _remember(self, user_id: str, context: Optional[ConversationContext]) -> None:
+        """Put an entry in the near cache (drop it for None), evicting the least recently used."""
+        if not self.near_cache_size:
+            return
+        with self._lock:
+            if context is None:
+                self._near.pop(user_id, None)
+                return
+            self._near[user_id] = (self.clock() + self.near_ttl, context)
+            self._near.move_to_end(user_id)
+            while len(self._near) > self.near_cache_size:
+                self._near.popitem(last=False)
+
+    def get(self, user_id: str) -> Optional[ConversationContext]:
+        """Return the user's context from the near cache or the server."""
+        if self.near_cache_size:
+            with self._lock:
+                entry = self._near.get(user_id)
+                if entry is not None and entry[0] > self.clock():
+                    self._near.move_to_end(user_id)
+                    self.stats["near_hits"] += 1
+                    return entry[1]
+                self.stats["near_misses"] += 1
+
+        self.stats["reads"] += 1
+        data = self.client.execute("GET", self._key(user_id))
+        context = self.decode(user_id, data) if data is not None else None
+        self._remember(user_id, context)
+        return context
+
+    def put(self, user_id: str, context: ConversationContext, ttl: Optional[float]) -> None:
+        """Store the context (pipelined; returns without a round trip)."""
+        self.stats["writes"] += 1
+        if ttl is None:
+            self.client.send("SET", self._key(user_id), self.encode(context), "KEEPTTL")
+        else:
+            self.client.send("SET", self._key(user_id), self.encode(context), "PX", max(1, int(ttl * 1000)))
+        self._remember(user_id, context)
+
+    def delete(self, user_id: str) -> None:
+        """Remove the context (pipelined; returns without a round trip)."""
+        self.stats["writes"] += 1
+        self.client.send("DEL", self._key(user_id))
+        self._remember(user_id, None)
+
+    def flush(self) -> None:
+        """Wait until the server has applied this store's writes."""
+        self.client.flush()
+
+    def close(self) -> None:
+        """Flush pending writes and close the connection."""
+        self.client.close()
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Return near cache hit rate and size along with the counters."""
+        lookups = self.stats["near_hits"] + self.stats["near_misses"]
+        return dict(self.stats, size=len(self._near),
+                    hit_rate=self.stats["near_hits"] / lookups if lookups else 0.0)
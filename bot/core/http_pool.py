@@ -0,0 +1,246 @@
+# ============================================================================
+# bot/core/http_pool.py
+# ============================================================================
+"""Asyncio HTTP/1.1 client with keep-alive connection pooling and pipelining."""
+
+import asyncio
+import json
+import ssl
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+
+class HTTPResponse(NamedTuple):
+    """A parsed HTTP response."""
+
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        """Decode the body as JSON."""
+        return json.loads(self.body)
+
+
+async def read_response(reader: asyncio.StreamReader) -> HTTPResponse:
+    """
+    Read one HTTP/1.1 response (Content-Length or chunked body).
+
+    Args:
+        reader: Stream positioned at a status line
+
+    Returns:
+        Parsed response
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head[:-4].decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n"))[:-2].split(b";")[0], 16)
+            if size == 0:
+                await reader.readuntil(b"\r\n")
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    else:
+        body = await reader.readexactly(int(headers.get("content-length", "0")))
+
+    return HTTPResponse(status, headers, body)
+
+
+class _Connection:
+    """One keep-alive connection; responses are matched to requests in order."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.pending: Deque[asyncio.Future] = deque()
+        self.in_use = 0
+        self.closed = False
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    async def request(self, raw: bytes) -> HTTPResponse:
+        """Write a request without waiting for earlier responses."""
+        if self.closed:
+            raise ConnectionError("Connection closed")
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(future)
+        self.writer.write(raw)
+        await self.writer.drain()
+        return await future
+
+    async def _read_loop(self) -> None:
+        """Resolve pending requests as their responses arrive."""
+        error: Exception = ConnectionError("Connection closed by server")
+        try:
+            while True:
+                response = await read_response(self.reader)
+                future = self.pending.popleft()
+                if not future.done():
+                    future.set_result(response)
+                if response.headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, IndexError) as e:
+            error = ConnectionError(str(e) or "Connection lost")
+        finally:
+            self.closed = True
+            while self.pending:
+                future = self.pending.popleft()
+                if not future.done():
+                    future.set_exception(error)
+            self.writer.close()
+
+    def close(self) -> None:
+        """Close the connection, failing in-flight requests."""
+        self.closed = True
+        self._reader_task.cancel()
+        self.writer.close()
+
+
+class HTTPConnectionPool:
+    """
+    Pool of persistent HTTP/1.1 connections to one origin.
+
+    Concurrent requests are spread over up to max_connections keep-alive
+    connections and pipelined up to pipeline_depth deep on each, so a
+    burst of sends costs neither a TCP/TLS handshake nor a round trip
+    per request. Must be used from a single event loop.
+    """
+
+    def __init__(self, base_url: str, max_connections: int = 4, pipeline_depth: int = 8,
+                 timeout: float = 10.0, ssl_context: Optional[ssl.SSLContext] = None):
+        """
+        Initialize pool.
+
+        Args:
+            base_url: Origin such as https://api.telegram.org
+            max_connections: Maximum open connections
+            pipeline_depth: Maximum in-flight requests per connection
+            timeout: Seconds to wait for a response
+            ssl_context: TLS context for https (default context if None)
+        """
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.use_ssl = parts.scheme == "https"
+        self.port = parts.port or (443 if self.use_ssl else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.max_connections = max_connections
+        self.pipeline_depth = pipeline_depth
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+
+        self._connections: List[_Connection] = []
+        self._connecting = 0
+        self._available: Optional[asyncio.Condition] = None
+        self.connections_opened = 0
+
+    async def _acquire(self) -> _Connection:
+        """Return the least loaded usable connection, opening one if allowed."""
+        if self._available is None:
+            self._available = asyncio.Condition()
+
+        async with self._available:
+            while True:
+                self._connections = [conn for conn in self._connections if not conn.closed]
+                best = min(self._connections, key=lambda conn: conn.in_use, default=None)
+                if best is not None and best.in_use == 0:
+                    best.in_use += 1
+                    return best
+                if len(self._connections) + self._connecting < self.max_connections:
+                    break
+                if best is not None and best.in_use < self.pipeline_depth:
+                    best.in_use += 1
+                    return best
+                await self._available.wait()
+            self._connecting += 1
+
+        connection = None
+        try:
+            context = None
+            if self.use_ssl:
+                context = self.ssl_context or ssl.create_default_context()
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+            connection = _Connection(reader, writer)
+            connection.in_use = 1
+            self.connections_opened += 1
+        finally:
+            async with self._available:
+                self._connecting -= 1
+                if connection is not None:
+                    self._connections.append(connection)
+                self._available.notify_all()
+
+        return connection
+
+    async def _release(self, connection: _Connection) -> None:
+        """Return a request slot and wake requests waiting for capacity."""
+        async with self._available:
+            connection.in_use -= 1
+            # One slot freed: wake one waiter, not the whole queue
+            self._available.notify()
+
+    def _encode(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> bytes:
+        """Serialize a request."""
+        lines = [f"{method} {self.base_path}{path} HTTP/1.1", f"Host: {self.host}",
+                 f"Content-Length: {len(body)}", "Connection: keep-alive"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None) -> HTTPResponse:
+        """
+        Send a request over a pooled connection.
+
+        Args:
+            method: HTTP method
+            path: Path below the base URL
+            body: Request body
+            headers: Extra request headers
+
+        Returns:
+            Parsed response
+
+        Raises:
+            ConnectionError: If the connection dropped before the response
+            asyncio.TimeoutError: If no response arrived in time
+        """
+        raw = self._encode(method, path, body, headers or {})
+        connection = await self._acquire()
+        try:
+            return await asyncio.wait_for(connection.request(raw), self.timeout)
+        except asyncio.TimeoutError:
+            # Later pipelined responses on this connection can no longer be matched
+            connection.close()
+            raise
+        finally:
+            await self._release(connection)
+
+    async def post_json(self, path: str, payload: Any) -> HTTPResponse:
+        """
+        POST a JSON payload.
+
+        Args:
+            path: Path below the base URL
+            payload: JSON-serializable object
+
+        Returns:
+            Parsed response
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        return await self.request("POST", path, body, {"Content-Type": "application/json"})
+
+    async def close(self) -> None:
+        """Close every pooled connection."""
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+
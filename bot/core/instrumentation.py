@@ -0,0 +1,499 @@
+# ============================================================================
+# bot/core/instrumentation.py
+# ============================================================================
+"""Stage timing and counters for MainBot, exported to pluggable sinks."""
+
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Label pairs attached to a span or counter, e.g. (("stage", "intent"),)
+Labels = Tuple[Tuple[str, str], ...]
+
+# co_flags bit of coroutine functions (inspect.CO_COROUTINE, without importing inspect)
+_CO_COROUTINE = 0x80
+
+
+class Sink(ABC):
+    """Receives stage timings and counter increments."""
+
+    @abstractmethod
+    def span(self, stage: str, seconds: float, labels: Labels) -> None:
+        """
+        Record one finished stage.
+
+        Args:
+            stage: Stage name ("intent", "routing", ...)
+            seconds: Time the stage took
+            labels: Extra label pairs (e.g. (("operation", "get_pending"),))
+        """
+        pass
+
+    @abstractmethod
+    def count(self, name: str, value: float, labels: Labels) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name: Counter name ("messages", "intents", "errors", ...)
+            value: Amount to add
+            labels: Label pairs
+        """
+        pass
+
+    def recorder(self, stage: str, labels: Labels) -> Callable[[float], None]:
+        """
+        Return a function recording durations of one stage and label set.
+
+        Instrumentation binds one recorder per instrumented method up
+        front, so sinks can resolve their storage once instead of on
+        every span. The default forwards to span().
+        """
+        span = self.span
+        return lambda seconds: span(stage, seconds, labels)
+
+    def counter(self, name: str, labels: Labels) -> Callable[[float], None]:
+        """Return a function incrementing one counter (see recorder())."""
+        count = self.count
+        return lambda value: count(name, value, labels)
+
+
+class LogHistogram:
+    """Log-scale histogram of durations (~12% bucket width, 0.25 µs to minutes)."""
+
+    BOUNDS_US = [0.25 * 1.12 ** i for i in range(230)]
+
+    def __init__(self):
+        """Initialize empty histogram."""
+        self.counts = [0] * (len(self.BOUNDS_US) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add one observation (thread-safe)."""
+        slot = bisect.bisect_left(self.BOUNDS_US, seconds * 1e6)
+        with self._lock:
+            self.counts[slot] += 1
+            self.total += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def merge(self, other: "LogHistogram") -> None:
+        """Add another histogram's observations to this one."""
+        with other._lock:
+            counts, total, total_sum, peak = list(other.counts), other.total, other.sum, other.max
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, counts)]
+            self.total += total
+            self.sum += total_sum
+            self.max = max(self.max, peak)
+
+    def percentile(self, q: float) -> float:
+        """Return the bucket upper bound (seconds) containing quantile q (0..1)."""
+        if not self.total:
+            return 0.0
+        rank, seen = q * self.total, 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.BOUNDS_US[i] / 1e6 if i < len(self.BOUNDS_US) else self.max
+        return self.max
+
+
+class HistogramSink(Sink):
+    """
+    Keeps timings and counters in memory.
+
+    One LogHistogram per (stage, labels); read them with summary() or
+    histogram().
+    """
+
+    def __init__(self):
+        """Initialize empty sink."""
+        self.histograms: Dict[Tuple[str, Labels], LogHistogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage: str, seconds: float, labels: Labels) -> None:
+        """Add the duration to the stage's histogram."""
+        self.recorder(stage, labels)(seconds)
+
+    def recorder(self, stage: str, labels: Labels) -> Callable[[float], None]:
+        """Return the record method of the stage's histogram."""
+        key = (stage, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LogHistogram()
+        return histogram.record
+
+    def count(self, name: str, value: float, labels: Labels) -> None:
+        """Add value to the counter."""
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def histogram(self, stage: str, **labels: str) -> LogHistogram:
+        """Return the histogram of a stage (all label sets merged if none given)."""
+        merged = LogHistogram()
+        wanted = set(labels.items())
+        with self._lock:
+            histograms = list(self.histograms.items())
+        for (name, key_labels), histogram in histograms:
+            if name == stage and wanted <= set(key_labels):
+                merged.merge(histogram)
+        return merged
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return count, mean, p50, p99 and max (microseconds) per stage."""
+        stages = sorted({stage for stage, _ in self.histograms})
+        result = {}
+        for stage in stages:
+            histogram = self.histogram(stage)
+            result[stage] = {"count": histogram.total,
+                             "mean_us": histogram.sum / histogram.total * 1e6 if histogram.total else 0.0,
+                             "p50_us": histogram.percentile(0.5) * 1e6,
+                             "p99_us": histogram.percentile(0.99) * 1e6,
+                             "max_us": histogram.max * 1e6}
+        return result
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    """Render label pairs as {a="x",b="y"} (empty string if none)."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels) + "}"
+
+
+class PrometheusSink(Sink):
+    """
+    Aggregates into Prometheus metrics, rendered in the text exposition format.
+
+    Stage timings become one histogram, <prefix>_stage_duration_seconds,
+    labelled by stage; counters become <prefix>_<name>_total. Serve
+    render() from a /metrics endpoint (WebhookServer does).
+    """
+
+    BUCKETS = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+               1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, prefix: str = "bot", buckets: Optional[Sequence[float]] = None):
+        """
+        Initialize sink.
+
+        Args:
+            prefix: Metric name prefix
+            buckets: Histogram upper bounds in seconds (ascending)
+        """
+        self.prefix = prefix
+        self.buckets = tuple(buckets) if buckets is not None else self.BUCKETS
+        self._histograms: Dict[Labels, List[float]] = {}   # per-bucket counts + [sum, count]
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage: str, seconds: float, labels: Labels) -> None:
+        """Add the duration to the stage histogram."""
+        self.recorder(stage, labels)(seconds)
+
+    def recorder(self, stage: str, labels: Labels) -> Callable[[float], None]:
+        """Return a function adding durations to one labelled histogram."""
+        key = (("stage", stage),) + labels
+        with self._lock:
+            values = self._histograms.get(key)
+            if values is None:
+                values = self._histograms[key] = [0.0] * (len(self.buckets) + 3)
+        buckets, lock, locate = self.buckets, self._lock, bisect.bisect_left
+
+        def record(seconds: float) -> None:
+            slot = locate(buckets, seconds)
+            with lock:
+                values[slot] += 1
+                values[-2] += seconds
+                values[-1] += 1
+
+        return record
+
+    def count(self, name: str, value: float, labels: Labels) -> None:
+        """Add value to the counter."""
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+            counters = dict(self._counters)
+
+        name = f"{self.prefix}_stage_duration_seconds"
+        lines = [f"# HELP {name} Time spent in each message processing stage.",
+                 f"# TYPE {name} histogram"]
+        for labels, values in sorted(histograms.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), values):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative:g}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]!r}")
+            lines.append(f"{name}_count{_format_labels(labels)} {values[-1]:g}")
+
+        for counter in sorted({counter for counter, _ in counters}):
+            metric = f"{self.prefix}_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (key, labels), value in sorted(counters.items()):
+                if key == counter:
+                    lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetrySink(Sink):
+    """
+    Forwards to the OpenTelemetry API.
+
+    Stage timings are recorded on a histogram instrument
+    (<prefix>.stage.duration, seconds, with a "stage" attribute) and,
+    when traces are enabled, as spans named <prefix>.<stage> with their
+    real start and end times. Counters become <prefix>.<name> counters.
+
+    Any meter/tracer implementing the OpenTelemetry API works. Without
+    them the global providers are used, which needs the
+    opentelemetry-api package (optional dependency).
+    """
+
+    def __init__(self, meter: Any = None, tracer: Any = None, prefix: str = "bot", traces: bool = True):
+        """
+        Initialize sink.
+
+        Args:
+            meter: OpenTelemetry Meter (defaults to the global one)
+            tracer: OpenTelemetry Tracer (defaults to the global one if traces)
+            prefix: Instrument and span name prefix
+            traces: Also emit a span per stage
+
+        Raises:
+            ImportError: If a default is needed and opentelemetry-api is missing
+        """
+        if meter is None or (traces and tracer is None):
+            try:
+                from opentelemetry import metrics, trace
+            except ImportError as e:
+                raise ImportError("OpenTelemetrySink needs the opentelemetry-api package "
+                                  "(or an explicit meter and tracer)") from e
+            meter = meter if meter is not None else metrics.get_meter("bot")
+            tracer = tracer if tracer is not None or not traces else trace.get_tracer("bot")
+
+        self.prefix = prefix
+        self.meter = meter
+        self.tracer = tracer if traces else None
+        self._duration = meter.create_histogram(f"{prefix}.stage.duration", unit="s",
+                                                description="Time spent in each message processing stage")
+        self._counters: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage: str, seconds: float, labels: Labels) -> None:
+        """Record the duration, and a span ending now if traces are enabled."""
+        attributes = dict(labels)
+        attributes["stage"] = stage
+        self._duration.record(seconds, attributes=attributes)
+        if self.tracer is not None:
+            end = time.time_ns()
+            span = self.tracer.start_span(f"{self.prefix}.{stage}", start_time=end - int(seconds * 1e9),
+                                          attributes=attributes)
+            span.end(end_time=end)
+
+    def count(self, name: str, value: float, labels: Labels) -> None:
+        """Add value to the counter instrument."""
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.get(name)
+                if counter is None:
+                    counter = self._counters[name] = self.meter.create_counter(f"{self.prefix}.{name}")
+        counter.add(value, attributes=dict(labels))
+
+
+class Instrumentation:
+    """
+    Timing spans and counters for the stages of a MainBot turn.
+
+    Instrumentation is off until a sink is added. While it is off nothing
+    in the message path is touched, so it costs nothing. Adding the first
+    sink installs timing wrappers on the bot's stage methods (STAGES) as
+    instance attributes. Removing the last sink deletes them again.
+
+    Stages: intent (detect_intent), extraction (extract_entities), context
+    (pending-context lookups and updates, labelled by operation), routing
+    (route), followup (_handle_followup), turn (process_message), batch
+    (process_messages) and send (outbound deliveries, labelled by channel).
+
+    Counters: messages, intents (labelled by detected intent) and errors
+    (exceptions escaping a stage, labelled by stage).
+
+    Each instrumented call costs about one extra Python call plus the
+    sinks' work. benchmarks/bench_instrumentation.py measures it.
+    """
+
+    # (attribute of the bot holding the method, or "" for the bot itself; method; stage)
+    STAGES: Tuple[Tuple[str, str, str], ...] = (
+        ("intent_engine", "detect_intent", "intent"),
+        ("intent_engine", "detect_intents", "intent"),
+        ("intent_engine", "extract_entities", "extraction"),
+        ("context_manager", "get_pending", "context"),
+        ("context_manager", "set_pending", "context"),
+        ("context_manager", "update_entities", "context"),
+        ("context_manager", "clear", "context"),
+        ("action_router", "route", "routing"),
+        ("action_router", "route_async", "routing"),
+        ("", "_handle_followup", "followup"),
+        ("", "process_message", "turn"),
+        ("", "process_message_async", "turn"),
+        ("", "process_messages", "batch"),
+    )
+
+    def __init__(self, bot: Any):
+        """
+        Initialize (disabled).
+
+        Args:
+            bot: MainBot to instrument
+        """
+        self.bot = bot
+        self.sinks: Tuple[Sink, ...] = ()
+        self.clock: Callable[[], float] = time.perf_counter
+        self._installed: List[Tuple[Any, str]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Check if any sink is attached."""
+        return bool(self.sinks)
+
+    def add_sink(self, sink: Sink) -> Sink:
+        """
+        Attach a sink, enabling instrumentation.
+
+        Args:
+            sink: Sink to receive spans and counters
+
+        Returns:
+            The sink (for chaining)
+        """
+        with self._lock:
+            self.sinks = self.sinks + (sink,)
+            self._uninstall()
+            self._install()
+        return sink
+
+    def remove_sink(self, sink: Sink) -> None:
+        """Detach a sink; instrumentation is disabled with the last one."""
+        with self._lock:
+            self.sinks = tuple(s for s in self.sinks if s is not sink)
+            self._uninstall()
+            if self.sinks:
+                self._install()
+
+    def span(self, stage: str, seconds: float, labels: Labels = ()) -> None:
+        """Send a stage timing to every sink (no-op while disabled)."""
+        for sink in self.sinks:
+            sink.span(stage, seconds, labels)
+
+    def count(self, name: str, value: float = 1, labels: Labels = ()) -> None:
+        """Send a counter increment to every sink (no-op while disabled)."""
+        for sink in self.sinks:
+            sink.count(name, value, labels)
+
+    def _install(self) -> None:
+        """Shadow each stage method with a wrapper bound to the current sinks."""
+        for owner_name, method, stage in self.STAGES:
+            owner = getattr(self.bot, owner_name) if owner_name else self.bot
+            function = getattr(owner, method, None)
+            if function is None:
+                continue
+            labels: Labels = (("operation", method),) if stage == "context" else ()
+            setattr(owner, method, self._wrap(function, stage, labels, method))
+            self._installed.append((owner, method))
+
+    def _uninstall(self) -> None:
+        """Remove the wrappers, restoring the plain methods."""
+        for owner, method in self._installed:
+            owner.__dict__.pop(method, None)
+        self._installed = []
+
+    def _bound_counter(self, name: str, labels: Labels) -> Callable[[float], None]:
+        """Return a function incrementing a counter on every current sink."""
+        counters = [sink.counter(name, labels) for sink in self.sinks]
+        if len(counters) == 1:
+            return counters[0]
+
+        def increment(value: float) -> None:
+            for counter in counters:
+                counter(value)
+
+        return increment
+
+    def _wrap(self, function: Callable[..., Any], stage: str, labels: Labels,
+              method: str) -> Callable[..., Any]:
+        """Return function timed as stage."""
+        clock, count = self.clock, self.count
+        recorders = [sink.recorder(stage, labels) for sink in self.sinks]
+        if len(recorders) == 1:
+            span = recorders[0]
+        else:
+            def span(seconds: float) -> None:
+                for record in recorders:
+                    record(seconds)
+        error_labels: Labels = (("stage", stage),)
+        counts_intents = method == "detect_intent"
+        counts_messages = stage in ("turn", "batch")
+        messages = self._bound_counter("messages", ())
+        intents: Dict[Optional[str], Callable[[float], None]] = {}
+
+        code = getattr(getattr(function, "__func__", function), "__code__", None)
+        if code is not None and code.co_flags & _CO_COROUTINE:
+            async def timed_async(*args: Any, **kwargs: Any) -> Any:
+                start = clock()
+                try:
+                    result = await function(*args, **kwargs)
+                except Exception:
+                    count("errors", 1, error_labels)
+                    raise
+                finally:
+                    span(clock() - start)
+                if counts_messages:
+                    messages(1)
+                return result
+
+            timed_async.__wrapped__ = function
+            return timed_async
+
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = clock()
+            try:
+                result = function(*args, **kwargs)
+            except Exception:
+                count("errors", 1, error_labels)
+                raise
+            finally:
+                span(clock() - start)
+            if counts_intents:
+                increment = intents.get(result)
+                if increment is None:
+                    increment = intents[result] = self._bound_counter("intents", (("intent", result or "none"),))
+                increment(1)
+            elif counts_messages:
+                messages(len(result) if stage == "batch" else 1)
+            return result
+
+        timed.__wrapped__ = function
+        return timed
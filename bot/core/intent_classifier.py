@@ -0,0 +1,445 @@
+# ============================================================================
+# bot/core/intent_classifier.py
+# ============================================================================
+"""
+Linear intent classifier over hashed n-gram features.
+
+A fallback for messages no intent pattern matches, such as paraphrases
+like "is it going to rain in Oslo". Features are word unigrams, word
+bigrams and byte n-grams of each word, hashed into a fixed number of
+buckets. The model is a weight per intent and bucket plus a bias per
+intent, trained offline as a multinomial logistic regression from
+labelled JSONL:
+
+    {"text": "is it going to rain in Oslo", "intent": "get_weather"}
+    {"text": "thanks!", "intent": null}
+
+Model file (little-endian, memory-mapped and read in place):
+- header: magic, version, n-gram size, bigrams flag, bucket count,
+  class count, label table size
+- labels: UTF-8, newline-separated, padded to 4 bytes
+- bias: float32[classes]
+- weights: float32[classes][buckets]
+
+Usage:
+    python -m bot.core.intent_classifier train intents.jsonl --model intents.model
+    python -m bot.core.intent_classifier eval intents.model test.jsonl
+    python -m bot.core.intent_classifier predict intents.model "is it going to rain in Oslo"
+"""
+
+import json
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import threading
+from array import array
+from operator import add
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from zlib import crc32
+
+from .tokenizer import Message, as_message
+
+HEADER = struct.Struct("<4sBBBxIII")
+MAGIC = b"BICL"
+VERSION = 1
+
+# Label of training examples that are no intent (chatter); never returned
+NO_INTENT = "none"
+
+DEFAULT_BUCKETS = 1 << 16
+
+# Tokens whose feature buckets are cached before the cache is reset
+MEMO_SIZE = 8192
+
+_MASK = 0xFFFFFFFF
+_PAIR = 0x9E3779B1
+
+
+def token_hashes(token: str, ngram: int) -> List[int]:
+    """
+    Return the 32-bit hashes of a token's own features.
+
+    Args:
+        token: Lowercased token
+        ngram: Byte n-gram size (0 for none)
+
+    Returns:
+        The token's hash (its unigram feature), then one hash per byte
+        n-gram of the token wrapped in "<" and ">" (words only)
+    """
+    encoded = token.encode("utf-8")
+    hashes = [crc32(encoded)]
+    if ngram and (len(token) > 1 or token.isalnum() or token == "_"):
+        # Seeded differently, so a gram never shares a hash with the same word
+        wrapped = b"<" + encoded + b">"
+        hashes += [crc32(wrapped[start:start + ngram], 1) for start in range(len(wrapped) - ngram + 1)]
+    return hashes
+
+
+def pair_hash(first: int, second: int) -> int:
+    """Return the hash of a word bigram from the hashes of its two words."""
+    return ((first * _PAIR) ^ (second + _PAIR)) & _MASK
+
+
+def features(tokens: Sequence[str], buckets: int, ngram: int = 3, bigrams: bool = True) -> List[int]:
+    """
+    Return the feature buckets of a token sequence (repeated features repeat).
+
+    Args:
+        tokens: Lowercased tokens (see bot.core.tokenizer.Message)
+        buckets: Number of hash buckets
+        ngram: Byte n-gram size (0 for none)
+        bigrams: Whether to include word bigrams
+
+    Returns:
+        Bucket per feature
+    """
+    found: List[int] = []
+    previous = None
+    for token in tokens:
+        hashes = token_hashes(token, ngram)
+        found.extend(value % buckets for value in hashes)
+        if bigrams and previous is not None:
+            found.append(pair_hash(previous, hashes[0]) % buckets)
+        previous = hashes[0]
+    return found
+
+
+def read_examples(path: Union[str, Path]) -> List[Tuple[str, str]]:
+    """
+    Read labelled examples from JSONL.
+
+    Each line holds "text" and "intent"; a null, empty or missing intent
+    (chatter the bot should not act on) is labelled NO_INTENT.
+
+    Args:
+        path: JSONL file
+
+    Returns:
+        (text, intent) pairs in file order
+    """
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                examples.append((record["text"], record.get("intent") or NO_INTENT))
+    return examples
+
+
+def _softmax(scores: List[float]) -> List[float]:
+    """Return the softmax of scores."""
+    peak = max(scores)
+    exps = [math.exp(score - peak) for score in scores]
+    total = sum(exps)
+    return [value / total for value in exps]
+
+
+def train(examples: Iterable[Tuple[str, Optional[str]]], path: Union[str, Path],
+          buckets: int = DEFAULT_BUCKETS, ngram: int = 3, bigrams: bool = True,
+          epochs: int = 15, learning_rate: float = 0.5, l2: float = 1e-6,
+          seed: int = 0) -> Dict[str, float]:
+    """
+    Train a classifier with SGD and write its model file.
+
+    Args:
+        examples: (text, intent) pairs; a None intent means NO_INTENT
+        path: Output model file (replaced atomically)
+        buckets: Number of hash buckets
+        ngram: Byte n-gram size (0 for none)
+        bigrams: Whether to use word bigrams
+        epochs: Passes over the examples (the rate decays every pass)
+        learning_rate: Initial SGD step
+        l2: L2 regularization strength
+        seed: Shuffling seed
+
+    Returns:
+        Example and class counts, final-epoch mean loss and training accuracy
+
+    Raises:
+        ValueError: If there are no examples
+    """
+    data = [(features(Message(text).tokens, buckets, ngram, bigrams), intent or NO_INTENT)
+            for text, intent in examples]
+    if not data:
+        raise ValueError("No training examples")
+    labels = sorted({intent for _, intent in data})
+    index = {label: i for i, label in enumerate(labels)}
+    classes = len(labels)
+    samples = [(ids, index[intent]) for ids, intent in data]
+
+    bias = [0.0] * classes
+    weights: Dict[int, List[float]] = {}
+    rng = random.Random(seed)
+    loss = correct = 0.0
+    for epoch in range(epochs):
+        rng.shuffle(samples)
+        rate = learning_rate / (1 + epoch)
+        loss = correct = 0.0
+        for ids, target in samples:
+            scores = bias
+            for feature in ids:
+                row = weights.get(feature)
+                if row is not None:
+                    scores = list(map(add, scores, row))
+            probabilities = _softmax(scores)
+            loss -= math.log(max(probabilities[target], 1e-12))
+            correct += max(range(classes), key=probabilities.__getitem__) == target
+            gradient = probabilities
+            gradient[target] -= 1.0
+            bias = [b - rate * g for b, g in zip(bias, gradient)]
+            for feature in ids:
+                row = weights.get(feature)
+                if row is None:
+                    row = weights[feature] = [0.0] * classes
+                for c in range(classes):
+                    row[c] -= rate * (gradient[c] + l2 * row[c])
+
+    # Class-major, so scoring sums one contiguous column per class
+    table = array("f", bytes(4 * buckets * classes))
+    for feature, row in weights.items():
+        for c, weight in enumerate(row):
+            table[c * buckets + feature] = weight
+    _write_model(Path(path), labels, bias, table, ngram, bigrams, buckets)
+    return {"examples": len(samples), "classes": classes,
+            "loss": loss / len(samples), "accuracy": correct / len(samples)}
+
+
+def _write_model(path: Path, labels: List[str], bias: List[float], table: array,
+                 ngram: int, bigrams: bool, buckets: int) -> None:
+    """Write a model file atomically."""
+    label_bytes = "\n".join(labels).encode("utf-8")
+    label_bytes += b"\0" * (-len(label_bytes) % 4)
+    floats = array("f", bias)
+    floats.extend(table)
+    if sys.byteorder != "little":
+        floats.byteswap()
+
+    import tempfile
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, ngram, int(bigrams), buckets, len(labels), len(label_bytes)))
+        f.write(label_bytes)
+        f.write(floats.tobytes())
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+class IntentClassifier:
+    """
+    Hashed n-gram linear intent classifier, memory-mapped from disk.
+
+    Nothing is parsed at load time: weights are read straight out of the
+    mapping through a float32 view per class. Scoring a message is the
+    product of the weight matrix with its sparse feature counts: each class
+    sums its weights at the message's feature buckets in one C-level
+    sum(map(...)). A token's own features (the word and its byte n-grams)
+    are the same wherever it occurs, so their buckets are cached per token.
+    """
+
+    def __init__(self, path: Union[str, Path], threshold: float = 0.5):
+        """
+        Initialize classifier (the model is mapped on first use).
+
+        Args:
+            path: Model file written by train()
+            threshold: Minimum probability for classify() to return an intent
+        """
+        self.path = Path(path)
+        self.threshold = threshold
+        self.labels: List[str] = []
+        self.ngram = 0
+        self.bigrams = False
+        self.buckets = 0
+        self._map: Optional[mmap.mmap] = None
+        self._floats: Optional[memoryview] = None
+        self._bias: List[float] = []
+        self._columns: List[memoryview] = []
+        self._tokens: Dict[str, Tuple[int, List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def _open(self) -> memoryview:
+        """Map the model file and return its float32 view."""
+        if self._floats is not None:
+            return self._floats
+        with self._lock:
+            if self._floats is not None:
+                return self._floats
+            with open(self.path, "rb") as f:
+                model = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(model) < HEADER.size:
+                model.close()
+                raise ValueError(f"{self.path} is not an intent model")
+            magic, version, ngram, bigrams, buckets, classes, label_size = HEADER.unpack_from(model)
+            start = HEADER.size + label_size
+            if (magic != MAGIC or version != VERSION
+                    or len(model) != start + 4 * classes * (buckets + 1)):
+                model.close()
+                raise ValueError(f"{self.path} is not an intent model")
+            labels = model[HEADER.size:start].rstrip(b"\0").decode("utf-8").split("\n")
+
+            raw = memoryview(model)[start:]
+            if sys.byteorder == "little":
+                floats = raw.cast("f")
+            else:
+                swapped = array("f", raw.tobytes())
+                swapped.byteswap()
+                floats = memoryview(swapped)
+                raw.release()
+            self.labels = labels
+            self.ngram = ngram
+            self.bigrams = bool(bigrams)
+            self.buckets = buckets
+            self._bias = list(floats[:classes])
+            self._columns = [floats[classes + c * buckets:classes + (c + 1) * buckets]
+                             for c in range(classes)]
+            self._map = model
+            self._floats = floats
+            return floats
+
+    def close(self) -> None:
+        """Unmap the model (it is mapped again on the next prediction)."""
+        with self._lock:
+            if self._map is not None:
+                for column in self._columns:
+                    column.release()
+                self._floats.release()
+                self._floats = None
+                self._columns = []
+                self._tokens.clear()
+                self._map.close()
+                self._map = None
+
+    def _token_features(self, token: str) -> Tuple[int, List[int]]:
+        """Return (token hash, buckets of the token's own features) (cached)."""
+        cached = self._tokens.get(token)
+        if cached is not None:
+            return cached
+        buckets = self.buckets
+        hashes = token_hashes(token, self.ngram)
+        if len(self._tokens) >= MEMO_SIZE:
+            self._tokens.clear()
+        cached = self._tokens[token] = (hashes[0], [value % buckets for value in hashes])
+        return cached
+
+    def scores(self, text: Union[str, Message]) -> List[float]:
+        """
+        Return the raw score of every label for a message.
+
+        Args:
+            text: Message text (or the Message it was tokenized into)
+
+        Returns:
+            Score per label, in the order of labels
+        """
+        self._open()
+        buckets, bigrams = self.buckets, self.bigrams
+        found: List[int] = []
+        previous = None
+        for token in as_message(text).tokens:
+            word, own = self._token_features(token)
+            found += own
+            if bigrams and previous is not None:
+                # pair_hash(), inlined
+                found.append((((previous * _PAIR) ^ (word + _PAIR)) & _MASK) % buckets)
+            previous = word
+        return [bias + sum(map(column.__getitem__, found))
+                for bias, column in zip(self._bias, self._columns)]
+
+    def predict(self, text: Union[str, Message]) -> Tuple[str, float]:
+        """
+        Return the most likely label for a message and its probability.
+
+        Args:
+            text: Message text (or the Message it was tokenized into)
+
+        Returns:
+            (label, probability); the label may be NO_INTENT
+        """
+        probabilities = _softmax(self.scores(text))
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        return self.labels[best], probabilities[best]
+
+    def classify(self, text: Union[str, Message]) -> Optional[str]:
+        """
+        Return the intent of a message if the model is confident enough.
+
+        Args:
+            text: Message text (or the Message it was tokenized into)
+
+        Returns:
+            Intent, or None below threshold or for NO_INTENT
+        """
+        label, probability = self.predict(text)
+        if probability < self.threshold or label == NO_INTENT:
+            return None
+        return label
+
+
+def evaluate(classifier: IntentClassifier, examples: Iterable[Tuple[str, Optional[str]]]) -> float:
+    """
+    Return the fraction of examples whose top label is their intent.
+
+    Args:
+        classifier: Trained classifier
+        examples: (text, intent) pairs; a None intent means NO_INTENT
+
+    Returns:
+        Accuracy (0 for no examples)
+    """
+    total = correct = 0
+    for text, intent in examples:
+        total += 1
+        correct += classifier.predict(text)[0] == (intent or NO_INTENT)
+    return correct / total if total else 0.0
+
+
+def main() -> None:
+    """Train, evaluate or try a model from the command line."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Hashed n-gram intent classifier.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train_parser = commands.add_parser("train", help="Train a model from labelled JSONL")
+    train_parser.add_argument("examples", help="JSONL with text and intent per line")
+    train_parser.add_argument("--model", required=True, help="Output model file")
+    train_parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS)
+    train_parser.add_argument("--ngram", type=int, default=3, help="Byte n-gram size (0 for none)")
+    train_parser.add_argument("--no-bigrams", action="store_true")
+    train_parser.add_argument("--epochs", type=int, default=15)
+    eval_parser = commands.add_parser("eval", help="Report accuracy on labelled JSONL")
+    eval_parser.add_argument("model")
+    eval_parser.add_argument("examples")
+    predict_parser = commands.add_parser("predict", help="Classify texts")
+    predict_parser.add_argument("model")
+    predict_parser.add_argument("texts", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        start = time.perf_counter()
+        stats = train(read_examples(args.examples), args.model, args.buckets, args.ngram,
+                      not args.no_bigrams, args.epochs)
+        print(f"✓ {stats['examples']} examples, {stats['classes']} classes in "
+              f"{time.perf_counter() - start:.1f}s: loss {stats['loss']:.3f}, "
+              f"training accuracy {stats['accuracy']:.1%} -> {args.model}")
+    elif args.command == "eval":
+        examples = read_examples(args.examples)
+        accuracy = evaluate(IntentClassifier(args.model), examples)
+        print(f"✓ accuracy {accuracy:.1%} on {len(examples)} examples")
+    else:
+        classifier = IntentClassifier(args.model)
+        for text in args.texts:
+            start = time.perf_counter()
+            label, probability = classifier.predict(text)
+            elapsed = (time.perf_counter() - start) * 1e6
+            print(f"  {text!r} -> {label} ({probability:.2f})  [{elapsed:.1f} µs]")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,74 @@
 """Intent detection and entity extraction engine."""
 
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
+from .intent_matcher import IntentMatcher
+from .tokenizer import Message, as_message
+
+if TYPE_CHECKING:
+    from .intent_classifier import IntentClassifier
+
+# Entity extractor: text -> value (None if not found)
+Extractor = Callable[[str], Optional[str]]
+
+# Learn commands ("key = value") and the words stripped from a question
+_KEY_VALUE = re.compile(r"(?:learn\s+)?([a-z_]\w*)\s*=\s*(.+?)(?:\s*$|\.|\?)", re.IGNORECASE)
+_QUESTION_WORDS = re.compile(r"\b(what|is|the|tell|me|about|do|you|know)\b", re.IGNORECASE)
+_QUESTION_PUNCTUATION = re.compile(r"[?.,!]")
+
+
+class EntityExtractor:
+    """
+    Entity extractor reading a tokenized Message.
+
+    IntentEngine.extract_entities walks a message's tokens once for all of
+    an intent's extractors: at() is called on every token listed in
+    triggers (lowercased), in order, until one returns a value; rest() is
+    called if none does. Called with a string, an extractor tokenizes it
+    itself, so it can be used wherever an Extractor is expected.
+    """
+
+    # Lowercased tokens at() is called on
+    triggers: Tuple[str, ...] = ()
+
+    def at(self, message: Message, index: int) -> Optional[str]:
+        """
+        Extract the entity at a trigger token.
+
+        Args:
+            message: Tokenized message
+            index: Position of the trigger token in message.tokens
+
+        Returns:
+            Entity value, or None to keep looking
+        """
+        return None
+
+    def rest(self, message: Message) -> Optional[str]:
+        """
+        Extract the entity when no trigger token yielded it.
+
+        Args:
+            message: Tokenized message
+
+        Returns:
+            Entity value, or None if not found
+        """
+        return None
+
+    def extract(self, message: Message) -> Optional[str]:
+        """Extract the entity from a message on its own."""
+        triggers = self.triggers
+        for index, token in enumerate(message.tokens):
+            if token in triggers:
+                value = self.at(message, index)
+                if value is not None:
+                    return value
+        return self.rest(message)
+
+    def __call__(self, text: Union[str, Message]) -> Optional[str]:
+        """Extract the entity from text."""
+        return self.extract(as_message(text))
 
 
 class IntentEngine:
@@ -16,16 +83,25 @@ class IntentEngine:
     - Regex-based entity extraction
     - Missing entity identification
     - Natural language prompts for missing info
+
+    Only the built-in knowledge intents live here; skills contribute their
+    intents, patterns, extractors and prompts through register_pattern(),
+    register_extractor() and register_prompt() (see
+    bot.core.registry.SkillRegistry).
+
+    With a classifier, patterns stay the first stage: messages none of
+    them match are classified, so paraphrases still get an intent.
     """
 
-    def __init__(self):
-        """Initialize intent patterns and entity extractors."""
+    def __init__(self, classifier: Optional["IntentClassifier"] = None):
+        """
+        Initialize intent patterns and entity extractors.
+
+        Args:
+            classifier: Optional classifier for messages no pattern matches
+        """
+        self.classifier = classifier
         self.intent_patterns = {
-            "get_weather": [
-                r"\b(weather|temperature|forecast)\b",
-                r"\bhow'?s?\s+it\s+outside\b",
-                r"\bwhat'?s?\s+the\s+weather\b"
-            ],
             "learn_knowledge": [
                 r"\blearn\b",
                 r"\bteach\b",
@@ -39,90 +115,166 @@ class IntentEngine:
                 r"\bwhat'?s\b"
             ]
         }
+        self.matcher = IntentMatcher(self.intent_patterns)
+        self.extractors: Dict[str, Dict[str, Extractor]] = {}
+        # intent -> trigger token -> [(entity, EntityExtractor)], built on first use
+        self._triggers: Dict[str, Dict[str, List[Tuple[str, EntityExtractor]]]] = {}
+        # (intent, entity) -> prompt, so skills' prompts cannot clash
+        self.prompts: Dict[Tuple[str, str], str] = {
+            ("learn_knowledge", "key"): "What would you like me to learn?",
+            ("learn_knowledge", "value"): "What's the value for that?",
+        }
 
-    def detect_intent(self, text: str) -> Optional[str]:
+    def register_pattern(self, intent: str, pattern: str, priority: int = 0) -> None:
         """
-        Detect intent from text using pattern matching.
+        Register an additional intent pattern at runtime.
 
         Args:
-            text: User input text
+            intent: Intent name
+            pattern: Regex pattern matched against lowercased text
+            priority: For a new intent, its priority against existing ones
+                (built-in intents have 0; ties go to the earlier intent)
+        """
+        self.matcher.add(intent, pattern, priority)
+        self.intent_patterns.setdefault(intent, []).append(pattern)
+
+    def register_extractor(self, intent: str, entity: str, extractor: Extractor) -> None:
+        """
+        Register an entity extractor for an intent.
+
+        Args:
+            intent: Intent name
+            entity: Entity name
+            extractor: Callable returning the entity value found in text, or
+                None; an EntityExtractor reads the shared tokenized message
+        """
+        self.extractors.setdefault(intent, {})[entity] = extractor
+        self._triggers.pop(intent, None)
+
+    def register_prompt(self, intent: str, entity: str, prompt: str) -> None:
+        """
+        Register the question asked when an intent is missing an entity.
+
+        Args:
+            intent: Intent name
+            entity: Entity name
+            prompt: Question for the user
+        """
+        self.prompts[(intent, entity)] = prompt
+
+    def detect_intent(self, text: Union[str, Message]) -> Optional[str]:
+        """
+        Detect intent from text using pattern matching, then the classifier.
+
+        Args:
+            text: User input text (or the Message it was tokenized into)
 
         Returns:
             Detected intent string or None
         """
-        text_lower = text.lower().strip()
-
-        if not text_lower:
+        message = as_message(text)
+        tokens = message.tokens
+        if not tokens:
             return None
 
         # Check for learn pattern first (has = sign)
-        if "=" in text_lower:
+        if "=" in tokens:
             return "learn_knowledge"
 
-        # Check other patterns
-        for intent, patterns in self.intent_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text_lower):
-                    return intent
+        # Patterns run on the lowercased text; the tokens pick which ones
+        intent = self.matcher.match(message.lower.strip(), tokens)
+        if intent is None and self.classifier is not None:
+            intent = self.classifier.classify(message)
+        return intent
 
-        return None
+    def detect_intents(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        Detect intents for a batch of texts.
+
+        Each distinct text is matched once, however often it repeats.
+
+        Args:
+            texts: User input texts
 
-    def extract_entities(self, text: str, intent: str) -> Dict[str, str]:
+        Returns:
+            Detected intent (or None) per text, in input order
+        """
+        detected: Dict[str, Optional[str]] = {}
+        for text in texts:
+            if text not in detected:
+                detected[text] = self.detect_intent(text)
+        return [detected[text] for text in texts]
+
+    def extract_entities(self, text: Union[str, Message], intent: str) -> Dict[str, str]:
         """
         Extract entities based on intent.
 
+        The message is tokenized once: all of the intent's EntityExtractors
+        share one walk over its tokens, and plain extractors get the text.
+
         Args:
-            text: User input text
+            text: User input text (or the Message it was tokenized into)
             intent: Detected intent
 
         Returns:
             Dictionary of extracted entities
         """
-        entities = {}
+        message = as_message(text)
+        extractors = self.extractors.get(intent)
+        if extractors is not None:
+            triggers = self._triggers.get(intent)
+            if triggers is None:
+                triggers = self._compile_triggers(intent)
+            found: Dict[str, str] = {}
+            if triggers and not triggers.keys().isdisjoint(message.tokens):
+                for index, token in enumerate(message.tokens):
+                    hits = triggers.get(token)
+                    if hits is not None:
+                        for entity, extractor in hits:
+                            if entity not in found:
+                                value = extractor.at(message, index)
+                                if value is not None:
+                                    found[entity] = value
+            entities = {}
+            for entity, extract in extractors.items():
+                if entity in found:
+                    entities[entity] = found[entity]
+                elif isinstance(extract, EntityExtractor):
+                    entities[entity] = extract.rest(message)
+                else:
+                    entities[entity] = extract(message.text)
+            return entities
 
-        if intent == "get_weather":
-            entities["location"] = self._extract_location(text)
+        entities = {}
 
-        elif intent == "learn_knowledge":
-            key, value = self._extract_key_value(text)
+        if intent == "learn_knowledge":
+            key, value = self._extract_key_value(message)
             if key:
                 entities["key"] = key
             if value:
                 entities["value"] = value
 
         elif intent == "ask_knowledge":
-            entities["key"] = self._extract_question_key(text)
+            entities["key"] = self._extract_question_key(message)
 
         return entities
 
-    def _extract_location(self, text: str) -> Optional[str]:
-        """Extract location from weather query."""
-        # Look for "in <location>" pattern
-        match = re.search(r"\bin\s+([A-Za-z\s]+?)(?:\s+\?|$|\.|,)", text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-
-        # Look for city names (simple pattern)
-        words = text.split()
-        for i, word in enumerate(words):
-            if word.lower() in ["weather", "forecast", "temperature"]:
-                if i + 1 < len(words):
-                    # Take next word(s) as location
-                    location_parts = []
-                    for j in range(i + 1, min(i + 4, len(words))):
-                        if words[j][0].isupper() or j == i + 1:
-                            location_parts.append(words[j].strip("?.,!"))
-                        else:
-                            break
-                    if location_parts:
-                        return " ".join(location_parts)
-
-        return None
-
-    def _extract_key_value(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+    def _compile_triggers(self, intent: str) -> Dict[str, List[Tuple[str, EntityExtractor]]]:
+        """Build the trigger token dispatch table of an intent's extractors."""
+        triggers: Dict[str, List[Tuple[str, EntityExtractor]]] = {}
+        for entity, extractor in self.extractors.get(intent, {}).items():
+            if isinstance(extractor, EntityExtractor):
+                for token in extractor.triggers:
+                    triggers.setdefault(token, []).append((entity, extractor))
+        self._triggers[intent] = triggers
+        return triggers
+
+    def _extract_key_value(self, message: Message) -> Tuple[Optional[str], Optional[str]]:
         """Extract key-value pair from learn command."""
         # Pattern: "learn key = value" or "key = value"
-        match = re.search(r"(?:learn\s+)?([a-z_]\w*)\s*=\s*(.+?)(?:\s*$|\.|\?)", text, re.IGNORECASE)
+        if "=" not in message.tokens:
+            return None, None
+        match = _KEY_VALUE.search(message.text)
         if match:
             key = match.group(1).strip()
             value = match.group(2).strip()
@@ -130,11 +282,11 @@ class IntentEngine:
 
         return None, None
 
-    def _extract_question_key(self, text: str) -> Optional[str]:
+    def _extract_question_key(self, message: Message) -> Optional[str]:
         """Extract key from question."""
         # Remove common question words
-        cleaned = re.sub(r"\b(what|is|the|tell|me|about|do|you|know)\b", "", text, flags=re.IGNORECASE)
-        cleaned = re.sub(r"[?.,!]", "", cleaned).strip()
+        cleaned = _QUESTION_WORDS.sub("", message.text)
+        cleaned = _QUESTION_PUNCTUATION.sub("", cleaned).strip()
 
         if cleaned:
             return cleaned.lower().replace(" ", "_")
@@ -158,21 +310,18 @@ class IntentEngine:
                 missing.append(entity)
         return missing
 
-    def prompt_for_entity(self, entity_name: str) -> str:
+    def prompt_for_entity(self, entity_name: str, intent: Optional[str] = None) -> str:
         """
         Generate natural language prompt for missing entity.
 
         Args:
             entity_name: Name of missing entity
+            intent: Intent the entity is missing for
 
         Returns:
-            Natural language prompt string
+            The prompt registered for (intent, entity_name), or a generic
+            one naming the entity
         """
-        prompts = {
-            "location": "Can you please tell me the location?",
-            "key": "What would you like me to learn?",
-            "value": "What's the value for that?",
-        }
-
-        return prompts.get(entity_name, f"Can you please tell me the {entity_name}?")
+        prompt = self.prompts.get((intent, entity_name))
+        return prompt if prompt is not None else f"Can you please tell me the {entity_name}?"
 
@@ -0,0 +1,227 @@
+# ============================================================================
+# bot/core/intent_matcher.py
+# ============================================================================
+"""Compiled intent matcher with a literal prefilter and combined per-chunk scans."""
+
+import re
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+from .literal_prefilter import LiteralPrefilter, required_literals
+
+# Patterns per combined alternation. Python's regex engine tries every
+# branch of an alternation at every position, so one huge alternation
+# degrades badly; 16 was the sweet spot in benchmarks/bench_intent_matcher.py.
+CHUNK_SIZE = 16
+
+SearchFn = Callable[[str], Optional[re.Match]]
+
+# Literals made of word characters only, which never span two tokens
+_WORD_LITERAL = re.compile(r"\w+")
+
+# Distinct tokens whose literal masks are kept before the memo is reset
+TOKEN_MEMO_SIZE = 4096
+
+
+class IntentMatcher:
+    """
+    Matches text against all intent patterns with precompiled regexes.
+
+    Patterns are kept in priority order (intents by descending priority,
+    ties in the order they were first added, then patterns in the order
+    they were added to that intent) and grouped into chunks. Each chunk is compiled into a single
+    non-capturing alternation that answers "does anything in this chunk
+    match?" in one scan. Chunks are scanned in priority order and only
+    the first chunk that matches is resolved pattern by pattern, so the
+    result is identical to looping over every pattern.
+
+    With the literal prefilter (the default) chunks are not used: each
+    pattern's required literals (see literal_prefilter) are found in one
+    pass over the text, and only patterns whose literals occur, plus those
+    without any, are searched, still in priority order. Chatter that
+    contains no keyword costs one scan and no regex at all. Given the
+    message's tokens (see tokenizer.Message), literals of word characters
+    are looked up per distinct token instead, memoized, so a message of
+    familiar words costs one dict lookup per token; only the remaining
+    literals (e.g. "what's") are scanned for in the text.
+
+    Features:
+    - No per-message regex compilation or cache lookups
+    - One literal scan (or one scan per chunk) for messages that match nothing
+    - Deferred rebuilds: add() only marks the matcher dirty, and the next
+      match() rebuilds the whole prefilter once (or recompiles only the
+      chunks from the first one a new pattern shifts), so registering N
+      patterns costs one rebuild, not N
+    """
+
+    def __init__(self, intent_patterns: Optional[Dict[str, List[str]]] = None,
+                 chunk_size: int = CHUNK_SIZE, prefilter: bool = True):
+        """
+        Initialize matcher.
+
+        Args:
+            intent_patterns: Optional mapping of intent to regex patterns
+            chunk_size: Number of patterns combined into one alternation
+            prefilter: Skip patterns whose required literals are absent
+        """
+        self.chunk_size = chunk_size
+        self.prefilter = prefilter
+        # Word-character literals, and the rest (None if there are none)
+        self._prefilter: Optional[LiteralPrefilter] = None
+        self._others: Optional[LiteralPrefilter] = None
+        self._token_masks: Dict[str, int] = {}
+        self._unfiltered = 0    # bitmask of patterns without required literals
+        self._literals: Dict[str, Optional[FrozenSet[str]]] = {}
+        self._patterns: Dict[str, List[str]] = {}
+        self._order: List[str] = []
+        self._priority: Dict[str, int] = {}
+        self._entries: List[Tuple[str, str, SearchFn]] = []
+        self._chunks: List[Tuple[SearchFn, List[Tuple[str, str, SearchFn]]]] = []
+        self._dirty_from: Optional[int] = 0
+
+        if intent_patterns:
+            for intent, patterns in intent_patterns.items():
+                for pattern in patterns:
+                    self.add(intent, pattern)
+
+    def add(self, intent: str, pattern: str, priority: int = 0) -> None:
+        """
+        Register a pattern for an intent.
+
+        The pattern is compiled (and its literals extracted) immediately;
+        the prefilter or the affected chunks are rebuilt on the next match.
+
+        Args:
+            intent: Intent name
+            pattern: Regex pattern (matched against lowercased text)
+            priority: Intents with higher priority are tried first; only
+                used when the intent is new
+
+        Raises:
+            re.error: If the pattern is not a valid regex
+        """
+        search = re.compile(pattern).search
+        if self.prefilter and pattern not in self._literals:
+            self._literals[pattern] = required_literals(pattern)
+
+        if intent not in self._patterns:
+            index = next((i for i, name in enumerate(self._order) if self._priority[name] < priority),
+                         len(self._order))
+            self._order.insert(index, intent)
+            self._priority[intent] = priority
+            self._patterns[intent] = []
+
+        # Flat position: after the last pattern of this intent
+        position = 0
+        for name in self._order:
+            position += len(self._patterns[name])
+            if name == intent:
+                break
+
+        self._patterns[intent].append(pattern)
+        self._entries.insert(position, (intent, pattern, search))
+        self._mark_dirty(position)
+
+    def remove_intent(self, intent: str) -> None:
+        """
+        Remove all patterns for an intent.
+
+        Args:
+            intent: Intent name
+        """
+        if self._patterns.pop(intent, None) is None:
+            return
+        self._order.remove(intent)
+        del self._priority[intent]
+
+        position = next(i for i, entry in enumerate(self._entries) if entry[0] == intent)
+        self._entries = [entry for entry in self._entries if entry[0] != intent]
+        self._mark_dirty(position)
+
+    def __len__(self) -> int:
+        """Return number of registered patterns."""
+        return len(self._entries)
+
+    def _mark_dirty(self, position: int) -> None:
+        """Record that chunks from `position` onwards must be rebuilt."""
+        if self._dirty_from is None or position < self._dirty_from:
+            self._dirty_from = position
+
+    def _rebuild(self) -> None:
+        """Rebuild the prefilter, or recompile chunks from the first dirty position."""
+        if self.prefilter:
+            words: Dict[str, int] = {}
+            others: Dict[str, int] = {}
+            unfiltered = 0
+            for position, (_, pattern, _) in enumerate(self._entries):
+                cover = self._literals[pattern]
+                if cover is None:
+                    unfiltered |= 1 << position
+                    continue
+                for literal in cover:
+                    literals = words if _WORD_LITERAL.fullmatch(literal) else others
+                    literals[literal] = literals.get(literal, 0) | 1 << position
+            self._prefilter = LiteralPrefilter(words)
+            self._others = LiteralPrefilter(others) if others else None
+            self._token_masks = {}
+            self._unfiltered = unfiltered
+            self._dirty_from = None
+            return
+
+        first_chunk = self._dirty_from // self.chunk_size
+        del self._chunks[first_chunk:]
+
+        for start in range(first_chunk * self.chunk_size, len(self._entries), self.chunk_size):
+            entries = self._entries[start:start + self.chunk_size]
+            if len(entries) == 1:
+                gate = entries[0][2]
+            else:
+                gate = re.compile("|".join(f"(?:{pattern})" for _, pattern, _ in entries)).search
+            self._chunks.append((gate, entries))
+
+        self._dirty_from = None
+
+    def match(self, text: str, tokens: Optional[Sequence[str]] = None) -> Optional[str]:
+        """
+        Return the highest priority intent matching text.
+
+        Args:
+            text: Normalized (lowercased) input text
+            tokens: The text's tokens (Message.tokens), if already split
+
+        Returns:
+            Intent name or None
+        """
+        if self._dirty_from is not None:
+            self._rebuild()
+
+        if self._prefilter is not None:
+            entries = self._entries
+            if tokens is None:
+                candidates = self._prefilter.scan(text)
+            else:
+                candidates = 0
+                masks = self._token_masks
+                for token in tokens:
+                    mask = masks.get(token)
+                    if mask is None:
+                        if len(masks) >= TOKEN_MEMO_SIZE:
+                            masks.clear()
+                        mask = masks[token] = self._prefilter.scan(token)
+                    candidates |= mask
+            if self._others is not None:
+                candidates |= self._others.scan(text)
+            candidates |= self._unfiltered
+            while candidates:
+                lowest = candidates & -candidates
+                intent, _, search = entries[lowest.bit_length() - 1]
+                if search(text):
+                    return intent
+                candidates ^= lowest
+            return None
+
+        for gate, entries in self._chunks:
+            if gate(text):
+                for intent, _, search in entries:
+                    if search(text):
+                        return intent
+
+        return None
@@ -3,7 +3,12 @@
 # ============================================================================
 """Knowledge Engine for storing and retrieving facts."""
 
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .knowledge_index import KnowledgeIndex
+from .knowledge_store import KnowledgeStore, MemoryKnowledgeStore
+from .tfidf_index import TfidfIndex
+
+RETRIEVAL_MODES = ("substring", "tfidf")
 
 
 class KnowledgeEngine:
@@ -12,13 +17,41 @@ class KnowledgeEngine:
 
     Features:
     - Case-insensitive storage and retrieval
-    - Fuzzy matching for similar keys
+    - Fuzzy matching for similar keys (indexed, see KnowledgeIndex)
+    - Pluggable storage (in-memory by default, see knowledge_store)
+    - Optional ranked TF-IDF retrieval over keys and values
     - Friendly fallback messages
+
+    Retrieval modes for questions that are not an exact key:
+    - "substring": a key contained in the question or containing it
+    - "tfidf": the most similar fact by cosine similarity, if at least
+      `threshold` similar (see TfidfIndex)
     """
 
-    def __init__(self):
-        """Initialize empty knowledge base."""
-        self.knowledge: Dict[str, str] = {}
+    def __init__(self, store: Optional[KnowledgeStore] = None, retrieval: str = "substring",
+                 threshold: float = 0.5):
+        """
+        Initialize knowledge base.
+
+        Args:
+            store: Storage backend (defaults to an in-memory store)
+            retrieval: "substring" or "tfidf"
+            threshold: Minimum cosine similarity for a tfidf answer
+
+        Raises:
+            ValueError: If the retrieval mode is unknown
+        """
+        if retrieval not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{retrieval}', expected one of {RETRIEVAL_MODES}")
+        self.knowledge: KnowledgeStore = store if store is not None else MemoryKnowledgeStore()
+        self.retrieval = retrieval
+        self.threshold = threshold
+        # Only the selected mode's index is kept, built on the first lookup
+        self.index: Optional[KnowledgeIndex] = KnowledgeIndex() if retrieval == "substring" else None
+        self.semantic: Optional[TfidfIndex] = TfidfIndex() if retrieval == "tfidf" else None
+        self._index_cursor = None
+        # Called with the normalized key after every add_knowledge
+        self.listeners: List[Callable[[str], None]] = []
 
     def add_knowledge(self, key: str, value: str) -> None:
         """
@@ -29,7 +62,78 @@ class KnowledgeEngine:
             value: Associated value
         """
         normalized_key = key.lower().strip()
-        self.knowledge[normalized_key] = value.strip()
+        self.knowledge.put(normalized_key, value.strip())
+        # Before the first lookup the indexes are built from the store instead
+        if self._index_cursor is not None:
+            if self.index is not None:
+                self.index.add(normalized_key)
+            else:
+                self.semantic.add(normalized_key, value.strip())
+        for listener in self.listeners:
+            listener(normalized_key)
+
+    def _sync_index(self) -> None:
+        """Index keys written to the store since the last lookup (every key on the first)."""
+        if self._index_cursor is None:
+            self._load_index()
+        cursor, keys, reset = self.knowledge.changes(self._index_cursor)
+        if reset and self._load_index():
+            cursor, keys, reset = self.knowledge.changes(self._index_cursor)
+
+        if self.index is not None:
+            if reset:
+                self.index = KnowledgeIndex()
+            for key in keys:
+                self.index.add(key)
+        else:
+            facts = ((key, self.knowledge.get(key)) for key in keys)
+            facts = [(key, value) for key, value in facts if value is not None]
+            if reset:
+                self.semantic = TfidfIndex()
+                self.semantic.add_many(facts)
+            else:
+                for key, value in facts:
+                    self.semantic.add(key, value)
+        self._index_cursor = cursor
+
+    def _load_index(self) -> bool:
+        """Start the fuzzy index from the store's persisted one, if it has one."""
+        if self.index is None:
+            # TF-IDF statistics need every fact, so the index is built from all keys
+            return False
+        persisted = self.knowledge.key_index()
+        if persisted is None:
+            return False
+        base, self._index_cursor = persisted
+        self.index = KnowledgeIndex(base)
+        return True
+
+    def watch(self) -> Optional[Any]:
+        """
+        Start following writes made to a shared store by other processes.
+
+        Returns:
+            Cursor for changed_since(), or None if only this process
+            writes the store (the listeners see every write)
+        """
+        return self.knowledge.cursor() if self.knowledge.shared else None
+
+    def changed_since(self, cursor: Any) -> Tuple[Any, Optional[List[str]]]:
+        """
+        Return keys written to the store since a watch() cursor, by any process.
+
+        Args:
+            cursor: Cursor from watch() or a previous call
+
+        Returns:
+            (new cursor, changed keys), or (new cursor, None) if any key
+            may have changed (the store was compacted meanwhile)
+        """
+        # The cursor doubles as the store's version; read the log only if it moved
+        if self.knowledge.cursor() == cursor:
+            return cursor, []
+        cursor, keys, reset = self.knowledge.changes(cursor)
+        return cursor, None if reset else keys
 
     def query(self, question: str) -> str:
         """
@@ -45,17 +149,51 @@ class KnowledgeEngine:
         normalized = question.lower().strip()
 
         # Direct match
-        if normalized in self.knowledge:
-            return self.knowledge[normalized]
-
-        # Fuzzy match - check if question contains any key
-        for key, value in self.knowledge.items():
-            if key in normalized or normalized in key:
-                return value
+        answer = self.knowledge.get(normalized)
+        if answer is not None:
+            return answer
+
+        self._sync_index()
+        if self.semantic is not None:
+            hits = self.semantic.search(normalized, 1, self.threshold)
+            key = hits[0][0] if hits else None
+        else:
+            # Fuzzy match - question contains a key or a key contains the question
+            key = self.index.lookup(normalized)
+        if key is not None:
+            answer = self.knowledge.get(key)
+            if answer is not None:
+                return answer
 
         # No match found
         return "I don't know that yet. Try teaching me!"
 
+    def search(self, question: str, k: int = 3,
+               threshold: Optional[float] = None) -> List[Tuple[str, str, float]]:
+        """
+        Rank facts by similarity to a question (tfidf retrieval only).
+
+        Args:
+            question: Free-text question
+            k: Maximum number of results
+            threshold: Minimum similarity (defaults to self.threshold)
+
+        Returns:
+            (key, value, score) triples, best first
+
+        Raises:
+            RuntimeError: If the engine was not created with retrieval="tfidf"
+        """
+        if self.semantic is None:
+            raise RuntimeError("search() needs KnowledgeEngine(retrieval='tfidf')")
+        self._sync_index()
+        results = []
+        for key, score in self.semantic.search(question, k, self.threshold if threshold is None else threshold):
+            value = self.knowledge.get(key)
+            if value is not None:
+                results.append((key, value, score))
+        return results
+
     def get(self, key: str) -> Optional[str]:
         """
         Direct key lookup (case-insensitive).
@@ -70,5 +208,4 @@ class KnowledgeEngine:
 
     def list_knowledge(self) -> Dict[str, str]:
         """Return all stored knowledge."""
-        return self.knowledge.copy()
-
+        return dict(self.knowledge.items())
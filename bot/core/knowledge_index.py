@@ -0,0 +1,396 @@
+# ============================================================================
+# bot/core/knowledge_index.py
+# ============================================================================
+"""Inverted trigram index for fuzzy knowledge lookups."""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+from zlib import crc32
+
+NGRAM = 3
+
+# Mapped index header: magic, version, key count, distinct key lengths,
+# key slots, trigram slots, posting count, log offset covered
+MAPPED_HEADER = struct.Struct("<4sB3xIIIIIQ")
+MAPPED_MAGIC = b"KTRI"
+MAPPED_VERSION = 1
+
+# Trigram slot: trigram (UTF-8, zero padded), first posting, posting count (0 = empty)
+GRAM_SLOT = struct.Struct("<12sII")
+
+
+class KnowledgeIndex:
+    """
+    Answers KnowledgeEngine's fuzzy lookup without scanning every key.
+
+    A fuzzy hit is a stored key that is a substring of the question, or
+    that contains the question. When several keys qualify the one that was
+    stored first wins, exactly like the original linear scan.
+
+    - Keys contained in the question are found by looking up the
+      question's substrings, restricted to lengths that some stored key
+      actually has.
+    - Keys containing the question are found through a trigram posting
+      list: candidates come from the question's rarest trigram and are
+      verified in insertion order.
+
+    Questions shorter than a trigram have none to look up, so keys
+    containing them are found by scanning the keys in insertion order.
+
+    With a base (the persisted index of a store snapshot) only keys the
+    base lacks are held in memory; they come after every base key.
+    """
+
+    def __init__(self, base: Optional["MappedKnowledgeIndex"] = None):
+        """
+        Initialize empty index.
+
+        Args:
+            base: Persisted index of the keys stored first, if any
+        """
+        self.base = base
+        self._ids: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._lengths: Dict[int, int] = {}
+        self._postings: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        """Return number of indexed keys."""
+        return len(self._keys) + (len(self.base) if self.base is not None else 0)
+
+    def add(self, key: str) -> None:
+        """
+        Index a normalized key. Re-adding a key is a no-op.
+
+        Args:
+            key: Normalized knowledge key
+        """
+        if key in self._ids or (self.base is not None and key in self.base):
+            return
+
+        key_id = len(self._keys)
+        self._ids[key] = key_id
+        self._keys.append(key)
+        self._lengths[len(key)] = self._lengths.get(len(key), 0) + 1
+
+        postings = self._postings
+        for gram in self._ngrams(key):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array("I")
+            posting.append(key_id)
+
+    @staticmethod
+    def _ngrams(text: str) -> Set[str]:
+        """Return the distinct trigrams of text."""
+        return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+    def lookup(self, question: str) -> Optional[str]:
+        """
+        Find the earliest stored key that fuzzily matches a question.
+
+        Args:
+            question: Normalized question text
+
+        Returns:
+            Matching key or None
+        """
+        if self.base is not None:
+            key = self.base.lookup(question)
+            if key is not None:
+                return key
+
+        best = self._contained_in(question)
+        containing = self._containing(question, limit=best)
+        if containing is not None:
+            best = containing
+
+        return self._keys[best] if best is not None else None
+
+    def _contained_in(self, question: str) -> Optional[int]:
+        """Return the lowest key id among keys that are substrings of question."""
+        ids = self._ids
+        size = len(question)
+        best = None
+
+        for length in self._lengths:
+            if length > size:
+                continue
+            for start in range(size - length + 1):
+                key_id = ids.get(question[start:start + length])
+                if key_id is not None and (best is None or key_id < best):
+                    best = key_id
+
+        return best
+
+    def _containing(self, question: str, limit: Optional[int]) -> Optional[int]:
+        """Return the lowest key id below `limit` among keys containing question."""
+        keys = self._keys
+        if len(question) < NGRAM:
+            for key_id in range(len(keys) if limit is None else limit):
+                if question in keys[key_id]:
+                    return key_id
+            return None
+
+        postings = self._postings
+        rarest = None
+        for gram in self._ngrams(question):
+            posting = postings.get(gram)
+            if posting is None:
+                return None
+            if rarest is None or len(posting) < len(rarest):
+                rarest = posting
+
+        for key_id in rarest:
+            if limit is not None and key_id >= limit:
+                break
+            if question in keys[key_id]:
+                return key_id
+
+        return None
+
+
+def _slot_count(count: int) -> int:
+    """Return a power-of-two table size at most half full."""
+    size = 8
+    while size < 2 * count:
+        size *= 2
+    return size
+
+
+def write_mapped_index(path: Union[str, Path], keys: Iterable[str], covered: int = 0) -> int:
+    """
+    Write the persisted index of a key snapshot atomically.
+
+    Args:
+        path: Output file (replaced atomically)
+        keys: Distinct normalized keys, in the order they were stored
+        covered: Store position the snapshot was taken at (see
+            MappedKnowledgeIndex.covered)
+
+    Returns:
+        Number of keys written
+    """
+    encoded = [key.encode("utf-8") for key in keys]
+    count = len(encoded)
+    lengths = sorted({len(key.decode("utf-8")) for key in encoded})
+
+    offsets = array("Q", [0])
+    for key in encoded:
+        offsets.append(offsets[-1] + len(key))
+
+    key_slots = _slot_count(count)
+    slots = array("I", bytes(8 * key_slots))
+    postings: Dict[bytes, array] = {}
+    for key_id, key in enumerate(encoded):
+        key_hash = crc32(key)
+        slot = key_hash & (key_slots - 1)
+        while slots[2 * slot + 1]:
+            slot = (slot + 1) & (key_slots - 1)
+        slots[2 * slot] = key_hash
+        slots[2 * slot + 1] = key_id + 1
+        for gram in KnowledgeIndex._ngrams(key.decode("utf-8")):
+            gram_bytes = gram.encode("utf-8")
+            posting = postings.get(gram_bytes)
+            if posting is None:
+                posting = postings[gram_bytes] = array("I")
+            posting.append(key_id)
+
+    gram_slots = _slot_count(len(postings))
+    grams = bytearray(GRAM_SLOT.size * gram_slots)
+    flat = array("I")
+    for gram, posting in postings.items():
+        slot = crc32(gram) & (gram_slots - 1)
+        while GRAM_SLOT.unpack_from(grams, slot * GRAM_SLOT.size)[2]:
+            slot = (slot + 1) & (gram_slots - 1)
+        GRAM_SLOT.pack_into(grams, slot * GRAM_SLOT.size, gram, len(flat), len(posting))
+        flat.extend(posting)
+
+    tables = [array("I", lengths), offsets, slots, flat]
+    if sys.byteorder != "little":
+        for table in tables:
+            table.byteswap()
+    lengths_table, offsets, slots, flat = tables
+
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(MAPPED_HEADER.pack(MAPPED_MAGIC, MAPPED_VERSION, count, len(lengths),
+                                   key_slots, gram_slots, len(flat), covered))
+        f.write(lengths_table.tobytes())
+        f.write(b"\0" * (-f.tell() % 8))
+        f.write(offsets.tobytes())
+        f.write(slots.tobytes())
+        f.write(grams)
+        f.write(flat.tobytes())
+        f.write(b"".join(encoded))
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+    return count
+
+
+class MappedKnowledgeIndex:
+    """
+    Read-only KnowledgeIndex of a store snapshot, memory-mapped from disk.
+
+    Processes sharing a store map the same file, so the index lives once
+    in the page cache instead of being rebuilt in every process's memory.
+    Lookups follow KnowledgeIndex; key ids are positions in the snapshot.
+
+    File layout (little-endian): header, distinct key lengths, key offsets
+    into the key blob, exact-key slots of (crc32, id + 1), trigram slots,
+    trigram posting lists and the UTF-8 key blob.
+
+    Attributes:
+        covered: Store position the snapshot was taken at; keys stored
+            after it are indexed in memory (see KnowledgeStore.key_index)
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Map an index written by write_mapped_index().
+
+        Args:
+            path: Index file
+
+        Raises:
+            ValueError: If the file is not a mapped knowledge index
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._map
+        if len(data) < MAPPED_HEADER.size:
+            data.close()
+            raise ValueError(f"{path} is not a knowledge index")
+        (magic, version, count, length_count, key_slots, gram_slots,
+         posting_count, self.covered) = MAPPED_HEADER.unpack_from(data)
+        if magic != MAPPED_MAGIC or version != MAPPED_VERSION:
+            data.close()
+            raise ValueError(f"{path} is not a knowledge index")
+
+        position = MAPPED_HEADER.size
+
+        def table(code: str, items: int) -> memoryview:
+            nonlocal position
+            size = array(code).itemsize * items
+            raw = memoryview(data)[position:position + size]
+            position += size
+            if sys.byteorder == "little":
+                return raw.cast(code)
+            swapped = array(code, raw.tobytes())
+            swapped.byteswap()
+            raw.release()
+            return memoryview(swapped)
+
+        self._lengths = list(table("I", length_count))
+        position += -position % 8
+        self._offsets = table("Q", count + 1)
+        self._slots = table("I", 2 * key_slots)
+        self._grams = position
+        position += GRAM_SLOT.size * gram_slots
+        self._postings = table("I", posting_count)
+        self._blob = position
+        if len(data) != position + self._offsets[count]:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+        self._count = count
+        self._key_mask = key_slots - 1
+        self._gram_mask = gram_slots - 1
+
+    def close(self) -> None:
+        """Unmap the index."""
+        for view in (self._offsets, self._slots, self._postings):
+            view.release()
+        self._map.close()
+
+    def __len__(self) -> int:
+        """Return number of indexed keys."""
+        return self._count
+
+    def __contains__(self, key: str) -> bool:
+        """Check if a key is indexed."""
+        return self._id(key.encode("utf-8")) is not None
+
+    def _key(self, key_id: int) -> bytes:
+        """Return the UTF-8 key with an id."""
+        offsets, blob = self._offsets, self._blob
+        return self._map[blob + offsets[key_id]:blob + offsets[key_id + 1]]
+
+    def _id(self, key: bytes) -> Optional[int]:
+        """Return the id of a UTF-8 key, or None."""
+        key_hash = crc32(key)
+        slots, mask = self._slots, self._key_mask
+        slot = key_hash & mask
+        while True:
+            stored = slots[2 * slot + 1]
+            if not stored:
+                return None
+            if slots[2 * slot] == key_hash and self._key(stored - 1) == key:
+                return stored - 1
+            slot = (slot + 1) & mask
+
+    def _posting(self, gram: bytes) -> Optional[memoryview]:
+        """Return the ids of keys containing a UTF-8 trigram, or None."""
+        data, mask = self._map, self._gram_mask
+        padded = gram.ljust(12, b"\0")
+        slot = crc32(gram) & mask
+        while True:
+            stored, first, length = GRAM_SLOT.unpack_from(data, self._grams + slot * GRAM_SLOT.size)
+            if not length:
+                return None
+            if stored == padded:
+                return self._postings[first:first + length]
+            slot = (slot + 1) & mask
+
+    def lookup(self, question: str) -> Optional[str]:
+        """
+        Find the earliest indexed key that fuzzily matches a question.
+
+        Args:
+            question: Normalized question text
+
+        Returns:
+            Matching key or None
+        """
+        best = None
+        size = len(question)
+        for length in self._lengths:
+            if length > size:
+                break
+            for start in range(size - length + 1):
+                key_id = self._id(question[start:start + length].encode("utf-8"))
+                if key_id is not None and (best is None or key_id < best):
+                    best = key_id
+
+        if size < NGRAM:
+            # No trigram to look up: scan the keys stored before the best hit
+            encoded = question.encode("utf-8")
+            for key_id in range(self._count if best is None else best):
+                if encoded in self._key(key_id):
+                    best = key_id
+                    break
+        else:
+            rarest = None
+            for gram in KnowledgeIndex._ngrams(question):
+                posting = self._posting(gram.encode("utf-8"))
+                if posting is None:
+                    rarest = None
+                    break
+                if rarest is None or len(posting) < len(rarest):
+                    rarest = posting
+            if rarest is not None:
+                encoded = question.encode("utf-8")
+                for key_id in rarest:
+                    if best is not None and key_id >= best:
+                        break
+                    if encoded in self._key(key_id):
+                        best = key_id
+                        break
+
+        return self._key(best).decode("utf-8") if best is not None else None
@@ -0,0 +1,689 @@
+# ============================================================================
+# bot/core/knowledge_store.py
+# ============================================================================
+"""Storage backends for the knowledge engine."""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .knowledge_index import MappedKnowledgeIndex, write_mapped_index
+
+# Log record header: crc32(key + value), key length, value length
+RECORD = struct.Struct("<IHI")
+
+# Index header: magic, version, obsolete flag, capacity, count,
+# indexed_upto (log offset covered by the index), dead_bytes
+INDEX_HEADER = struct.Struct("<4sBB2xQQQQ")
+INDEX_HEADER_SIZE = 64
+INDEX_MAGIC = b"KIDX"
+INDEX_VERSION = 1
+OBSOLETE_OFFSET = 5
+
+# Index slot: key hash (0 = empty), record offset in the log
+SLOT = struct.Struct("<QQ")
+
+MAX_LOAD = 0.7
+
+
+class KnowledgeStore(ABC):
+    """
+    Abstract key-value storage used by KnowledgeEngine.
+
+    Keys are already normalized by the engine. Stores behave like a
+    read-only mapping for lookups and expose put() for writes.
+    """
+
+    # True if other processes can write to the same store
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return value for key, or None."""
+        pass
+
+    @abstractmethod
+    def put(self, key: str, value: str) -> None:
+        """Store or replace a value."""
+        pass
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate (key, value) pairs in the order keys were stored."""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Return number of stored keys."""
+        pass
+
+    def keys(self) -> Iterator[str]:
+        """Iterate stored keys."""
+        for key, _ in self.items():
+            yield key
+
+    def changes(self, cursor: Any = None) -> Tuple[Any, List[str], bool]:
+        """
+        Return keys written since `cursor`, including by other processes.
+
+        Args:
+            cursor: Value returned by a previous call, or None
+
+        Returns:
+            Tuple of (new cursor, changed keys, reset). When reset is True
+            the keys are the full key set and derived state must be rebuilt.
+        """
+        if cursor is None:
+            return True, list(self.keys()), True
+        return cursor, [], False
+
+    def cursor(self) -> Any:
+        """Return a changes() cursor at the current end, without listing keys."""
+        return True
+
+    def key_index(self) -> Optional[Tuple[MappedKnowledgeIndex, Any]]:
+        """
+        Return the store's persisted fuzzy key index, if it keeps one.
+
+        Returns:
+            (index of the keys stored first, changes() cursor of the keys
+            stored after them), or None to index every key in memory
+        """
+        return None
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+        pass
+
+    def __contains__(self, key: str) -> bool:
+        """Check if key is stored."""
+        return self.get(key) is not None
+
+    def __getitem__(self, key: str) -> str:
+        """Return value for key or raise KeyError."""
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+class MemoryKnowledgeStore(KnowledgeStore):
+    """In-process dict store (the default, lost on restart)."""
+
+    def __init__(self):
+        """Initialize empty store."""
+        self.data: Dict[str, str] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        """Return value for key, or None."""
+        return self.data.get(key)
+
+    def put(self, key: str, value: str) -> None:
+        """Store or replace a value."""
+        self.data[key] = value
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate (key, value) pairs in insertion order."""
+        return iter(list(self.data.items()))
+
+    def keys(self) -> Iterator[str]:
+        """Iterate stored keys."""
+        return iter(list(self.data))
+
+    def __len__(self) -> int:
+        """Return number of stored keys."""
+        return len(self.data)
+
+    def __contains__(self, key: str) -> bool:
+        """Check if key is stored."""
+        return key in self.data
+
+    def __getitem__(self, key: str) -> str:
+        """Return value for key or raise KeyError."""
+        return self.data[key]
+
+
+def _key_hash(key: bytes) -> int:
+    """Stable non-zero 64-bit hash shared by every process."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") | 1
+
+
+class LogKnowledgeStore(KnowledgeStore):
+    """
+    Append-only log plus an mmap'd open-addressing hash index on disk.
+
+    Layout of the store directory:
+    - CURRENT: active generation number
+    - <gen>.log: records of (crc, key length, value length, key, value)
+    - <gen>.idx: header plus (hash, offset) slots with linear probing
+    - <gen>.keys: fuzzy key index of a log prefix (MappedKnowledgeIndex),
+      written by save_key_index(), compact() and the compactor
+    - LOCK: flock()ed by writers
+
+    Any number of processes can open the same directory. Readers take no
+    cross-process lock (threads of one process share a store's mappings,
+    so they take its thread lock) and share the page cache instead of each
+    holding a copy; opening is O(1) because the index is persisted. Writers serialize on
+    LOCK, append to the log and update the index in place. A log tail not
+    yet covered by the index (e.g. after a crash) is indexed on open, and
+    a torn final record is truncated.
+
+    Overwritten records become garbage; compact() (or the background
+    compactor) rewrites live records into a new generation. Readers
+    notice the old index being flagged obsolete and reopen.
+
+    The fuzzy key index is shared the same way: engines map <gen>.keys
+    and only index the keys appended after it in memory.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, fsync: bool = False, initial_capacity: int = 1024):
+        """
+        Open or create a store.
+
+        Args:
+            path: Store directory
+            fsync: fsync the log after every write
+            initial_capacity: Index slots for a new store (power of two)
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.initial_capacity = initial_capacity
+
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_fd = os.open(self.path / "LOCK", os.O_RDWR | os.O_CREAT, 0o644)
+
+        self._gen = 0
+        self._log_fd: Optional[int] = None
+        self._log_map: Optional[mmap.mmap] = None
+        self._idx_fd: Optional[int] = None
+        self._idx_map: Optional[mmap.mmap] = None
+
+        self._compactor: Optional[threading.Thread] = None
+        self._compactor_stop = threading.Event()
+
+        with self._locked():
+            if not (self.path / "CURRENT").exists():
+                self._create_generation(1, initial_capacity)
+                self._write_current(1)
+            self._open_current()
+            self._catch_up()
+
+    # ------------------------------------------------------------------
+    # Locking and file management
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self):
+        """Hold the thread lock and the cross-process writer lock."""
+        with self._lock:
+            if self._lock_depth == 0:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _file(self, gen: int, suffix: str) -> Path:
+        """Return path of a generation file."""
+        return self.path / f"{gen}.{suffix}"
+
+    def _write_current(self, gen: int) -> None:
+        """Atomically point CURRENT at a generation."""
+        tmp = self.path / "CURRENT.tmp"
+        tmp.write_text(str(gen))
+        fd = os.open(tmp, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, self.path / "CURRENT")
+
+    def _create_index(self, path: Path, capacity: int) -> Tuple[int, mmap.mmap]:
+        """Create an empty index file and return its fd and mapping."""
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.ftruncate(fd, INDEX_HEADER_SIZE + capacity * SLOT.size)
+        index = mmap.mmap(fd, 0)
+        INDEX_HEADER.pack_into(index, 0, INDEX_MAGIC, INDEX_VERSION, 0, capacity, 0, 0, 0)
+        return fd, index
+
+    def _create_generation(self, gen: int, capacity: int) -> None:
+        """Create an empty log and index for a generation."""
+        os.close(os.open(self._file(gen, "log"), os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644))
+        fd, index = self._create_index(self._file(gen, "idx"), capacity)
+        index.close()
+        os.close(fd)
+
+    def _open_current(self) -> None:
+        """Map the generation named by CURRENT."""
+        self._close_files()
+        while True:
+            self._gen = int((self.path / "CURRENT").read_text())
+            try:
+                self._log_fd = os.open(self._file(self._gen, "log"), os.O_RDWR | os.O_APPEND)
+                self._idx_fd = os.open(self._file(self._gen, "idx"), os.O_RDWR)
+                break
+            except FileNotFoundError:
+                # Raced with a compaction in another process; re-read CURRENT
+                self._close_files()
+        self._idx_map = mmap.mmap(self._idx_fd, 0)
+
+        magic, version = INDEX_HEADER.unpack_from(self._idx_map, 0)[:2]
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"Not a knowledge index: {self._file(self._gen, 'idx')}")
+
+    def _close_files(self) -> None:
+        """Unmap and close generation files."""
+        for resource in (self._log_map, self._idx_map):
+            if resource is not None:
+                resource.close()
+        for fd in (self._log_fd, self._idx_fd):
+            if fd is not None:
+                os.close(fd)
+        self._log_map = self._idx_map = None
+        self._log_fd = self._idx_fd = None
+
+    def _refresh(self) -> None:
+        """Reopen if another process resized or compacted the index."""
+        if self._idx_map[OBSOLETE_OFFSET]:
+            self._open_current()
+
+    def close(self) -> None:
+        """Stop the compactor and release all files."""
+        self.stop_compactor()
+        with self._lock:
+            self._close_files()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    # ------------------------------------------------------------------
+    # Header, log and slot access
+    # ------------------------------------------------------------------
+
+    def _header(self) -> Tuple[int, int, int, int]:
+        """Return (capacity, count, indexed_upto, dead_bytes)."""
+        return INDEX_HEADER.unpack_from(self._idx_map, 0)[3:]
+
+    def _set_header(self, count: int, indexed_upto: int, dead_bytes: int) -> None:
+        """Update the mutable header fields."""
+        capacity = self._header()[0]
+        INDEX_HEADER.pack_into(self._idx_map, 0, INDEX_MAGIC, INDEX_VERSION, 0,
+                               capacity, count, indexed_upto, dead_bytes)
+
+    def _log_view(self, end: int) -> mmap.mmap:
+        """Return a log mapping covering at least `end` bytes."""
+        if self._log_map is None or len(self._log_map) < end:
+            size = os.fstat(self._log_fd).st_size
+            if size < end:
+                raise ValueError(f"Knowledge log truncated at {size} < {end}")
+            if self._log_map is not None:
+                self._log_map.close()
+            self._log_map = mmap.mmap(self._log_fd, size, access=mmap.ACCESS_READ)
+        return self._log_map
+
+    def _read_record(self, offset: int) -> Tuple[bytes, bytes, int]:
+        """Return (key, value, record length) of the record at offset."""
+        log = self._log_view(offset + RECORD.size)
+        _, key_len, value_len = RECORD.unpack_from(log, offset)
+        end = offset + RECORD.size + key_len + value_len
+        log = self._log_view(end)
+        start = offset + RECORD.size
+        return log[start:start + key_len], log[start + key_len:end], end - offset
+
+    def _find(self, key: bytes, key_hash: int) -> Tuple[int, Optional[int]]:
+        """Return (slot, record offset) for key; offset is None if absent."""
+        index = self._idx_map
+        mask = self._header()[0] - 1
+        slot = key_hash & mask
+        while True:
+            stored_hash, offset = SLOT.unpack_from(index, INDEX_HEADER_SIZE + slot * SLOT.size)
+            if stored_hash == 0:
+                return slot, None
+            if stored_hash == key_hash and self._read_record(offset)[0] == key:
+                return slot, offset
+            slot = (slot + 1) & mask
+
+    @staticmethod
+    def _place(index: mmap.mmap, capacity: int, key_hash: int, offset: int) -> None:
+        """Insert a slot known not to be present yet."""
+        mask = capacity - 1
+        slot = key_hash & mask
+        while SLOT.unpack_from(index, INDEX_HEADER_SIZE + slot * SLOT.size)[0]:
+            slot = (slot + 1) & mask
+        position = INDEX_HEADER_SIZE + slot * SLOT.size
+        # Offset first so readers in other processes, which take no
+        # lock, never see a hash without it
+        struct.pack_into("<Q", index, position + 8, offset)
+        struct.pack_into("<Q", index, position, key_hash)
+
+    def _live_slots(self) -> List[Tuple[int, int]]:
+        """Return (offset, hash) of every occupied slot."""
+        index = self._idx_map
+        capacity = self._header()[0]
+        slots = []
+        for slot in range(capacity):
+            key_hash, offset = SLOT.unpack_from(index, INDEX_HEADER_SIZE + slot * SLOT.size)
+            if key_hash:
+                slots.append((offset, key_hash))
+        return slots
+
+    # ------------------------------------------------------------------
+    # Writes (lock held)
+    # ------------------------------------------------------------------
+
+    def _index_record(self, key: bytes, offset: int, length: int) -> None:
+        """Point the index at a newly appended record."""
+        capacity, count, _, dead_bytes = self._header()
+        key_hash = _key_hash(key)
+        slot, old_offset = self._find(key, key_hash)
+
+        if old_offset is not None:
+            dead_bytes += self._read_record(old_offset)[2]
+            struct.pack_into("<Q", self._idx_map, INDEX_HEADER_SIZE + slot * SLOT.size + 8, offset)
+        else:
+            if count + 1 > capacity * MAX_LOAD:
+                self._resize(capacity * 2)
+                capacity = self._header()[0]
+            self._place(self._idx_map, capacity, key_hash, offset)
+            count += 1
+
+        self._set_header(count, offset + length, dead_bytes)
+
+    def _resize(self, capacity: int) -> None:
+        """Rebuild the index with more slots."""
+        _, count, indexed_upto, dead_bytes = self._header()
+        tmp = self._file(self._gen, "idx.tmp")
+        fd, index = self._create_index(tmp, capacity)
+        for offset, key_hash in self._live_slots():
+            self._place(index, capacity, key_hash, offset)
+        INDEX_HEADER.pack_into(index, 0, INDEX_MAGIC, INDEX_VERSION, 0,
+                               capacity, count, indexed_upto, dead_bytes)
+        index.flush()
+        os.replace(tmp, self._file(self._gen, "idx"))
+
+        # Tell readers still mapping the old file to reopen
+        self._idx_map[OBSOLETE_OFFSET] = 1
+        self._idx_map.close()
+        os.close(self._idx_fd)
+        self._idx_fd, self._idx_map = fd, index
+
+    def _catch_up(self) -> None:
+        """Index any log tail beyond indexed_upto, truncating a torn record."""
+        offset = self._header()[2]
+        size = os.fstat(self._log_fd).st_size
+        while offset < size:
+            if offset + RECORD.size > size:
+                break
+            crc, key_len, value_len = RECORD.unpack_from(self._log_view(offset + RECORD.size), offset)
+            length = RECORD.size + key_len + value_len
+            if offset + length > size:
+                break
+            key, value, _ = self._read_record(offset)
+            if zlib.crc32(key + value) != crc:
+                break
+            self._index_record(key, offset, length)
+            offset += length
+
+        if offset < size:
+            if self._log_map is not None:
+                self._log_map.close()
+                self._log_map = None
+            os.ftruncate(self._log_fd, offset)
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Append a value and index it.
+
+        Args:
+            key: Normalized key (at most 65535 UTF-8 bytes)
+            value: Value to store
+        """
+        key_bytes = key.encode("utf-8")
+        value_bytes = value.encode("utf-8")
+        if len(key_bytes) > 0xFFFF:
+            raise ValueError("Knowledge key too long")
+        record = (RECORD.pack(zlib.crc32(key_bytes + value_bytes), len(key_bytes), len(value_bytes))
+                  + key_bytes + value_bytes)
+
+        with self._locked():
+            self._refresh()
+            self._catch_up()
+            offset = os.fstat(self._log_fd).st_size
+            os.write(self._log_fd, record)
+            if self.fsync:
+                os.fsync(self._log_fd)
+            self._index_record(key_bytes, offset, len(record))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        """Return value for key, or None."""
+        key_bytes = key.encode("utf-8")
+        with self._lock:
+            self._refresh()
+            _, offset = self._find(key_bytes, _key_hash(key_bytes))
+            if offset is None:
+                return None
+            return self._read_record(offset)[1].decode("utf-8")
+
+    def __len__(self) -> int:
+        """Return number of stored keys."""
+        with self._lock:
+            self._refresh()
+            return self._header()[1]
+
+    def _scan(self, start: int, end: int) -> Iterator[Tuple[int, bytes, bytes]]:
+        """Yield (offset, key, value) for log records in [start, end)."""
+        offset = start
+        while offset < end:
+            key, value, length = self._read_record(offset)
+            yield offset, key, value
+            offset += length
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate live (key, value) pairs in first-insertion order, like a dict."""
+        with self._lock:
+            self._refresh()
+            live = {offset for offset, _ in self._live_slots()}
+            pairs: Dict[bytes, bytes] = {}
+            for offset, key, value in self._scan(0, self._header()[2]):
+                # The first record of a key fixes its position, the live one its value
+                pairs.setdefault(key, value)
+                if offset in live:
+                    pairs[key] = value
+        return iter([(key.decode("utf-8"), value.decode("utf-8")) for key, value in pairs.items()])
+
+    def changes(self, cursor: Any = None) -> Tuple[Any, List[str], bool]:
+        """
+        Return keys appended since `cursor`, by any process.
+
+        The cursor is (generation, log offset); a compaction invalidates it
+        and the full key set is returned with reset=True.
+        """
+        with self._lock:
+            self._refresh()
+            end = self._header()[2]
+            if cursor is None or cursor[0] != self._gen:
+                start, reset = 0, True
+            else:
+                start, reset = cursor[1], False
+            keys = [key.decode("utf-8") for _, key, _ in self._scan(start, end)]
+            return (self._gen, end), keys, reset
+
+    def cursor(self) -> Any:
+        """Return a changes() cursor at the current end of the log."""
+        with self._lock:
+            self._refresh()
+            return self._gen, self._header()[2]
+
+    def key_index(self) -> Optional[Tuple[MappedKnowledgeIndex, Any]]:
+        """
+        Map the persisted fuzzy key index of the current generation.
+
+        Returns:
+            (index, changes() cursor at the log offset it covers), or None
+            if the generation has none yet
+        """
+        with self._lock:
+            self._refresh()
+            path = self._file(self._gen, "keys")
+            try:
+                index = MappedKnowledgeIndex(path)
+            except FileNotFoundError:
+                return None
+            except ValueError as e:
+                print(f"⚠ Ignoring key index: {e}")
+                return None
+            return index, (self._gen, index.covered)
+
+    def key_index_lag(self) -> int:
+        """Return log bytes not covered by the persisted key index."""
+        with self._lock:
+            self._refresh()
+            end = self._header()[2]
+            try:
+                index = MappedKnowledgeIndex(self._file(self._gen, "keys"))
+            except (FileNotFoundError, ValueError):
+                return end
+            index.close()
+            return end - index.covered
+
+    def save_key_index(self, min_lag: int = 0) -> bool:
+        """
+        Persist the fuzzy key index of the current log for every process.
+
+        The index is built from an immutable log prefix without holding
+        the writer lock.
+
+        Args:
+            min_lag: Only rewrite it if at least this many log bytes are
+                not covered yet
+
+        Returns:
+            True if the index was written
+        """
+        with self._lock:
+            self._refresh()
+            gen, end = self._gen, self._header()[2]
+            if self.key_index_lag() < max(min_lag, 1):
+                return False
+            keys = dict.fromkeys(key.decode("utf-8") for _, key, _ in self._scan(0, end))
+        tmp = self._file(gen, "keys.tmp")
+        write_mapped_index(tmp, keys, end)
+        with self._locked():
+            self._refresh()
+            if self._gen != gen:
+                # Compacted meanwhile; the new generation has its own
+                tmp.unlink(missing_ok=True)
+                return False
+            os.replace(tmp, self._file(gen, "keys"))
+        return True
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def dead_ratio(self) -> float:
+        """Return the fraction of the log occupied by overwritten records."""
+        with self._lock:
+            self._refresh()
+            _, _, indexed_upto, dead_bytes = self._header()
+            return dead_bytes / indexed_upto if indexed_upto else 0.0
+
+    def compact(self) -> None:
+        """
+        Rewrite live records into a new generation and switch to it.
+
+        Keys keep the order in which they were first written, so items()
+        (and the engines matching keys in that order) are unaffected.
+        """
+        with self._locked():
+            self._refresh()
+            self._catch_up()
+
+            count = self._header()[1]
+            capacity = self.initial_capacity
+            while count + 1 > capacity * MAX_LOAD:
+                capacity *= 2
+
+            old_gen = self._gen
+            new_gen = old_gen + 1
+            log_fd = os.open(self._file(new_gen, "log"), os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            idx_fd, index = self._create_index(self._file(new_gen, "idx"), capacity)
+            first_written = dict.fromkeys(key for _, key, _ in self._scan(0, self._header()[2]))
+            keys = []
+            try:
+                position = 0
+                for key in first_written:
+                    key_hash = _key_hash(key)
+                    offset = self._find(key, key_hash)[1]
+                    length = self._read_record(offset)[2]
+                    os.write(log_fd, self._log_view(offset + length)[offset:offset + length])
+                    self._place(index, capacity, key_hash, position)
+                    keys.append(key.decode("utf-8"))
+                    position += length
+                INDEX_HEADER.pack_into(index, 0, INDEX_MAGIC, INDEX_VERSION, 0,
+                                       capacity, count, position, 0)
+                index.flush()
+                os.fsync(log_fd)
+            finally:
+                index.close()
+                os.close(idx_fd)
+                os.close(log_fd)
+            # Every key is live in the new generation, so its key index is complete
+            write_mapped_index(self._file(new_gen, "keys"), keys, position)
+
+            self._write_current(new_gen)
+            self._idx_map[OBSOLETE_OFFSET] = 1
+            self._open_current()
+            for suffix in ("log", "idx", "keys"):
+                self._file(old_gen, suffix).unlink(missing_ok=True)
+
+    def start_compactor(self, interval: float = 60.0, min_dead_ratio: float = 0.5,
+                        key_index_lag: int = 1 << 20) -> None:
+        """
+        Compact in a background thread whenever enough of the log is garbage.
+
+        Args:
+            interval: Seconds between checks
+            min_dead_ratio: Dead-byte fraction that triggers compaction
+            key_index_lag: Uncovered log bytes that trigger rewriting the
+                persisted key index (when not compacting)
+        """
+        if self._compactor is not None:
+            return
+
+        def run():
+            while not self._compactor_stop.wait(interval):
+                if self.dead_ratio() >= min_dead_ratio:
+                    self.compact()
+                else:
+                    self.save_key_index(key_index_lag)
+
+        self._compactor_stop.clear()
+        self._compactor = threading.Thread(target=run, name="knowledge-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_compactor(self) -> None:
+        """Stop the background compactor, if running."""
+        if self._compactor is not None:
+            self._compactor_stop.set()
+            self._compactor.join()
+            self._compactor = None
@@ -0,0 +1,217 @@
+# ============================================================================
+# bot/core/literal_prefilter.py
+# ============================================================================
+r"""
+Literal prefilter for intent patterns.
+
+required_literals() reads a regex's parse tree and returns literals of
+which at least one occurs in any text the regex matches (\bwhat\s+is\b
+-> {"what"}, \b(weather|forecast)\b -> {"weather", "forecast"}).
+LiteralPrefilter finds which of many such literals occur in a text in one
+pass, so IntentMatcher only runs the regexes that can possibly match.
+"""
+
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse    # Python 3.11+
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+# Literal sets above this size are scanned with the Aho-Corasick automaton;
+# smaller ones with one substring search per literal, which runs in C and
+# wins below ~50 literals for chat-sized messages (bench_intent_matcher).
+DIRECT_SEARCH_MAX = 48
+
+# Character classes of at most this many plain characters count as literals
+MAX_CLASS_LITERALS = 4
+
+_LITERAL = sre_constants.LITERAL
+_AT = sre_constants.AT
+_IN = sre_constants.IN
+_BRANCH = sre_constants.BRANCH
+_SUBPATTERN = sre_constants.SUBPATTERN
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+_REPEATS.update(getattr(sre_constants, name) for name in ("POSSESSIVE_REPEAT",) if hasattr(sre_constants, name))
+_ATOMIC_GROUP = getattr(sre_constants, "ATOMIC_GROUP", None)
+_IGNORECASE = sre_constants.SRE_FLAG_IGNORECASE
+
+Cover = FrozenSet[str]
+
+
+def _better(a: Optional[Cover], b: Optional[Cover]) -> Optional[Cover]:
+    """Return the more selective cover: longest shortest literal, then fewest literals."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    key_a = (min(map(len, a)), -len(a))
+    key_b = (min(map(len, b)), -len(b))
+    return a if key_a >= key_b else b
+
+
+def _cover(items) -> Optional[Cover]:
+    """
+    Return literals of which one occurs in every match of a parsed sequence.
+
+    Args:
+        items: sre_parse SubPattern (or list of (opcode, argument))
+
+    Returns:
+        Frozen set of literals, or None if no literal is required
+    """
+    best: Optional[Cover] = None
+    run: List[str] = []
+
+    def end_run() -> None:
+        nonlocal best
+        if run:
+            best = _better(best, frozenset(["".join(run)]))
+            run.clear()
+
+    for op, av in items:
+        if op == _LITERAL:
+            run.append(chr(av))
+            continue
+        if op == _AT:
+            continue    # zero width: literals on both sides stay adjacent
+        end_run()
+
+        candidate: Optional[Cover] = None
+        if op == _SUBPATTERN:
+            _, add_flags, _, sub = av
+            if not add_flags & _IGNORECASE:
+                candidate = _cover(sub)
+        elif op == _ATOMIC_GROUP:
+            candidate = _cover(av)
+        elif op == _BRANCH:
+            literals = set()
+            for branch in av[1]:
+                branch_cover = _cover(branch)
+                if branch_cover is None:
+                    literals = None
+                    break
+                literals |= branch_cover
+            candidate = frozenset(literals) if literals else None
+        elif op in _REPEATS:
+            low, _, sub = av
+            if low >= 1:
+                candidate = _cover(sub)
+        elif op == _IN:
+            if len(av) <= MAX_CLASS_LITERALS and all(kind == _LITERAL for kind, _ in av):
+                candidate = frozenset(chr(code) for _, code in av)
+        best = _better(best, candidate)
+
+    end_run()
+    return best
+
+
+def required_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Return literals of which at least one occurs in every match of pattern.
+
+    Case-insensitive patterns (and case-insensitive groups) never qualify,
+    since Unicode case folding matches characters the literal does not
+    contain.
+
+    Args:
+        pattern: Regex pattern
+
+    Returns:
+        Frozen set of literals, or None if the pattern cannot be prefiltered
+    """
+    parsed = sre_parse.parse(pattern)
+    if parsed.state.flags & _IGNORECASE:
+        return None
+    return _cover(parsed)
+
+
+class LiteralPrefilter:
+    """
+    Multi-literal matcher: which of a set of literals occur in a text.
+
+    Each literal carries a bitmask; scan() returns the OR of the masks of
+    all literals occurring in the text. Large literal sets are compiled
+    into an Aho-Corasick automaton (trie with failure links, flattened
+    into a DFA so every character is one dict lookup) and scanned in a
+    single pass whatever their number; small sets use one C substring
+    search per literal, which is faster until DIRECT_SEARCH_MAX.
+    """
+
+    def __init__(self, literals: Dict[str, int], direct_search_max: int = DIRECT_SEARCH_MAX):
+        """
+        Build the matcher.
+
+        Args:
+            literals: Literal -> bitmask
+            direct_search_max: Largest literal set searched literal by literal
+        """
+        self.literals = {literal: mask for literal, mask in literals.items() if literal}
+        self._direct: Optional[List[Tuple[str, int]]] = None
+        self._delta: List[Dict[str, int]] = []
+        self._output: List[int] = []
+        if len(self.literals) <= direct_search_max:
+            self._direct = list(self.literals.items())
+        else:
+            self._build()
+
+    def _build(self) -> None:
+        """Build the trie, its failure links and the DFA transition table."""
+        goto: List[Dict[str, int]] = [{}]
+        output = [0]
+        for literal, mask in self.literals.items():
+            state = 0
+            for char in literal:
+                following = goto[state].get(char)
+                if following is None:
+                    following = goto[state][char] = len(goto)
+                    goto.append({})
+                    output.append(0)
+                state = following
+            output[state] |= mask
+
+        # Breadth-first: a state's failure target is always finished first
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            output[state] |= output[fail[state]]
+            # Missing transitions fall back to the failure state's
+            transitions = dict(delta[fail[state]])
+            for char, following in goto[state].items():
+                fail[following] = delta[fail[state]].get(char, 0) if state else 0
+                transitions[char] = following
+                queue.append(following)
+            delta[state] = transitions
+
+        self._delta = delta
+        self._output = output
+
+    def scan(self, text: str) -> int:
+        """
+        Return the OR of the masks of every literal occurring in text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Bitmask (0 if no literal occurs)
+        """
+        found = 0
+        if self._direct is not None:
+            for literal, mask in self._direct:
+                if literal in text:
+                    found |= mask
+            return found
+
+        delta = self._delta
+        output = self._output
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
@@ -0,0 +1,389 @@
+# ============================================================================
+# bot/core/outbound.py
+# ============================================================================
+"""Queued outbound delivery with batching, retries and backpressure."""
+
+import asyncio
+import bisect
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Mapping, NamedTuple, Optional, Tuple
+from .async_support import BackgroundLoop
+from .base_channel import BaseChannel
+from .instrumentation import Instrumentation
+
+
+class BackpressureError(Exception):
+    """Raised when a channel's outbound queue is full."""
+
+    def __init__(self, channel: str, depth: int):
+        super().__init__(f"Outbound queue for '{channel}' is full ({depth} messages)")
+        self.channel = channel
+        self.depth = depth
+
+
+class OutboundMessage(NamedTuple):
+    """A message waiting for delivery."""
+
+    channel: str
+    recipient_id: str
+    text: str
+    enqueued_at: float
+    attempts: int = 0
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        """
+        Initialize policy.
+
+        Args:
+            max_attempts: Delivery attempts before a message is dead-lettered
+            base_delay: Upper bound of the first retry delay in seconds
+            max_delay: Cap on any retry delay in seconds
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempts: int, error: BaseException) -> float:
+        """
+        Return seconds to wait before the next attempt.
+
+        A server-provided retry_after (e.g. Telegram 429) is honoured as
+        a lower bound.
+
+        Args:
+            attempts: Attempts made so far
+            error: Error of the last attempt
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempts - 1)))
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def should_retry(self, attempts: int, error: BaseException) -> bool:
+        """
+        Check if a failed message gets another attempt.
+
+        Client errors (HTTP 4xx other than 429) are permanent.
+
+        Args:
+            attempts: Attempts made so far
+            error: Error of the last attempt
+        """
+        status = getattr(error, "status", None)
+        if isinstance(status, int) and 400 <= status < 500 and status != 429:
+            return False
+        return attempts < self.max_attempts
+
+
+class DeadLetterStore:
+    """Bounded in-memory store of messages that could not be delivered."""
+
+    def __init__(self, max_size: int = 10_000):
+        """
+        Initialize store.
+
+        Args:
+            max_size: Entries kept; the oldest are dropped beyond this
+        """
+        self._entries: Deque[Tuple[OutboundMessage, str]] = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+
+    def add(self, message: OutboundMessage, error: BaseException) -> None:
+        """Record an undeliverable message and the error that stopped it."""
+        with self._lock:
+            self._entries.append((message, f"{type(error).__name__}: {error}"))
+
+    def items(self) -> List[Tuple[OutboundMessage, str]]:
+        """Return (message, error) entries, oldest first."""
+        with self._lock:
+            return list(self._entries)
+
+    def drain(self) -> List[Tuple[OutboundMessage, str]]:
+        """Remove and return all entries (e.g. to redeliver them)."""
+        with self._lock:
+            entries = list(self._entries)
+            self._entries.clear()
+            return entries
+
+    def __len__(self) -> int:
+        """Return number of stored entries."""
+        return len(self._entries)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds)."""
+
+    BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        """Initialize empty histogram."""
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add one observation."""
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+    def percentile(self, q: float) -> float:
+        """Return the bucket upper bound containing quantile q (0..1)."""
+        if not self.total:
+            return 0.0
+        rank = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return float(self.BOUNDS_MS[i]) if i < len(self.BOUNDS_MS) else float("inf")
+        return float("inf")
+
+
+class _ChannelQueue:
+    """Queue, worker state and counters for one channel."""
+
+    def __init__(self):
+        self.queue: Deque[OutboundMessage] = deque()
+        # Retries that are due, sent ahead of the queue
+        self.due: Deque[OutboundMessage] = deque()
+        # Recipient with a message being retried -> later messages held back
+        self.held: Dict[str, Deque[OutboundMessage]] = {}
+        self.holding = 0
+        self.retrying = 0
+        self.in_flight = 0
+        self.running = False
+        self.sent = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.rejected = 0
+        self.latency = LatencyHistogram()
+        self.send_time = LatencyHistogram()
+
+    @property
+    def backlog(self) -> int:
+        """Messages not yet handed to the channel."""
+        return len(self.queue) + len(self.due) + self.holding + self.retrying
+
+
+class OutboundDispatcher:
+    """
+    Delivers outgoing messages off the caller's thread.
+
+    Each channel gets a bounded queue drained by a worker task on a
+    background event loop. Workers hand the channel up to batch_size
+    messages at a time through send_batch_async(); failed messages are
+    retried with jittered exponential backoff and finally moved to the
+    dead-letter store. While a message waits for a retry, later messages
+    to the same recipient are held back until it is delivered or
+    dead-lettered, so queued messages never overtake a retry (order
+    within one batch is up to the channel's send_batch_async()).
+    enqueue() never blocks: it raises BackpressureError when the
+    channel's queue is full.
+    """
+
+    def __init__(self, channels: Mapping[str, BaseChannel], max_queue: int = 1000,
+                 batch_size: int = 50, retry: Optional[RetryPolicy] = None,
+                 dead_letters: Optional[DeadLetterStore] = None,
+                 loop: Optional[BackgroundLoop] = None, clock: Callable[[], float] = time.monotonic,
+                 instrumentation: Optional[Instrumentation] = None):
+        """
+        Initialize dispatcher.
+
+        Args:
+            channels: Channel name -> channel (looked up at send time)
+            max_queue: Messages a channel may have waiting before enqueue() fails
+            batch_size: Maximum messages handed to a channel per call
+            retry: Retry policy (defaults to RetryPolicy())
+            dead_letters: Store for undeliverable messages
+            loop: Background loop to run workers on
+            clock: Monotonic time source in seconds
+            instrumentation: Receives a "send" span per delivered batch
+        """
+        self.channels = channels
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.retry = retry or RetryPolicy()
+        self.dead_letters = dead_letters if dead_letters is not None else DeadLetterStore()
+        self.clock = clock
+        self.instrumentation = instrumentation
+
+        self._loop = loop or BackgroundLoop("outbound-delivery")
+        self._queues: Dict[str, _ChannelQueue] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def has_capacity(self, channel: str) -> bool:
+        """Check if channel can accept another message right now."""
+        state = self._queues.get(channel)
+        return state is None or state.backlog < self.max_queue
+
+    def depth(self, channel: str) -> int:
+        """Return number of messages waiting for channel (queued or retrying)."""
+        state = self._queues.get(channel)
+        return state.backlog if state is not None else 0
+
+    def enqueue(self, channel: str, recipient_id: str, text: str) -> None:
+        """
+        Queue a message for delivery. Safe to call from any thread.
+
+        Args:
+            channel: Channel name
+            recipient_id: Recipient identifier
+            text: Message text
+
+        Raises:
+            KeyError: If the channel is unknown
+            BackpressureError: If the channel's queue is full
+        """
+        if channel not in self.channels:
+            raise KeyError(channel)
+
+        with self._lock:
+            state = self._queues.get(channel)
+            if state is None:
+                state = self._queues[channel] = _ChannelQueue()
+            if state.backlog >= self.max_queue:
+                state.rejected += 1
+                raise BackpressureError(channel, state.backlog)
+            state.queue.append(OutboundMessage(channel, recipient_id, text, self.clock()))
+            start = not state.running
+            state.running = True
+
+        if start:
+            self._loop.loop.call_soon_threadsafe(self._start_worker, channel, state)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queue is empty and no send is in flight.
+
+        Args:
+            timeout: Seconds to wait, None for no limit
+
+        Returns:
+            True if all messages were delivered or dead-lettered
+        """
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: all(not s.backlog and not s.in_flight for s in self._queues.values()),
+                timeout)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-channel queue depth, counters and latency percentiles."""
+        with self._lock:
+            return {
+                name: {
+                    "depth": state.backlog,
+                    "in_flight": state.in_flight,
+                    "sent": state.sent,
+                    "retried": state.retried,
+                    "dead_lettered": state.dead_lettered,
+                    "rejected": state.rejected,
+                    "latency_p50_ms": state.latency.percentile(0.5),
+                    "latency_p99_ms": state.latency.percentile(0.99),
+                    "send_p50_ms": state.send_time.percentile(0.5),
+                    "send_p99_ms": state.send_time.percentile(0.99),
+                }
+                for name, state in self._queues.items()
+            }
+
+    def _start_worker(self, channel: str, state: _ChannelQueue) -> None:
+        """Create the channel's worker task (on the background loop)."""
+        asyncio.get_running_loop().create_task(self._worker(channel, state))
+
+    async def _worker(self, channel: str, state: _ChannelQueue) -> None:
+        """Drain one channel's queue in batches, exiting once it is empty."""
+        while True:
+            with self._lock:
+                batch = [state.due.popleft() for _ in range(min(self.batch_size, len(state.due)))]
+                retries = len(batch)
+                queue, held = state.queue, state.held
+                while queue and len(batch) < self.batch_size:
+                    message = queue.popleft()
+                    waiting = held.get(message.recipient_id)
+                    if waiting is not None:
+                        waiting.append(message)
+                        state.holding += 1
+                    else:
+                        batch.append(message)
+                state.in_flight = len(batch)
+                if not batch:
+                    state.running = False
+                    self._idle.notify_all()
+                    return
+
+            started = self.clock()
+            try:
+                errors = await self.channels[channel].send_batch_async(
+                    [(message.recipient_id, message.text) for message in batch])
+            except Exception as e:
+                errors = [e] * len(batch)
+            finished = self.clock()
+
+            hooks = self.instrumentation
+            if hooks is not None and hooks.sinks:
+                hooks.span("send", finished - started, (("channel", channel),))
+
+            with self._lock:
+                state.in_flight = 0
+                state.send_time.record(finished - started)
+                for position, (message, error) in enumerate(zip(batch, errors)):
+                    retried = position < retries
+                    if error is None:
+                        state.sent += 1
+                        state.latency.record(finished - message.enqueued_at)
+                        if retried:
+                            self._release(state, message.recipient_id)
+                    else:
+                        self._failed(state, message._replace(attempts=message.attempts + 1), error, retried)
+
+    def _failed(self, state: _ChannelQueue, message: OutboundMessage, error: BaseException,
+                retried: bool) -> None:
+        """Schedule a retry or dead-letter a message (lock held)."""
+        recipient = message.recipient_id
+        if not self.retry.should_retry(message.attempts, error):
+            state.dead_lettered += 1
+            self.dead_letters.add(message, error)
+            if retried:
+                self._release(state, recipient)
+            return
+
+        state.retried += 1
+        waiting = state.held.get(recipient)
+        if waiting is not None and not retried:
+            # Sent in the same batch after the recipient's failed message:
+            # it goes out again once that one is through
+            waiting.append(message)
+            state.holding += 1
+            return
+
+        state.held.setdefault(recipient, deque())
+        state.retrying += 1
+        asyncio.get_running_loop().call_later(
+            self.retry.delay(message.attempts, error), self._requeue, state, message)
+
+    def _release(self, state: _ChannelQueue, recipient: str) -> None:
+        """Return messages held behind a finished retry to the queue front (lock held)."""
+        waiting = state.held.pop(recipient, None)
+        if waiting:
+            state.holding -= len(waiting)
+            state.queue.extendleft(reversed(waiting))
+
+    def _requeue(self, state: _ChannelQueue, message: OutboundMessage) -> None:
+        """Queue a message due for retry ahead of the others (on the background loop)."""
+        with self._lock:
+            state.retrying -= 1
+            state.due.append(message)
+            start = not state.running
+            state.running = True
+        if start:
+            self._start_worker(message.channel, state)
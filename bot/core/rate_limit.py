@@ -0,0 +1,105 @@
+# ============================================================================
+# bot/core/rate_limit.py
+# ============================================================================
+"""Token-bucket rate limiting for outbound sends."""
+
+import time
+from typing import Callable, Dict, Hashable
+
+
+class TokenBucket:
+    """
+    Token bucket implemented as virtual scheduling (GCRA).
+
+    Instead of polling for tokens, reserve() books the earliest time a
+    token is available and returns it, so callers can schedule the send
+    for that moment. Reservations are granted in call order.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Initialize bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size
+        """
+        self.interval = 1.0 / rate
+        self.tolerance = (capacity - 1) * self.interval
+        self._next = float("-inf")
+
+    def earliest(self, now: float) -> float:
+        """Return the earliest time a token could be taken."""
+        return max(now, self._next - self.tolerance)
+
+    def commit(self, at: float) -> None:
+        """Take a token at time `at` (not before earliest())."""
+        self._next = max(self._next, at) + self.interval
+
+    def reserve(self, now: float) -> float:
+        """
+        Take the next available token.
+
+        Args:
+            now: Current clock value
+
+        Returns:
+            Time at which the token may be used
+        """
+        at = self.earliest(now)
+        self.commit(at)
+        return at
+
+    def idle(self, now: float) -> bool:
+        """Check if the bucket is full again (safe to forget)."""
+        return self._next - self.tolerance <= now - self.interval
+
+
+class RateLimiter:
+    """
+    Global plus per-key token buckets (e.g. Telegram's global and per-chat
+    limits). A send is scheduled at the earliest time both buckets allow.
+    """
+
+    # Per-key buckets kept before idle ones are pruned
+    MAX_IDLE_KEYS = 10_000
+
+    def __init__(self, global_rate: float, per_key_rate: float, global_burst: float = 1.0,
+                 per_key_burst: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize limiter.
+
+        Args:
+            global_rate: Sends per second across all keys
+            per_key_rate: Sends per second for one key
+            global_burst: Global bucket capacity
+            per_key_burst: Per-key bucket capacity
+            clock: Monotonic time source in seconds
+        """
+        self.clock = clock
+        self.per_key_rate = per_key_rate
+        self.per_key_burst = per_key_burst
+        self._global = TokenBucket(global_rate, global_burst)
+        self._keys: Dict[Hashable, TokenBucket] = {}
+
+    def reserve(self, key: Hashable) -> float:
+        """
+        Book a send slot for key.
+
+        Args:
+            key: Rate-limit key (chat ID)
+
+        Returns:
+            Seconds to wait before sending (0.0 if allowed now)
+        """
+        now = self.clock()
+        bucket = self._keys.get(key)
+        if bucket is None:
+            if len(self._keys) >= self.MAX_IDLE_KEYS:
+                self._keys = {k: b for k, b in self._keys.items() if not b.idle(now)}
+            bucket = self._keys[key] = TokenBucket(self.per_key_rate, self.per_key_burst)
+
+        at = max(bucket.earliest(now), self._global.earliest(now))
+        bucket.commit(at)
+        self._global.commit(at)
+        return at - now
@@ -0,0 +1,458 @@
+# ============================================================================
+# bot/core/registry.py
+# ============================================================================
+"""Lazy discovery and loading of channels and skills."""
+
+import importlib
+import inspect
+import json
+import threading
+from pathlib import Path
+from typing import (Any, Callable, Dict, Iterator, List, Mapping, MutableMapping, NamedTuple,
+                    Optional, Sequence, Tuple, Union)
+from .action_router import ActionRouter
+from .base_action import BaseAction
+from .base_channel import BaseChannel
+from .intent_engine import EntityExtractor, Extractor, IntentEngine
+from .tokenizer import Message
+
+# A plugin is named by a "package.module:Attribute" string or given directly
+Target = Union[str, Callable[..., Any]]
+
+
+def import_target(target: str) -> Any:
+    """
+    Import the object named by a "package.module:Attribute" string.
+
+    Args:
+        target: Module path, optionally followed by ":" and a dotted attribute
+
+    Returns:
+        The module or attribute
+    """
+    module_name, _, attribute = target.partition(":")
+    loaded = importlib.import_module(module_name)
+    for part in attribute.split(".") if attribute else ():
+        loaded = getattr(loaded, part)
+    return loaded
+
+
+class PluginRegistry:
+    """
+    Named plugins imported only when first used.
+
+    register() calls and manifests override built-ins; entry points of
+    installed packages in `group` only add names not known otherwise.
+    Scanning entry points costs tens of milliseconds, so it only happens
+    on a lookup miss or when names(discover=True) is asked for.
+    """
+
+    def __init__(self, group: str, builtins: Optional[Dict[str, Target]] = None):
+        """
+        Initialize registry.
+
+        Args:
+            group: Entry point group, e.g. "bot.channels"
+            builtins: Name -> target for plugins shipped with the bot
+        """
+        self.group = group
+        self._targets: Dict[str, Target] = dict(builtins or {})
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._loaded: Dict[str, Callable[..., Any]] = {}
+        self._scanned = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: Target, **metadata: Any) -> None:
+        """
+        Register (or replace) a plugin.
+
+        Args:
+            name: Plugin name
+            target: "module:attribute" string, or the class/factory itself
+            **metadata: Facts known without importing (e.g. intents=[...])
+        """
+        self._targets[name] = target
+        self._metadata[name] = metadata
+        self._loaded.pop(name, None)
+
+    def names(self, discover: bool = False) -> List[str]:
+        """
+        Return registered plugin names.
+
+        Args:
+            discover: Also scan installed packages' entry points
+        """
+        if discover:
+            self._scan_entry_points()
+        return list(self._targets)
+
+    def metadata(self, name: str) -> Dict[str, Any]:
+        """Return metadata registered for name (empty if none)."""
+        return self._metadata.get(name, {})
+
+    def __contains__(self, name: str) -> bool:
+        """Check if name is known, scanning entry points on a miss."""
+        if name not in self._targets:
+            self._scan_entry_points()
+        return name in self._targets
+
+    def load(self, name: str) -> Callable[..., Any]:
+        """
+        Import and return the plugin class/factory.
+
+        Args:
+            name: Plugin name
+
+        Returns:
+            The class or factory
+
+        Raises:
+            KeyError: If no plugin has that name
+            ImportError: If its module cannot be imported
+        """
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+        if name not in self:
+            raise KeyError(f"No {self.group} plugin named '{name}'")
+
+        with self._lock:
+            target = self._targets[name]
+            loaded = import_target(target) if isinstance(target, str) else target
+            self._loaded[name] = loaded
+        return loaded
+
+    def check_arguments(self, name: str, kwargs: Mapping[str, Any]) -> None:
+        """
+        Check that a plugin accepts the given keyword arguments.
+
+        The plugin is imported (not called) and its signature is checked.
+
+        Args:
+            name: Plugin name
+            kwargs: Keyword arguments it would be created with
+
+        Raises:
+            KeyError: If no plugin has that name
+            TypeError: If an argument is unknown or a required one is missing
+        """
+        inspect.signature(self.load(name)).bind(**kwargs)
+
+    def create(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        """Load the plugin and call it with the given arguments."""
+        return self.load(name)(*args, **kwargs)
+
+    def _scan_entry_points(self) -> None:
+        """Add entry points of installed packages (once)."""
+        if self._scanned:
+            return
+        self._scanned = True
+        from importlib.metadata import entry_points
+        for entry in entry_points(group=self.group):
+            self._targets.setdefault(entry.name, entry.value)
+
+
+CHANNELS = PluginRegistry("bot.channels", {
+    "telegram": "bot.channels.telegram_channel:TelegramChannel",
+    "whatsapp": "bot.channels.whatsapp_channel:WhatsAppChannel",
+    "mattermost": "bot.channels.mattermost_channel:MattermostChannel",
+    "internal": "bot.channels.internal_channel:InternalChannel",
+})
+
+SKILLS = PluginRegistry("bot.skills")
+
+# Skills shipped with the bot, declared in a manifest so that starting the
+# bot imports none of them (registered below, once load_manifest exists)
+BUILTIN_SKILLS = Path(__file__).resolve().parent.parent / "skills" / "skills.json"
+
+
+def load_manifest(path: str) -> None:
+    """
+    Register channels and skills listed in a JSON manifest.
+
+    Format (entries are a target string or an object with "entry" plus
+    metadata). A skill entry listing its "intents" is not imported until
+    first used; the rest of its metadata (see SkillSpec) is read from the
+    manifest, with extractors given as "module:function" targets:
+
+        {"channels": {"slack": "mybot.slack:SlackChannel"},
+         "skills": {"stocks": {"entry": "mybot.stocks:StockAction",
+                               "intents": ["get_stock_price"],
+                               "patterns": {"get_stock_price": ["\\bstock\\b"]},
+                               "required": ["symbol"],
+                               "extractors": {"symbol": "mybot.stocks:extract_symbol"}}}}
+
+    Args:
+        path: Path to the manifest file
+    """
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+
+    for registry, section in ((CHANNELS, "channels"), (SKILLS, "skills")):
+        for name, entry in manifest.get(section, {}).items():
+            if isinstance(entry, str):
+                registry.register(name, entry)
+            else:
+                entry = dict(entry)
+                registry.register(name, entry.pop("entry"), **entry)
+
+
+load_manifest(str(BUILTIN_SKILLS))
+
+
+class LazyAction(BaseAction):
+    """
+    Stands in for a registered skill until it is first used.
+
+    With intents known from metadata the router dispatches to it without
+    importing anything; the skill is built on the first call.
+    """
+
+    def __init__(self, registry: PluginRegistry, name: str, intents: Sequence[str] = (),
+                 required: Optional[Sequence[str]] = None):
+        """
+        Initialize proxy.
+
+        Args:
+            registry: Registry the skill comes from
+            name: Skill name
+            intents: Intents the skill declares, if known without importing
+            required: Required entities, if known without building the skill
+        """
+        self.registry = registry
+        self.name = name
+        self.intents = tuple(intents)
+        self._required = list(required) if required is not None else None
+        self._action: Optional[BaseAction] = None
+
+    @property
+    def action(self) -> BaseAction:
+        """Return the real skill, building it on first access."""
+        if self._action is None:
+            self._action = self.registry.create(self.name)
+        return self._action
+
+    def can_handle(self, intent: str) -> bool:
+        """Check declared intents, or ask the real skill if none were declared."""
+        if self.intents:
+            return intent in self.intents
+        return self.action.can_handle(intent)
+
+    def required_entities(self) -> List[str]:
+        """Return the declared required entities, or ask the real skill."""
+        if self._required is not None:
+            return list(self._required)
+        return self.action.required_entities()
+
+    def execute(self, params: Dict[str, Any]) -> str:
+        """Run the real skill."""
+        return self.action.execute(params)
+
+    async def execute_async(self, params: Dict[str, Any]) -> str:
+        """Run the real skill from asyncio."""
+        return await self.action.execute_async(params)
+
+
+class SkillSpec(NamedTuple):
+    """Everything the bot needs to know about a skill before running it."""
+
+    name: str
+    intents: Tuple[str, ...]
+    patterns: Mapping[str, Sequence[str]]
+    required: Optional[Tuple[str, ...]]  # None: ask required_entities()
+    extractors: Mapping[str, Extractor]
+    prompts: Mapping[str, str]
+    priority: int
+
+
+class _DeferredExtractor(EntityExtractor):
+    """Extractor that imports its "module:attribute" target on first use."""
+
+    def __init__(self, target: str):
+        """
+        Initialize extractor.
+
+        Args:
+            target: "module:attribute" naming an Extractor
+        """
+        self.target = target
+        self._extractor: Optional[Extractor] = None
+
+    @property
+    def extractor(self) -> Extractor:
+        """Return the imported extractor."""
+        if self._extractor is None:
+            self._extractor = import_target(self.target)
+        return self._extractor
+
+    @property
+    def triggers(self) -> Tuple[str, ...]:  # type: ignore[override]
+        """Return the target's trigger tokens (none for a plain extractor)."""
+        extractor = self.extractor
+        return extractor.triggers if isinstance(extractor, EntityExtractor) else ()
+
+    def at(self, message: Message, index: int) -> Optional[str]:
+        """Delegate to the target's at()."""
+        return self.extractor.at(message, index)
+
+    def rest(self, message: Message) -> Optional[str]:
+        """Delegate to the target's rest(), or call a plain extractor with the text."""
+        extractor = self.extractor
+        if isinstance(extractor, EntityExtractor):
+            return extractor.rest(message)
+        return extractor(message.text)
+
+
+class SkillRegistry:
+    """
+    Compiles declared skill metadata into the bot in one pass at startup.
+
+    For every skill in the plugin registry, its intents, trigger patterns,
+    extractors and prompts go into the IntentEngine and a LazyAction goes
+    into the ActionRouter's dispatch table. Metadata comes from the
+    BaseAction subclass attributes, or from the registry entry (e.g. a
+    manifest) when that lists intents, in which case the skill module is
+    not imported until the skill is first used.
+
+    Installing a skill does a constant amount of work per pattern and
+    entity; nothing is compiled per message.
+    """
+
+    def __init__(self, plugins: PluginRegistry = SKILLS):
+        """
+        Initialize registry.
+
+        Args:
+            plugins: Plugin registry to read skills from
+        """
+        self.plugins = plugins
+
+    def spec(self, name: str) -> SkillSpec:
+        """
+        Collect a skill's declared metadata.
+
+        Args:
+            name: Skill name
+
+        Returns:
+            The skill's spec
+        """
+        metadata = self.plugins.metadata(name)
+        if "intents" in metadata:
+            required = metadata.get("required")
+            extractors = {entity: _DeferredExtractor(target) if isinstance(target, str) else target
+                          for entity, target in metadata.get("extractors", {}).items()}
+            return SkillSpec(name, tuple(metadata["intents"]), metadata.get("patterns", {}),
+                             tuple(required) if required is not None else None, extractors,
+                             metadata.get("prompts", {}), metadata.get("priority", 0))
+
+        cls = self.plugins.load(name)
+        # Skills that compute required_entities() themselves are asked at first use
+        declared = getattr(cls, "required_entities", None) is BaseAction.required_entities
+        return SkillSpec(name, tuple(cls.intents), cls.patterns,
+                         tuple(cls.required) if declared else None, cls.extractors,
+                         cls.prompts, cls.priority)
+
+    def install(self, intent_engine: IntentEngine, router: ActionRouter) -> List[str]:
+        """
+        Register every skill with the intent engine and router.
+
+        Args:
+            intent_engine: Engine receiving patterns, extractors and prompts
+            router: Router receiving the skills
+
+        Returns:
+            Names of the installed skills
+        """
+        names = self.plugins.names()
+        for name in names:
+            spec = self.spec(name)
+            for intent, patterns in spec.patterns.items():
+                for pattern in patterns:
+                    intent_engine.register_pattern(intent, pattern, spec.priority)
+            for intent in spec.intents:
+                for entity, extractor in spec.extractors.items():
+                    intent_engine.register_extractor(intent, entity, extractor)
+                for entity, prompt in spec.prompts.items():
+                    intent_engine.register_prompt(intent, entity, prompt)
+            router.register(LazyAction(self.plugins, name, spec.intents, spec.required))
+        return names
+
+
+class ChannelMap(MutableMapping):
+    """
+    Channel name -> channel, building each configured channel on first access.
+
+    Configured names are known up front (membership tests and keys() do
+    not build anything). configure() imports the channel class to check
+    its options; the channel is constructed with them on first lookup.
+    """
+
+    def __init__(self, registry: PluginRegistry, configs: Dict[str, Dict[str, Any]]):
+        """
+        Initialize map.
+
+        Args:
+            registry: Channel registry
+            configs: Channel name -> constructor keyword arguments
+        """
+        self.registry = registry
+        self._configs = dict(configs)
+        self._channels: Dict[str, BaseChannel] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> BaseChannel:
+        channel = self._channels.get(name)
+        if channel is not None:
+            return channel
+        with self._lock:
+            if name in self._channels:
+                return self._channels[name]
+            config = self._configs[name]
+            try:
+                channel = self._channels[name] = self.registry.create(name, **config)
+            except Exception as e:
+                # A broken channel should not take the rest of the bot down
+                del self._configs[name]
+                print(f"⚠ Could not load channel {name}: {e}")
+                raise KeyError(name) from e
+            return channel
+
+    def configure(self, name: str, options: Dict[str, Any]) -> None:
+        """
+        Set the constructor arguments for a channel (built on first use).
+
+        Args:
+            name: Registered channel name
+            options: Keyword arguments for the channel class
+
+        Raises:
+            TypeError: If the channel does not accept the options
+        """
+        self.registry.check_arguments(name, options)
+        with self._lock:
+            self._configs[name] = dict(options)
+            self._channels.pop(name, None)
+
+    def __setitem__(self, name: str, channel: BaseChannel) -> None:
+        with self._lock:
+            self._channels[name] = channel
+            self._configs.setdefault(name, {})
+
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            del self._configs[name]
+            self._channels.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._configs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._configs))
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def loaded(self) -> List[str]:
+        """Return names of channels built so far."""
+        return list(self._channels)
@@ -0,0 +1,473 @@
+# ============================================================================
+# bot/core/resp.py
+# ============================================================================
+"""
+Minimal Redis protocol (RESP2) client and an in-process stand-in server.
+
+RESPClient speaks to Redis or anything compatible (KeyDB, Valkey,
+Dragonfly...). Commands can be pipelined: send() writes a command and
+returns without waiting, and its reply is read before the reply of the
+next command that does wait, so a write costs no round trip. flush()
+raises if any of those commands failed.
+
+RESPServer implements the handful of commands the bot uses (GET, SET with
+EX/PX/KEEPTTL, DEL, EXISTS, PTTL, PING, DBSIZE, FLUSHDB) with expiring
+keys, for tests, benchmarks and single-host setups without Redis.
+
+Usage:
+    python -m bot.core.resp [--host 127.0.0.1] [--port 6379]
+"""
+
+import argparse
+import heapq
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+Arg = Union[bytes, str, int, float]
+
+# Unread pipelined replies drained before the socket buffers fill up
+MAX_UNREAD = 1024
+
+
+class RESPError(Exception):
+    """Error reply from the server (e.g. "ERR syntax error")."""
+
+
+def encode_command(args: Sequence[Arg]) -> bytes:
+    """
+    Encode one command as a RESP array of bulk strings.
+
+    Args:
+        args: Command name and arguments
+
+    Returns:
+        Wire bytes
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def read_reply(stream: BinaryIO) -> Any:
+    """
+    Read one RESP reply.
+
+    Error replies are returned (not raised) as RESPError instances, so a
+    failed command in a pipeline does not desynchronize the ones after it.
+
+    Args:
+        stream: Buffered binary stream positioned at a reply
+
+    Returns:
+        bytes, int, None, list, or RESPError
+
+    Raises:
+        ConnectionError: If the stream ends or the reply is malformed
+    """
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError("Connection closed by server")
+        return data[:-2]
+    if kind == b"+":
+        return body
+    if kind == b":":
+        return int(body)
+    if kind == b"-":
+        return RESPError(body.decode("utf-8", "replace"))
+    if kind == b"*":
+        length = int(body)
+        return None if length < 0 else [read_reply(stream) for _ in range(length)]
+    raise ConnectionError(f"Malformed reply: {line[:32]!r}")
+
+
+class RESPClient:
+    """
+    Blocking, thread-safe RESP client over one pipelined connection.
+
+    execute() and pipeline() wait for their replies; send() does not.
+    Replies are matched to commands in order, so the replies of earlier
+    send()s are read first. A dropped connection is reopened once per call;
+    commands sent with send() whose replies were not read yet may be lost
+    with it.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, timeout: float = 5.0):
+        """
+        Initialize client (connects on first use).
+
+        Args:
+            host: Server host
+            port: Server port
+            timeout: Socket timeout in seconds
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.stats = {"round_trips": 0, "commands": 0, "reconnects": 0, "failed": 0}
+
+        self._sock: Optional[socket.socket] = None
+        self._stream: Optional[BinaryIO] = None
+        self._unread = 0
+        # First error reply of a send() since the last flush(), and how many
+        self._failed: Optional[RESPError] = None
+        self._failed_count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 5.0) -> "RESPClient":
+        """
+        Create a client from a redis://host:port URL.
+
+        Args:
+            url: Server URL
+            timeout: Socket timeout in seconds
+
+        Returns:
+            RESPClient
+        """
+        address = url.split("://", 1)[-1].rstrip("/")
+        host, _, port = address.rpartition(":")
+        return cls(host or "127.0.0.1", int(port) if port else 6379, timeout)
+
+    def _connect(self) -> None:
+        """Open the connection (lock held)."""
+        self._sock = socket.create_connection((self.host, self.port), self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._stream = self._sock.makefile("rb")
+        self._unread = 0
+
+    def _disconnect(self) -> None:
+        """Close the connection (lock held)."""
+        if self._sock is not None:
+            try:
+                self._stream.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._stream = None
+        self._unread = 0
+
+    def _drain(self) -> None:
+        """Read the replies of earlier send()s (lock held)."""
+        while self._unread:
+            reply = read_reply(self._stream)
+            self._unread -= 1
+            if isinstance(reply, RESPError):
+                self.stats["failed"] += 1
+                self._failed_count += 1
+                if self._failed is None:
+                    self._failed = reply
+
+    def _call(self, payload: bytes, replies: int) -> List[Any]:
+        """Write payload and read `replies` replies, reconnecting once on failure."""
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(payload)
+                    if not replies:
+                        self._unread += 1
+                        if self._unread >= MAX_UNREAD:
+                            self._drain()
+                        return []
+                    self._drain()
+                    self.stats["round_trips"] += 1
+                    return [read_reply(self._stream) for _ in range(replies)]
+                except (ConnectionError, OSError):
+                    self._disconnect()
+                    if attempt:
+                        raise
+                    self.stats["reconnects"] += 1
+        return []
+
+    def execute(self, *args: Arg) -> Any:
+        """
+        Run one command and return its reply.
+
+        Raises:
+            RESPError: If the server answers with an error
+            ConnectionError: If the server cannot be reached
+        """
+        self.stats["commands"] += 1
+        reply = self._call(encode_command(args), 1)[0]
+        if isinstance(reply, RESPError):
+            raise reply
+        return reply
+
+    def send(self, *args: Arg) -> None:
+        """
+        Write one command without waiting for its reply.
+
+        An error reply is not raised here or by later commands; flush()
+        raises it.
+
+        Raises:
+            ConnectionError: If the server cannot be reached
+        """
+        self.stats["commands"] += 1
+        self._call(encode_command(args), 0)
+
+    def pipeline(self, commands: Iterable[Sequence[Arg]]) -> List[Any]:
+        """
+        Run several commands in one round trip.
+
+        Args:
+            commands: Commands (name and arguments each)
+
+        Returns:
+            Replies in order; failed commands yield RESPError instances
+
+        Raises:
+            ConnectionError: If the server cannot be reached
+        """
+        encoded = [encode_command(args) for args in commands]
+        if not encoded:
+            return []
+        self.stats["commands"] += len(encoded)
+        return self._call(b"".join(encoded), len(encoded))
+
+    def flush(self) -> None:
+        """
+        Wait until the server has processed every command sent so far.
+
+        Raises:
+            RESPError: If any command sent with send() since the last flush
+                failed (the first error, with the number of failures)
+            ConnectionError: If the connection was lost
+        """
+        with self._lock:
+            if self._unread:
+                self.stats["round_trips"] += 1
+                try:
+                    self._drain()
+                except (ConnectionError, OSError):
+                    self._disconnect()
+                    raise ConnectionError("Connection lost before pipelined commands were confirmed")
+            failed, count = self._failed, self._failed_count
+            self._failed, self._failed_count = None, 0
+        if failed is not None:
+            raise RESPError(f"{failed} ({count} pipelined command(s) failed)")
+
+    def close(self) -> None:
+        """Read outstanding replies and close the connection (call flush() first to check them)."""
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._drain()
+                except (ConnectionError, OSError):
+                    pass
+            self._disconnect()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serves one client connection of a RESPServer."""
+
+    def setup(self) -> None:
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self) -> None:
+        execute = self.server.execute
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if not isinstance(command, list) or not command:
+                self.wfile.write(b"-ERR Protocol error: expected an array of bulk strings\r\n")
+                return
+            self.wfile.write(execute(command))
+
+
+def _encode_reply(value: Any) -> bytes:
+    """Encode a reply value (bytes, int, None, list or RESPError)."""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RESPError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode_reply(item) for item in value)
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class RESPServer(socketserver.ThreadingTCPServer):
+    """
+    In-process stand-in for a Redis server.
+
+    Keys expire on access, and serve_forever() deletes expired keys between
+    requests from a heap of deadlines, so keys nobody reads again do not
+    pile up. Everything lives in one dict guarded by a lock. Not a
+    database: no persistence, no replication, a small command set.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, clock: Callable[[], float] = time.monotonic):
+        """
+        Bind the server (call start() or serve_forever() to accept clients).
+
+        Args:
+            host: Interface to listen on
+            port: TCP port, 0 for any free port
+            clock: Monotonic time source in seconds
+        """
+        super().__init__((host, port), _Handler)
+        self.clock = clock
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        # (deadline, key) per SET with a TTL; entries whose key was
+        # overwritten or deleted since are skipped when they come due
+        self._expiry: List[Tuple[float, bytes]] = []
+        self._data_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._commands: Dict[bytes, Callable[[List[bytes]], Any]] = {
+            b"GET": self._get, b"SET": self._set, b"DEL": self._delete, b"EXISTS": self._exists,
+            b"PTTL": self._pttl, b"PING": self._ping, b"DBSIZE": self._dbsize, b"FLUSHDB": self._flushdb,
+        }
+
+    @property
+    def url(self) -> str:
+        """redis:// URL clients can connect to."""
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}"
+
+    def start(self) -> "RESPServer":
+        """Serve in a background daemon thread; returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, name="resp-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def service_actions(self) -> None:
+        """Delete expired keys (called by serve_forever() between requests)."""
+        if self._expiry and self._expiry[0][0] <= self.clock():
+            with self._data_lock:
+                self._expire(self.clock())
+
+    def execute(self, command: List[Any]) -> bytes:
+        """Run one command and return the encoded reply."""
+        name = command[0].upper() if isinstance(command[0], bytes) else b""
+        handler = self._commands.get(name)
+        if handler is None:
+            return _encode_reply(RESPError(f"ERR unknown command '{name.decode('utf-8', 'replace')}'"))
+        try:
+            with self._data_lock:
+                return _encode_reply(handler(command[1:]))
+        except (ValueError, IndexError):
+            return _encode_reply(RESPError(f"ERR syntax error in '{name.decode()}'"))
+
+    def _live(self, key: bytes, now: float) -> Optional[Tuple[bytes, Optional[float]]]:
+        """Return the entry for key, deleting it if expired."""
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self.data[key]
+            return None
+        return entry
+
+    def _expire(self, now: float) -> None:
+        """Delete every key whose deadline has passed (lock held)."""
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            _, key = heapq.heappop(expiry)
+            self._live(key, now)
+
+    def _get(self, args: List[bytes]) -> Optional[bytes]:
+        (key,) = args
+        entry = self._live(key, self.clock())
+        return entry[0] if entry else None
+
+    def _set(self, args: List[bytes]) -> Any:
+        key, value, options = args[0], args[1], [arg.upper() for arg in args[2:]]
+        now = self.clock()
+        deadline: Optional[float] = None
+        i = 0
+        while i < len(options):
+            option = options[i]
+            if option in (b"EX", b"PX"):
+                amount = int(options[i + 1])
+                if amount <= 0:
+                    return RESPError("ERR invalid expire time in 'set' command")
+                deadline = now + (amount if option == b"EX" else amount / 1000)
+                i += 2
+            elif option == b"KEEPTTL":
+                entry = self._live(key, now)
+                deadline = entry[1] if entry else None
+                i += 1
+            else:
+                raise ValueError(option)
+        if deadline is not None and b"KEEPTTL" not in options:
+            heapq.heappush(self._expiry, (deadline, key))
+        self.data[key] = (value, deadline)
+        return b"OK"
+
+    def _delete(self, args: List[bytes]) -> int:
+        return sum(self.data.pop(key, None) is not None for key in args)
+
+    def _exists(self, args: List[bytes]) -> int:
+        now = self.clock()
+        return sum(self._live(key, now) is not None for key in args)
+
+    def _pttl(self, args: List[bytes]) -> int:
+        (key,) = args
+        now = self.clock()
+        entry = self._live(key, now)
+        if entry is None:
+            return -2
+        return -1 if entry[1] is None else int((entry[1] - now) * 1000)
+
+    def _ping(self, args: List[bytes]) -> bytes:
+        return args[0] if args else b"PONG"
+
+    def _dbsize(self, args: List[bytes]) -> int:
+        self._expire(self.clock())
+        return len(self.data)
+
+    def _flushdb(self, args: List[bytes]) -> bytes:
+        self.data.clear()
+        self._expiry.clear()
+        return b"OK"
+
+
+def main() -> None:
+    """Run a stand-in server in the foreground."""
+    parser = argparse.ArgumentParser(description="In-process RESP (Redis protocol) stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server = RESPServer(args.host, args.port)
+    print(f"✓ RESP stand-in listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# ============================================================================
+# bot/core/response_cache.py
+# ============================================================================
+"""Bounded LRU/TTL cache for deterministic knowledge answers."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set, Tuple
+
+
+class ResponseCache:
+    """
+    Caches ask_knowledge answers keyed on normalized question text.
+
+    Each entry remembers the knowledge lookup key its answer came from.
+    KnowledgeEngine answers a lookup key k from the stored key equal to k,
+    contained in k or containing k, so a write to key K can only change
+    answers whose lookup key is related to K that way; invalidate_key()
+    drops exactly those. TF-IDF answers depend on every fact, so with
+    retrieval="tfidf" a write drops all of them (invalidate_all()).
+
+    Features:
+    - LRU eviction at max_size entries
+    - TTL expiry
+    - MainBot also invalidates keys that other processes write to a
+      shared store, before each lookup
+    - Hit/miss/invalidation statistics
+    - Thread-safe (MainBot plans turns in the shared thread pool)
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Maximum cached answers
+            ttl: Seconds an answer stays valid
+            clock: Monotonic time source in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._by_lookup: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Return the cache key for a message text."""
+        return " ".join(text.lower().split())
+
+    def __len__(self) -> int:
+        """Return number of cached answers."""
+        return len(self._entries)
+
+    def get(self, question: str) -> Optional[str]:
+        """
+        Look up a cached answer.
+
+        Args:
+            question: Normalized question text
+
+        Returns:
+            Cached answer or None
+        """
+        with self._lock:
+            entry = self._entries.get(question)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if self.clock() >= entry[2]:
+                self._remove(question)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(question)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, question: str, lookup_key: str, answer: str) -> None:
+        """
+        Cache an answer.
+
+        Args:
+            question: Normalized question text
+            lookup_key: Normalized key the answer was looked up with
+            answer: Answer to cache
+        """
+        with self._lock:
+            if question in self._entries:
+                self._remove(question)
+
+            self._entries[question] = (answer, lookup_key, self.clock() + self.ttl)
+            self._by_lookup.setdefault(lookup_key, set()).add(question)
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, question: str) -> None:
+        """Drop an entry and its reverse mapping."""
+        _, lookup_key, _ = self._entries.pop(question)
+        questions = self._by_lookup[lookup_key]
+        questions.discard(question)
+        if not questions:
+            del self._by_lookup[lookup_key]
+
+    def invalidate_key(self, key: str) -> int:
+        """
+        Drop answers that a write to a knowledge key could change.
+
+        Args:
+            key: Normalized knowledge key that was written
+
+        Returns:
+            Number of answers dropped
+        """
+        with self._lock:
+            affected = [lookup_key for lookup_key in self._by_lookup
+                        if key in lookup_key or lookup_key in key]
+
+            dropped = 0
+            for lookup_key in affected:
+                for question in list(self._by_lookup.get(lookup_key, ())):
+                    self._remove(question)
+                    dropped += 1
+
+            self.invalidations += dropped
+            return dropped
+
+    def invalidate_all(self) -> int:
+        """
+        Drop every answer, e.g. after a write under ranked retrieval.
+
+        Returns:
+            Number of answers dropped
+        """
+        with self._lock:
+            dropped = len(self._entries)
+            self.clear()
+            self.invalidations += dropped
+            return dropped
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries.clear()
+            self._by_lookup.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
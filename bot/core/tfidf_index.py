@@ -0,0 +1,228 @@
+# ============================================================================
+# bot/core/tfidf_index.py
+# ============================================================================
+"""Sparse TF-IDF index for ranked knowledge retrieval."""
+
+import heapq
+import math
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for lookups (keys are often "capital_of_x")
+STOPWORDS = frozenset("""
+    a an and are as at be by do does for from how in is it me of on or please tell the
+    to was what whats when where which who why you your know about
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word terms, dropping stopwords."""
+    return [term for term in _TOKEN.findall(text.lower()) if term not in STOPWORDS]
+
+
+class TfidfIndex:
+    """
+    Cosine-similarity search over knowledge keys and values.
+
+    Each fact is a sparse vector of term weights (key terms count fully,
+    value terms at VALUE_WEIGHT), scaled by IDF. The matrix is stored by
+    column: term -> posting array of fact ids. A query is scored in one
+    pass over the postings of its terms, accumulating dot products into
+    a sparse score vector, then the top-k above the threshold are taken.
+
+    Scoring stays far below a millisecond for 100k facts by walking
+    terms in order of their best possible contribution: once the
+    remaining terms can no longer lift an unseen fact to the threshold,
+    they only update facts that are already candidates (looked up per
+    fact), so long posting lists of common terms are never scanned.
+
+    IDF weights and fact norms come from a snapshot taken when the
+    collection last grew by REWEIGHT_GROWTH; new facts are weighted with
+    that snapshot, so adds are O(terms) and re-weighting is amortized.
+    Terms missing from the index count with the highest IDF in the query
+    norm, so an unknown word ("spain") lowers the match with facts about
+    other things instead of being ignored.
+    """
+
+    VALUE_WEIGHT = 0.5
+    REWEIGHT_GROWTH = 1.25
+
+    def __init__(self):
+        """Initialize empty index."""
+        self._keys: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._weights: List[Optional[Dict[str, float]]] = []   # None once superseded
+        self._norms = array("d")
+        self._postings: Dict[str, array] = {}
+        self._df: Dict[str, int] = {}
+        self._idf: Dict[str, float] = {}
+        self._bound: Dict[str, float] = {}
+        self._live = 0
+        self._snapshot_size = 0
+
+    def __len__(self) -> int:
+        """Return number of indexed facts."""
+        return self._live
+
+    def _new_idf(self) -> float:
+        """IDF of a term seen in one fact, under the current snapshot."""
+        return math.log((1 + self._snapshot_size) / 2) + 1
+
+    @classmethod
+    def _weigh(cls, key: str, value: str) -> Dict[str, float]:
+        """Return the raw term weights of a fact."""
+        weights: Dict[str, float] = {}
+        for term in tokenize(key):
+            weights[term] = weights.get(term, 0.0) + 1.0
+        for term in tokenize(value):
+            weights[term] = weights.get(term, 0.0) + cls.VALUE_WEIGHT
+        return weights
+
+    def add(self, key: str, value: str) -> None:
+        """
+        Index a fact, replacing an earlier one with the same key.
+
+        Args:
+            key: Normalized knowledge key
+            value: Stored value
+        """
+        weights = self._weigh(key, value)
+        old = self._ids.get(key)
+        if old is not None:
+            if self._weights[old] == weights:
+                return
+            self._retire(old)
+
+        fact = len(self._keys)
+        self._keys.append(key)
+        self._ids[key] = fact
+        self._weights.append(weights)
+        self._live += 1
+
+        idf = self._idf
+        for term in weights:
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = array("I")
+                idf[term] = self._new_idf()
+            posting.append(fact)
+            self._df[term] = self._df.get(term, 0) + 1
+
+        norm = math.sqrt(sum((w * idf[t]) ** 2 for t, w in weights.items())) or 1.0
+        self._norms.append(norm)
+        bound = self._bound
+        for term, weight in weights.items():
+            if weight / norm > bound.get(term, 0.0):
+                bound[term] = weight / norm
+
+        if (self._live > self._snapshot_size * self.REWEIGHT_GROWTH + 16
+                or len(self._keys) > 2 * self._live + 16):
+            self._reweight()
+
+    def add_many(self, facts: Iterable[Tuple[str, str]]) -> None:
+        """
+        Index many facts, weighting them all in a single pass.
+
+        Args:
+            facts: (key, value) pairs
+        """
+        for key, value in facts:
+            old = self._ids.get(key)
+            if old is not None:
+                self._retire(old)
+            weights = self._weigh(key, value)
+            self._ids[key] = len(self._keys)
+            self._keys.append(key)
+            self._weights.append(weights)
+            self._live += 1
+            for term in weights:
+                self._df[term] = self._df.get(term, 0) + 1
+        self._reweight()
+
+    def _retire(self, fact: int) -> None:
+        """Drop a superseded fact (its ids stay in postings and are skipped)."""
+        for term in self._weights[fact]:
+            self._df[term] -= 1
+        self._weights[fact] = None
+        self._live -= 1
+
+    def _reweight(self) -> None:
+        """Recompute IDF, norms and bounds; compact away superseded facts."""
+        keys, weights_list = [], []
+        for key, weights in zip(self._keys, self._weights):
+            if weights is not None:
+                keys.append(key)
+                weights_list.append(weights)
+
+        total = len(keys)
+        self._snapshot_size = total
+        self._df = {term: df for term, df in self._df.items() if df > 0}
+        self._idf = idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in self._df.items()}
+
+        self._keys = keys
+        self._weights = weights_list
+        self._ids = {key: fact for fact, key in enumerate(keys)}
+        self._postings = postings = {term: array("I") for term in idf}
+        self._norms = norms = array("d")
+        self._bound = bound = {}
+        for fact, weights in enumerate(weights_list):
+            norm = math.sqrt(sum((w * idf[t]) ** 2 for t, w in weights.items())) or 1.0
+            norms.append(norm)
+            for term, weight in weights.items():
+                postings[term].append(fact)
+                if weight / norm > bound.get(term, 0.0):
+                    bound[term] = weight / norm
+
+    def search(self, question: str, k: int = 3, threshold: float = 0.5) -> List[Tuple[str, float]]:
+        """
+        Return the facts most similar to question.
+
+        Args:
+            question: Free-text question
+            k: Maximum number of results
+            threshold: Minimum cosine similarity (0..1)
+
+        Returns:
+            (key, score) pairs, best first
+        """
+        query: Dict[str, float] = {}
+        for term in tokenize(question):
+            query[term] = query.get(term, 0.0) + 1.0
+
+        idf = self._idf
+        unseen_idf = math.log(1 + self._snapshot_size) + 1
+        query_norm = math.sqrt(sum((w * idf.get(t, unseen_idf)) ** 2 for t, w in query.items()))
+        if not query_norm:
+            return []
+
+        # Per term: weight c such that contribution = c * fact_weight / fact_norm
+        terms = []
+        for term, weight in query.items():
+            if term in self._postings:
+                c = weight * idf[term] * idf[term] / query_norm
+                terms.append((c * self._bound.get(term, 0.0), c, term))
+        terms.sort(reverse=True)
+
+        remaining = sum(bound for bound, _, _ in terms)
+        scores: Dict[int, float] = {}
+        weights_list, norms = self._weights, self._norms
+        for bound, c, term in terms:
+            if remaining >= threshold:
+                for fact in self._postings[term]:
+                    weights = weights_list[fact]
+                    if weights is not None:
+                        scores[fact] = scores.get(fact, 0.0) + c * weights[term] / norms[fact]
+            elif scores:
+                for fact in scores:
+                    weight = weights_list[fact].get(term)
+                    if weight:
+                        scores[fact] += c * weight / norms[fact]
+            else:
+                break
+            remaining -= bound
+
+        best = heapq.nlargest(k, ((score, fact) for fact, score in scores.items() if score >= threshold))
+        return [(self._keys[fact], min(score, 1.0)) for score, fact in best]
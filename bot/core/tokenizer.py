@@ -0,0 +1,116 @@
+# ============================================================================
+# bot/core/tokenizer.py
+# ============================================================================
+"""Shared single-pass tokenization of incoming messages."""
+
+import re
+from itertools import accumulate
+from typing import List, Optional, Tuple, Union
+
+# Words (\w runs, so "capital_of_france" is one token) and single
+# punctuation characters; split() also returns the whitespace between them.
+_TOKEN = re.compile(r"(\w+|\S)")
+
+
+class Message:
+    """
+    A message tokenized once, shared by intent detection and extraction.
+
+    Tokens come from one regex split of the lowercased text, which also
+    keeps the whitespace between them, so extractors can tell adjacent
+    tokens apart from spaced ones and slice the original text instead of
+    re-scanning it. Whitespace never appears inside a token. Tokens and
+    their offsets are computed on first use.
+
+    Attributes:
+        text: Original text
+        lower: Lowercased text (used for intent patterns)
+    """
+
+    __slots__ = ("text", "lower", "_parts", "_pieces", "_tokens", "_spans")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self._parts: Optional[List[str]] = None
+        # Split of the original-length text (the same list as _parts
+        # unless lowercasing changed lengths); offsets are summed from it
+        self._pieces: Optional[List[str]] = None
+        self._tokens: Optional[List[str]] = None
+        self._spans: Optional[List[Tuple[int, int]]] = None
+
+    def _split(self) -> None:
+        """Split the text into lowercased tokens and the whitespace between them."""
+        text, lower = self.text, self.lower
+        if len(lower) == len(text):
+            parts = pieces = _TOKEN.split(lower)
+        else:
+            # Lowercasing changed the length ("İ"): lowercase per token
+            pieces = _TOKEN.split(text)
+            parts = [piece.lower() for piece in pieces]
+        self._parts = parts
+        self._pieces = pieces
+        self._tokens = parts[1::2]
+
+    @property
+    def parts(self) -> List[str]:
+        """Whitespace separators and lowercased tokens, alternating (separators first and last)."""
+        if self._parts is None:
+            self._split()
+        return self._parts
+
+    @property
+    def tokens(self) -> List[str]:
+        """Lowercased tokens, in order."""
+        if self._tokens is None:
+            self._split()
+        return self._tokens
+
+    @property
+    def spans(self) -> List[Tuple[int, int]]:
+        """(start, end) character offsets of each token in text."""
+        if self._spans is None:
+            if self._pieces is None:
+                self._split()
+            ends = list(accumulate(map(len, self._pieces)))
+            self._spans = list(zip(ends[0::2], ends[1::2]))
+        return self._spans
+
+    def is_word(self, index: int) -> bool:
+        """Check if a token is a word (as opposed to a punctuation character)."""
+        token = self.tokens[index]
+        return token[0].isalnum() or token[0] == "_" or len(token) > 1
+
+    def original(self, first: int, last: int) -> str:
+        """Return the original text from token `first` through token `last`."""
+        if self._spans is not None:
+            return self.text[self._spans[first][0]:self._spans[last][1]]
+        if self._pieces is None:
+            self._split()
+        pieces = self._pieces
+        start = len("".join(pieces[:2 * first + 1]))
+        return self.text[start:start + len("".join(pieces[2 * first + 1:2 * last + 2]))]
+
+    def chunk(self, first: int) -> Tuple[str, int]:
+        """
+        Return the whitespace-delimited part of the text starting at a token.
+
+        Args:
+            first: Position of a token preceded by whitespace (or the first one)
+
+        Returns:
+            (original text of the part, position of the token after it)
+        """
+        parts, count = self.parts, len(self.tokens)
+        last = first
+        while last + 1 < count and not parts[2 * last + 2]:
+            last += 1
+        return self.original(first, last), last + 1
+
+    def __repr__(self) -> str:
+        return f"Message({self.text!r})"
+
+
+def as_message(text: Union[str, Message]) -> Message:
+    """Return text as a Message, tokenizing a plain string."""
+    return text if isinstance(text, Message) else Message(text)
@@ -4,18 +4,29 @@
 """Main bot orchestrator."""
 
 import json
-from pathlib import Path
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
 from bot.core.knowledge_engine import KnowledgeEngine
 from bot.core.intent_engine import IntentEngine
+from bot.core.tokenizer import Message
 from bot.core.action_router import ActionRouter
+from bot.core.async_support import KeyedLock, run_sync
 from bot.core.context_manager import ContextManager
-from bot.core.base_channel import BaseChannel
-from bot.skills.weather import WeatherAction
-from bot.channels.telegram_channel import TelegramChannel
-from bot.channels.whatsapp_channel import WhatsAppChannel
-from bot.channels.mattermost_channel import MattermostChannel
-from bot.channels.internal_channel import InternalChannel
+from bot.core.response_cache import ResponseCache
+from bot.core.instrumentation import Instrumentation
+from bot.core.registry import CHANNELS, SKILLS, ChannelMap, SkillRegistry
+
+if TYPE_CHECKING:
+    from bot.core.intent_classifier import IntentClassifier
+
+# Channel modules, skills and the outbound queues are imported on first
+# use, keeping cold starts cheap.
+
+
+class RouteRequest(NamedTuple):
+    """An action call still to be made for a message."""
+
+    intent: str
+    entities: Dict[str, Any]
 
 
 class MainBot:
@@ -29,41 +40,73 @@ class MainBot:
     - Manage context and state
     """
 
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, knowledge: Optional[KnowledgeEngine] = None,
+                 context_manager: Optional[ContextManager] = None,
+                 classifier: Optional["IntentClassifier"] = None):
         """
         Initialize the bot.
 
         Args:
             config_path: Path to channels.json config file
+            knowledge: Knowledge engine to use (defaults to an in-memory one)
+            context_manager: Context manager to use, e.g. one backed by a shared
+                ContextStore (defaults to in-process contexts)
+            classifier: Intent classifier for messages no intent pattern
+                matches (defaults to patterns only)
         """
         # Initialize core engines
-        self.knowledge = KnowledgeEngine()
-        self.intent_engine = IntentEngine()
+        self.knowledge = knowledge if knowledge is not None else KnowledgeEngine()
+        self.intent_engine = IntentEngine(classifier)
         self.action_router = ActionRouter()
-        self.context_manager = ContextManager()
+        self.context_manager = context_manager if context_manager is not None else ContextManager()
+        self._user_locks = None
+        self._outbound = None
+
+        # Stage timings and counters; free until a sink is added
+        self.instrumentation = Instrumentation(self)
+
+        # Cache ask_knowledge answers; writes invalidate related entries
+        self.response_cache = ResponseCache()
+        if self.knowledge.retrieval == "tfidf":
+            # Any write can change any ranked answer (document frequencies)
+            self._invalidate_key = lambda key: self.response_cache.invalidate_all()
+        else:
+            self._invalidate_key = self.response_cache.invalidate_key
+        self.knowledge.listeners.append(self._invalidate_key)
+        # Writes by other processes to a shared store, applied before each cache lookup
+        self._cache_cursor = self.knowledge.watch()
 
         # Register skills
         self._register_skills()
 
-        # Initialize channels
-        self.channels: Dict[str, BaseChannel] = {}
+        # Initialize channels (each is built on first use)
+        self.channels = ChannelMap(CHANNELS, {"internal": {}})
         if config_path:
             self._load_channels(config_path)
-        else:
-            # Default: only internal channel
-            self.channels["internal"] = InternalChannel()
 
         print("🤖 Bot initialized successfully!")
 
+    @property
+    def outbound(self):
+        """Outbound delivery queues (OutboundDispatcher), created on first use."""
+        if self._outbound is None:
+            from bot.core.outbound import OutboundDispatcher
+            self._outbound = OutboundDispatcher(self.channels, instrumentation=self.instrumentation)
+        return self._outbound
+
     def _register_skills(self) -> None:
-        """Register all available skills."""
-        self.action_router.register(WeatherAction())
-        print("✓ Registered skills: Weather")
+        """Register all available skills with the intent engine and router."""
+        names = SkillRegistry(SKILLS).install(self.intent_engine, self.action_router)
+        print(f"✓ Registered skills: {', '.join(name.title() for name in names)}")
 
     def _load_channels(self, config_path: str) -> None:
         """
         Load channels from config file.
 
+        Each section's keys are passed to the channel's constructor when
+        the channel is first used; sections the constructor would reject
+        are reported and skipped now.
+
         Args:
             config_path: Path to channels.json
         """
@@ -71,26 +114,21 @@ class MainBot:
             with open(config_path, 'r') as f:
                 config = json.load(f)
 
-            if "telegram" in config:
-                self.channels["telegram"] = TelegramChannel(config["telegram"]["api_token"])
-
-            if "whatsapp" in config:
-                self.channels["whatsapp"] = WhatsAppChannel(config["whatsapp"]["api_key"])
-
-            if "mattermost" in config:
-                self.channels["mattermost"] = MattermostChannel(config["mattermost"]["webhook_url"])
-
-            # Always include internal channel
-            self.channels["internal"] = InternalChannel()
+            for name, options in config.items():
+                if name in CHANNELS:
+                    try:
+                        self.channels.configure(name, options)
+                    except TypeError as e:
+                        print(f"❌ Invalid config for channel {name}: {e}")
+                else:
+                    print(f"⚠ Unknown channel in config: {name}")
 
             print(f"✓ Loaded channels: {', '.join(self.channels.keys())}")
 
         except FileNotFoundError:
             print(f"⚠ Config file not found: {config_path}, using internal channel only")
-            self.channels["internal"] = InternalChannel()
         except Exception as e:
             print(f"⚠ Error loading config: {e}, using internal channel only")
-            self.channels["internal"] = InternalChannel()
 
     def process_message(self, user_id: str, text: str, channel: str = "internal") -> str:
         """
@@ -103,6 +141,150 @@ class MainBot:
 
         Returns:
             Response string
+
+        Raises:
+            BackpressureError: If the channel's outbound queue is full
+        """
+        self._check_capacity(channel)
+        result = self._plan(user_id, text)
+        if isinstance(result, RouteRequest):
+            return self.action_router.route(result.intent, result.entities)
+        return result
+
+    async def process_message_async(self, user_id: str, text: str, channel: str = "internal") -> str:
+        """
+        Process incoming message from asyncio.
+
+        Messages from the same user are handled strictly in order; other
+        users proceed concurrently. Everything that may block runs in the
+        shared thread pool, so the event loop never waits on it: the turn
+        planning (knowledge writes, e.g. a journal fsync, and context store
+        round trips) and sync skills.
+
+        Args:
+            user_id: User identifier
+            text: Message text
+            channel: Channel name
+
+        Returns:
+            Response string
+
+        Raises:
+            BackpressureError: If the channel's outbound queue is full
+        """
+        self._check_capacity(channel)
+        if self._user_locks is None:
+            self._user_locks = KeyedLock()
+        async with self._user_locks.hold(user_id):
+            result = await run_sync(self._plan, user_id, text)
+            if isinstance(result, RouteRequest):
+                return await self.action_router.route_async(result.intent, result.entities)
+            return result
+
+    def process_messages(self, batch: Iterable[Sequence[str]]) -> List[str]:
+        """
+        Process a batch of messages in one pass.
+
+        Messages are grouped by user and each user's messages are handled
+        in their original order, so multi-turn conversations inside the
+        batch behave exactly as with process_message. Intents are
+        detected for the whole batch up front, once per distinct text.
+
+        Args:
+            batch: (user_id, text) or (user_id, text, channel) items
+
+        Returns:
+            Response strings in input order
+
+        Raises:
+            BackpressureError: If an outbound queue the batch replies on is full
+        """
+        batch = list(batch)
+        for channel in {item[2] if len(item) > 2 else "internal" for item in batch}:
+            self._check_capacity(channel)
+
+        messages = [(item[0], item[1].strip() if item[1] else "") for item in batch]
+        intents = self.intent_engine.detect_intents([text for _, text in messages])
+
+        by_user: Dict[str, List[int]] = {}
+        for position, (user_id, _) in enumerate(messages):
+            by_user.setdefault(user_id, []).append(position)
+
+        responses: List[str] = [""] * len(messages)
+        route = self.action_router.route
+        for user_id, positions in by_user.items():
+            for position in positions:
+                result = self._plan(user_id, messages[position][1], intents[position])
+                if isinstance(result, RouteRequest):
+                    result = route(result.intent, result.entities)
+                responses[position] = result
+
+        return responses
+
+    def respond(self, user_id: str, text: str, channel: str = "internal") -> str:
+        """
+        Process a message and queue the response on the same channel.
+
+        Args:
+            user_id: User identifier
+            text: Message text
+            channel: Channel name
+
+        Returns:
+            Response string
+
+        Raises:
+            BackpressureError: If the channel's outbound queue is full
+        """
+        response = self.process_message(user_id, text, channel)
+        self.outbound.enqueue(channel, user_id, response)
+        return response
+
+    async def respond_async(self, user_id: str, text: str, channel: str = "internal") -> str:
+        """
+        Process a message from asyncio and queue the response on the same channel.
+
+        Args:
+            user_id: User identifier
+            text: Message text
+            channel: Channel name
+
+        Returns:
+            Response string
+
+        Raises:
+            BackpressureError: If the channel's outbound queue is full
+        """
+        response = await self.process_message_async(user_id, text, channel)
+        self.outbound.enqueue(channel, user_id, response)
+        return response
+
+    def _check_capacity(self, channel: str) -> None:
+        """
+        Refuse new work whose reply could not be queued.
+
+        Args:
+            channel: Channel the reply would go out on
+
+        Raises:
+            BackpressureError: If the channel's outbound queue is full
+        """
+        outbound = self._outbound
+        if outbound is not None and not outbound.has_capacity(channel):
+            from bot.core.outbound import BackpressureError
+            raise BackpressureError(channel, outbound.depth(channel))
+
+    def _plan(self, user_id: str, text: str, intent: Optional[str] = None) -> Union[str, RouteRequest]:
+        """
+        Run every step of a turn except the action call.
+
+        Args:
+            user_id: User identifier
+            text: Message text
+            intent: Intent already detected for the stripped text, if any
+
+        Returns:
+            Final response string, or the action call still to be made
         """
         # Handle empty messages
         if not text or not text.strip():
@@ -116,50 +298,79 @@ class MainBot:
         if pending:
             return self._handle_followup(user_id, text, pending)
         else:
-            return self._handle_new_message(user_id, text)
-
-    def _handle_new_message(self, user_id: str, text: str) -> str:
+            return self._handle_new_message(user_id, text, intent)
+
+    def _sync_response_cache(self) -> None:
+        """Drop cached answers that other processes' writes could change."""
+        if self._cache_cursor is None:
+            return
+        if not len(self.response_cache):
+            # Nothing to invalidate: skip the keys written meanwhile
+            self._cache_cursor = self.knowledge.watch()
+            return
+        self._cache_cursor, keys = self.knowledge.changed_since(self._cache_cursor)
+        if keys is None:
+            self.response_cache.clear()
+            return
+        for key in keys:
+            self._invalidate_key(key)
+
+    def _handle_new_message(self, user_id: str, text: str,
+                            intent: Optional[str] = None) -> Union[str, RouteRequest]:
         """
         Handle new message (no pending context).
 
         Args:
             user_id: User identifier
             text: Message text
+            intent: Intent already detected for text, if any
 
         Returns:
-            Response string
+            Response string, or the action call to make
         """
+        # Tokenized once for detection and every extractor
+        message = Message(text)
+
         # Detect intent
-        intent = self.intent_engine.detect_intent(text)
+        if intent is None:
+            intent = self.intent_engine.detect_intent(message)
 
         if not intent:
             return "I didn't understand. Can you rephrase?"
 
         # Handle knowledge queries directly
         if intent == "ask_knowledge":
-            entities = self.intent_engine.extract_entities(text, intent)
-            key = entities.get("key", text)
-            return self.knowledge.query(key)
+            # Repeated questions skip extraction and lookup
+            question = ResponseCache.normalize(text)
+            self._sync_response_cache()
+            cached = self.response_cache.get(question)
+            if cached is not None:
+                return cached
+            entities = self.intent_engine.extract_entities(message, intent)
+            key = entities.get("key") or text
+            answer = self.knowledge.query(key)
+            self.response_cache.put(question, key.lower().strip(), answer)
+            return answer
 
         # Handle learn commands directly
         if intent == "learn_knowledge":
-            entities = self.intent_engine.extract_entities(text, intent)
+            entities = self.intent_engine.extract_entities(message, intent)
             key = entities.get("key")
             value = entities.get("value")
 
             if not key:
                 self.context_manager.set_pending(user_id, intent, entities, ["key", "value"])
-                return self.intent_engine.prompt_for_entity("key")
+                return self.intent_engine.prompt_for_entity("key", intent)
 
             if not value:
                 self.context_manager.set_pending(user_id, intent, entities, ["value"])
-                return self.intent_engine.prompt_for_entity("value")
+                return self.intent_engine.prompt_for_entity("value", intent)
 
             self.knowledge.add_knowledge(key, value)
             return f"Learned '{key}' = '{value}'"
 
         # Extract entities
-        entities = self.intent_engine.extract_entities(text, intent)
+        entities = self.intent_engine.extract_entities(message, intent)
 
         # Get required entities for this intent
         required = self.action_router.get_required_entities(intent)
@@ -170,13 +381,12 @@ class MainBot:
         if missing:
             # Save context and ask for missing entity
             self.context_manager.set_pending(user_id, intent, entities, missing)
-            return self.intent_engine.prompt_for_entity(missing[0])
+            return self.intent_engine.prompt_for_entity(missing[0], intent)
 
         # All entities present, execute action
-        response = self.action_router.route(intent, entities)
-        return response
+        return RouteRequest(intent, entities)
 
-    def _handle_followup(self, user_id: str, text: str, context) -> str:
+    def _handle_followup(self, user_id: str, text: str, context) -> Union[str, RouteRequest]:
         """
         Handle follow-up message (has pending context).
 
@@ -186,7 +396,7 @@ class MainBot:
             context: Pending conversation context
 
         Returns:
-            Response string
+            Response string, or the action call to make
         """
         # Try to extract the missing entity from user's response
         missing_entity = context.missing_entities[0] if context.missing_entities else None
@@ -194,7 +404,7 @@ class MainBot:
         if not missing_entity:
             # No missing entities, execute action
             self.context_manager.clear(user_id)
-            return self.action_router.route(context.intent, context.entities)
+            return RouteRequest(context.intent, context.entities)
 
         # For knowledge learning, handle key/value specially
         if context.intent == "learn_knowledge":
@@ -214,12 +424,12 @@ class MainBot:
                 context.entities[missing_entity] = text.strip()
 
         # Update context
-        self.context_manager.update_entities(user_id, context.entities)
+        self.context_manager.update_entities(user_id, context.entities, context)
 
         # Check if still missing entities
         if context.missing_entities:
             # Ask for next missing entity
-            return self.intent_engine.prompt_for_entity(context.missing_entities[0])
+            return self.intent_engine.prompt_for_entity(context.missing_entities[0], context.intent)
 
         # All entities collected, execute action
         self.context_manager.clear(user_id)
@@ -233,24 +443,44 @@ class MainBot:
                 return f"Learned '{key}' = '{value}'"
 
         # Execute action
-        return self.action_router.route(context.intent, context.entities)
+        return RouteRequest(context.intent, context.entities)
 
     def send_message(self, channel_name: str, user_id: str, message: str) -> None:
         """
-        Send message via specific channel.
+        Queue message for delivery via specific channel.
+
+        Delivery happens in the background with retries; messages that
+        still fail, or that arrive while the queue is full, end up in
+        outbound.dead_letters.
 
         Args:
             channel_name: Name of channel to use
             user_id: Recipient user ID
             message: Message text to send
         """
-        if channel_name in self.channels:
-            try:
-                self.channels[channel_name].send_message(user_id, message)
-            except Exception as e:
-                print(f"❌ Failed to send message via {channel_name}: {e}")
-        else:
+        if channel_name not in self.channels:
             print(f"⚠ Unknown channel: {channel_name}")
+            return
+        from bot.core.outbound import BackpressureError, OutboundMessage
+        try:
+            self.outbound.enqueue(channel_name, user_id, message)
+        except BackpressureError as e:
+            self.outbound.dead_letters.add(
+                OutboundMessage(channel_name, user_id, message, self.outbound.clock()), e)
+            print(f"⚠ {e}")
+
+    async def send_message_async(self, channel_name: str, user_id: str, message: str) -> None:
+        """
+        Queue message for delivery via specific channel from asyncio.
+
+        Enqueueing never blocks, so this is safe to call on the event loop.
+
+        Args:
+            channel_name: Name of channel to use
+            user_id: Recipient user ID
+            message: Message text to send
+        """
+        self.send_message(channel_name, user_id, message)
 
     def run_console_demo(self) -> None:
         """
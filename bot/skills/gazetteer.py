@@ -0,0 +1,546 @@
+# ============================================================================
+# bot/skills/gazetteer.py
+# ============================================================================
+"""Place name index resolving free text to canonical locations."""
+
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from zlib import crc32
+
+DEFAULT_SOURCE = Path(__file__).resolve().parent / "data" / "places.tsv"
+
+# Built indexes live here, not next to their source in the package
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                 "conversational-bot")
+
+# Header: magic, version, max words per name, name count, place count,
+# offset of the name table, offset of the place table
+HEADER = struct.Struct("<4sBxHIIII")
+
+# After the header, 257 u32: position of the first name whose first byte
+# is >= b, for b in 0..256 (narrows every binary search to one bucket)
+BUCKETS = 257
+MAGIC = b"GAZT"
+VERSION = 1
+
+# Name entry (sorted by name bytes): string offset, place index, string length.
+# All fields are u32 so the table can be read as one array of integers.
+NAME = struct.Struct("<III")
+
+# Place entry: id offset, display name offset, id length, name length, country
+PLACE = struct.Struct("<IIHH2s2x")
+
+_WORD = re.compile(r"[^\W_]+")
+
+# Words resolve() lets surround a place name ("tokyo please", "paris today")
+FILLER = frozenset("""
+    please pls thanks thank you today tomorrow tonight now right currently
+    weather forecast temperature city the in at for of like
+""".split())
+
+# Entries kept by the per-word and resolve() memos before they are reset
+MEMO_SIZE = 4096
+
+
+class Place(NamedTuple):
+    """A canonical location."""
+
+    id: str
+    name: str
+    country: str
+
+
+class PlaceMatch(NamedTuple):
+    """A place found in text, with the character span it was found at."""
+
+    place: Place
+    start: int
+    end: int
+
+
+def normalize_word(word: str) -> str:
+    """Casefold a word and strip accents ("São" -> "sao")."""
+    if word.isascii():
+        return word.lower()
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize(text: str) -> str:
+    """Return the lookup form of a place name ("St. Petersburg" -> "st petersburg")."""
+    return " ".join(normalize_word(word) for word in _WORD.findall(text))
+
+
+def read_source(path: Path) -> List[Tuple[str, str, str, List[str]]]:
+    """
+    Read a gazetteer source file.
+
+    Lines are tab-separated: id, display name, ISO country code and
+    "|"-separated aliases. Blank lines and lines starting with "#" are
+    skipped.
+
+    Args:
+        path: TSV file
+
+    Returns:
+        (id, name, country, aliases) tuples in file order
+    """
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.split("\t") + ["", ""]
+            place_id, name, country, aliases = fields[:4]
+            rows.append((place_id, name, country, [a for a in aliases.split("|") if a.strip()]))
+    return rows
+
+
+def build_index(rows: Iterable[Tuple[str, str, str, List[str]]], path: Path) -> None:
+    """
+    Write a binary index for the given places.
+
+    Every place is findable by its normalized display name, id (with "-"
+    as a space) and aliases. When two places share a name, the one
+    listed first wins.
+
+    Args:
+        rows: (id, name, country, aliases) tuples
+        path: Output file (replaced atomically)
+    """
+    heap = bytearray()
+    places = []
+    names = {}
+
+    def intern(text: bytes) -> int:
+        offset = len(heap)
+        heap.extend(text)
+        return offset
+
+    for index, (place_id, name, country, aliases) in enumerate(rows):
+        id_bytes, name_bytes = place_id.encode("utf-8"), name.encode("utf-8")
+        places.append((intern(id_bytes), intern(name_bytes), len(id_bytes), len(name_bytes),
+                       country.encode("ascii")[:2]))
+        for alias in [name, place_id.replace("-", " "), *aliases]:
+            key = normalize(alias).encode("utf-8")
+            if key:
+                names.setdefault(key, index)
+
+    sorted_keys = sorted(names)
+    name_entries = []
+    for key in sorted_keys:
+        name_entries.append((intern(key), names[key], len(key)))
+    max_words = max((key.count(b" ") + 1 for key in names), default=0)
+
+    buckets = []
+    position = 0
+    for byte in range(BUCKETS):
+        while position < len(name_entries) and sorted_keys[position][0] < byte:
+            position += 1
+        buckets.append(position)
+
+    names_offset = HEADER.size + 4 * BUCKETS
+    places_offset = names_offset + NAME.size * len(name_entries)
+    heap_offset = places_offset + PLACE.size * len(places)
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, max_words, len(name_entries), len(places),
+                                names_offset, places_offset))
+    out += struct.pack(f"<{BUCKETS}I", *buckets)
+    for offset, index, length in name_entries:
+        out += NAME.pack(heap_offset + offset, index, length)
+    for id_offset, name_offset, id_length, name_length, country in places:
+        out += PLACE.pack(heap_offset + id_offset, heap_offset + name_offset, id_length, name_length, country)
+    out += heap
+
+    import tempfile
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(out)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+class Gazetteer:
+    """
+    Read-only place name index, memory-mapped from disk.
+
+    The index is a sorted table of normalized names (binary searched
+    straight out of the mmap, so nothing is parsed at load time) plus a
+    table of places and a string heap. It is opened on the first lookup;
+    if it is missing or older than its source file it is rebuilt first,
+    by default in CACHE_DIR (written to a temporary file and renamed into
+    place, so concurrent processes never map a partial index).
+
+    Lookups take a few microseconds: exact names are one binary search,
+    and scanning text for place names tries each word position with a
+    prefix search that stops as soon as no name continues the words seen.
+    Prefix searches and resolve() results are memoized, so recurring words
+    cost one dict lookup. Memo reads take no lock; writes hold the
+    gazetteer's lock, so threads can share one instance.
+    """
+
+    def __init__(self, index_path: Optional[str] = None, source: Optional[str] = None):
+        """
+        Initialize gazetteer (no file is touched until first use).
+
+        Args:
+            index_path: Binary index file (defaults to one per source in CACHE_DIR)
+            source: TSV source used to (re)build the index (see read_source)
+        """
+        self.source = Path(source) if source else DEFAULT_SOURCE
+        self.index_path = Path(index_path) if index_path else self.default_index_path(self.source)
+        self._map: Optional[mmap.mmap] = None
+        self._table: Optional[memoryview] = None
+        self._buckets: Optional[memoryview] = None
+        self._fields: Optional[memoryview] = None
+        self._places: Dict[int, Place] = {}
+        # Words a name may start with -> (place named exactly that or -1,
+        # whether longer names start with them); most words start none
+        self._prefixes: Dict[str, Tuple[int, bool]] = {}
+        self._resolved: Dict[str, Optional[Place]] = {}
+        self._lock = threading.Lock()
+        self._max_words = 0
+        self._name_count = 0
+        self._places_offset = 0
+
+    @staticmethod
+    def default_index_path(source: Path) -> Path:
+        """Return the cached index file of a source ("places-<hash>.gaz")."""
+        return CACHE_DIR / f"{source.stem}-{crc32(str(source.resolve()).encode()):08x}.gaz"
+
+    def _stale(self, path: Path) -> bool:
+        """Check if the index at path must be rebuilt from the source."""
+        try:
+            return (self.source.exists()
+                    and path.stat().st_mtime < self.source.stat().st_mtime)
+        except FileNotFoundError:
+            return True
+
+    def _open(self) -> mmap.mmap:
+        """Map the index, building it first if needed."""
+        if self._map is not None:
+            return self._map
+        with self._lock:
+            if self._map is not None:
+                return self._map
+            path = self.index_path
+            if self._stale(path):
+                rows = read_source(self.source)
+                try:
+                    build_index(rows, path)
+                except OSError:
+                    # No writable cache directory: keep the index in the temp directory
+                    import tempfile
+                    path = Path(tempfile.gettempdir()) / f"bot-{os.getuid()}-{path.name}"
+                    if self._stale(path):
+                        build_index(rows, path)
+
+            with open(path, "rb") as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, max_words, name_count, _, names_offset, places_offset = HEADER.unpack_from(index)
+            if magic != MAGIC or version != VERSION:
+                index.close()
+                raise ValueError(f"{path} is not a gazetteer index")
+            # Bucket and name tables as one zero-copy array of integers
+            raw = memoryview(index)[HEADER.size:names_offset + NAME.size * name_count]
+            if sys.byteorder == "little":
+                table = raw.cast("I")
+            else:
+                swapped = array("I", raw.tobytes())
+                swapped.byteswap()
+                table = memoryview(swapped)
+                raw.release()
+            self._table = table
+            self._buckets = table[:BUCKETS]
+            self._fields = table[BUCKETS:]
+            self._max_words = max_words
+            self._name_count = name_count
+            self._places_offset = places_offset
+            self._map = index
+            return index
+
+    def close(self) -> None:
+        """Unmap the index (it is mapped again on the next lookup)."""
+        with self._lock:
+            if self._map is not None:
+                for view in (self._fields, self._buckets, self._table):
+                    view.release()
+                self._table = self._buckets = self._fields = None
+                self._places.clear()
+                self._prefixes.clear()
+                self._resolved.clear()
+                self._map.close()
+                self._map = None
+
+    def __len__(self) -> int:
+        """Return number of indexed names (including aliases)."""
+        self._open()
+        return self._name_count
+
+    def _name(self, index: mmap.mmap, position: int) -> Tuple[bytes, int]:
+        """Return (name bytes, place index) of a name entry."""
+        fields = self._fields
+        offset = fields[3 * position]
+        return index[offset:offset + fields[3 * position + 2]], fields[3 * position + 1]
+
+    def _lower_bound(self, index: mmap.mmap, key: bytes) -> int:
+        """Return the position of the first name >= key."""
+        fields = self._fields
+        if key:
+            low, high = self._buckets[key[0]], self._buckets[key[0] + 1]
+        else:
+            low, high = 0, self._name_count
+        while low < high:
+            middle = (low + high) // 2
+            offset = fields[3 * middle]
+            if index[offset:offset + fields[3 * middle + 2]] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _place(self, index: mmap.mmap, place: int) -> Place:
+        """Decode a place entry (cached)."""
+        found = self._places.get(place)
+        if found is not None:
+            return found
+        id_offset, name_offset, id_length, name_length, country = PLACE.unpack_from(
+            index, self._places_offset + place * PLACE.size)
+        found = Place(index[id_offset:id_offset + id_length].decode("utf-8"),
+                      index[name_offset:name_offset + name_length].decode("utf-8"),
+                      country.decode("ascii"))
+        with self._lock:
+            self._places[place] = found
+        return found
+
+    def lookup(self, name: str) -> Optional[Place]:
+        """
+        Return the place with exactly this name or alias.
+
+        Args:
+            name: Place name in any case, with or without accents
+
+        Returns:
+            Place, or None if unknown
+        """
+        index = self._open()
+        key = normalize(name).encode("utf-8")
+        position = self._lower_bound(index, key)
+        if position < self._name_count:
+            found, place = self._name(index, position)
+            if found == key:
+                return self._place(index, place)
+        return None
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Place]:
+        """
+        Return places with a name or alias starting with prefix.
+
+        Args:
+            prefix: Beginning of a place name
+            limit: Maximum number of places
+
+        Returns:
+            Distinct places in name order
+        """
+        index = self._open()
+        key = normalize(prefix).encode("utf-8")
+        places: List[int] = []
+        position = self._lower_bound(index, key)
+        while position < self._name_count and len(places) < limit:
+            found, place = self._name(index, position)
+            if not found.startswith(key):
+                break
+            if place not in places:
+                places.append(place)
+            position += 1
+        return [self._place(index, place) for place in places]
+
+    def _prefix(self, index: mmap.mmap, words: str) -> Tuple[int, bool]:
+        """
+        Look up space-separated normalized words as the start of a name (memoized).
+
+        Returns:
+            (place named exactly words or -1, whether longer names start with words)
+        """
+        found = self._prefixes.get(words)
+        if found is not None:
+            return found
+        key = words.encode("utf-8")
+        place, longer = -1, False
+        position = self._lower_bound(index, key)
+        if position < self._name_count:
+            name, candidate = self._name(index, position)
+            if name == key:
+                place = candidate
+                position += 1
+            # Names continuing key sort right after it (no name has a byte below b" ")
+            if position < self._name_count:
+                longer = self._name(index, position)[0].startswith(key + b" ")
+        found = (place, longer)
+        with self._lock:
+            if len(self._prefixes) >= MEMO_SIZE:
+                self._prefixes.clear()
+            self._prefixes[words] = found
+        return found
+
+    def _longest_at(self, index: mmap.mmap, words: List[str], start: int) -> Tuple[int, int]:
+        """
+        Find the longest name made of words[start:start + n].
+
+        Returns:
+            (n, place index), or (0, -1) if no name starts there
+        """
+        best = (0, -1)
+        key = ""
+        for n in range(1, min(self._max_words, len(words) - start) + 1):
+            key = key + " " + words[start + n - 1] if key else words[start]
+            place, longer = self._prefix(index, key)
+            if place >= 0:
+                best = (n, place)
+            if not longer:
+                break
+        return best
+
+    def find(self, text: str) -> Optional[PlaceMatch]:
+        """
+        Find the first place mentioned in free text.
+
+        Names of up to three letters ("LA", "NYC", "Rio") only count when
+        not written all in lowercase, so words like "la" are not taken for
+        places.
+
+        Args:
+            text: Message text
+
+        Returns:
+            Leftmost (then longest) match, or None
+        """
+        spans = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+        words = [normalize_word(text[start:end]) for start, end in spans]
+        return self.find_in(text, words, spans)
+
+    def find_in(self, text: str, words: List[str], spans: List[Tuple[int, int]]) -> Optional[PlaceMatch]:
+        """
+        Find the first place mentioned in already tokenized text.
+
+        Args:
+            text: Message text
+            words: Its words (letter/digit runs), normalized (see normalize_word)
+            spans: (start, end) offset of each word in text
+
+        Returns:
+            Leftmost (then longest) match, or None (see find)
+        """
+        index = self._open()
+        for start in range(len(words)):
+            n, place = self._longest_at(index, words, start)
+            if not n:
+                continue
+            begin, end = spans[start][0], spans[start + n - 1][1]
+            original = text[begin:end]
+            if len(original) <= 3 and original.islower():
+                continue
+            return PlaceMatch(self._place(index, place), begin, end)
+        return None
+
+    def resolve(self, text: str) -> Optional[Place]:
+        """
+        Resolve extracted location text to a place.
+
+        Tries the whole text as a name first, then a place mentioned in it
+        with nothing but filler words around it ("tokyo please" -> Tokyo,
+        but "paris texas" is left unresolved). As in find(), names of up
+        to three letters written in lowercase do not count there, so "la
+        la land" is not Los Angeles. Results are memoized, since the same
+        few locations are asked for over and over.
+
+        Args:
+            text: Location as extracted from a message
+
+        Returns:
+            Place, or None if the text is not a known place (the caller
+            keeps the text as given)
+        """
+        index = self._open()
+        try:
+            return self._resolved[text]
+        except KeyError:
+            pass
+        place = self._resolve(index, text)
+        with self._lock:
+            if len(self._resolved) >= MEMO_SIZE:
+                self._resolved.clear()
+            self._resolved[text] = place
+        return place
+
+    def _resolve(self, index: mmap.mmap, text: str) -> Optional[Place]:
+        """Resolve text to a place without the memo (see resolve)."""
+        originals = _WORD.findall(text)
+        words = [normalize_word(word) for word in originals]
+        key = " ".join(words).encode("utf-8")
+        position = self._lower_bound(index, key)
+        if position < self._name_count:
+            found, place = self._name(index, position)
+            if found == key:
+                return self._place(index, place)
+        for start in range(len(words)):
+            n, found = self._longest_at(index, words, start)
+            if not n:
+                continue
+            name = " ".join(originals[start:start + n])
+            if len(name) <= 3 and name.islower():
+                continue
+            if FILLER.issuperset(words[:start]) and FILLER.issuperset(words[start + n:]):
+                return self._place(index, found)
+        return None
+
+
+_default: Optional[Gazetteer] = None
+_default_lock = threading.Lock()
+
+
+def default_gazetteer() -> Gazetteer:
+    """Return the shared gazetteer built from the bundled place list."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Gazetteer()
+    return _default
+
+
+def main() -> None:
+    """Build an index and resolve the given texts."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build a gazetteer index and resolve place names.")
+    parser.add_argument("texts", nargs="*", help="Text to resolve")
+    parser.add_argument("--source", default=None, help="TSV source (default: bundled places)")
+    parser.add_argument("--index", default=None, help="Index file (default: one per source in CACHE_DIR)")
+    args = parser.parse_args()
+
+    gazetteer = Gazetteer(args.index, args.source)
+    start = time.perf_counter()
+    names = len(gazetteer)
+    print(f"✓ {names} names in {gazetteer.index_path} (opened in {(time.perf_counter() - start) * 1e3:.1f} ms)")
+    for text in args.texts:
+        start = time.perf_counter()
+        place = gazetteer.resolve(text)
+        elapsed = (time.perf_counter() - start) * 1e6
+        print(f"  {text!r} -> {place.id + ' (' + place.name + ')' if place else None}  [{elapsed:.1f} µs]")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,150 @@
-
 # ============================================================================
 # bot/skills/weather.py
 # ============================================================================
 """Weather skill implementation."""
 
-from typing import Any, Dict, List
-import random
+import json
+import re
+from typing import Any, Dict, Optional, Tuple
 from bot.core.base_action import BaseAction
+from bot.core.intent_engine import EntityExtractor
+from bot.core.registry import BUILTIN_SKILLS
+from bot.core.tokenizer import Message
+from bot.skills.gazetteer import Gazetteer, default_gazetteer, normalize_word
+from bot.skills.weather_provider import WeatherReport, WeatherService
+
+# Word parts of a token as the gazetteer splits them ("rio_de_janeiro")
+_PLACE_WORD = re.compile(r"[^\W_]+")
+
+# Words a location may follow when it is not introduced by "in"
+_WEATHER_WORDS = frozenset(["weather", "forecast", "temperature"])
+
+
+class LocationExtractor(EntityExtractor):
+    """
+    Extracts the location from a weather query.
+
+    Tried in order: letters after "in" up to the end, ".", "," or " ?"
+    ("weather in New York?"); the first known place anywhere ("Tokyo
+    weather?", "weather São Paulo"); the word(s) after "weather" (a
+    capitalized name of up to three words).
+    """
+
+    triggers = ("in",)
+
+    def at(self, message: Message, index: int) -> Optional[str]:
+        """Read the letters following an "in"."""
+        tokens, parts = message.tokens, message.parts
+        gap = len(parts[2 * index + 2])
+        if not gap:
+            return None
+        following = index + 1
+        if following == len(tokens) or tokens[following] in (".", ","):
+            # Nothing but blanks before the end: an empty location
+            return "" if gap >= 2 else None
+        if tokens[following] == "?":
+            return "" if gap >= 3 else None
+
+        last = following
+        while True:
+            token = tokens[last]
+            if not (token.isascii() and token.isalpha()):
+                return None
+            if last + 1 == len(tokens):
+                break
+            after = tokens[last + 1]
+            if after in (".", ",") or (after == "?" and parts[2 * last + 2]):
+                break
+            last += 1
+        return message.original(following, last)
+
+    def rest(self, message: Message) -> Optional[str]:
+        """Look for a known place, then for the words after "weather"."""
+        text, tokens = message.text, message.tokens
+        if "_" not in text:
+            positions = [i for i, token in enumerate(tokens) if token.isalnum()]
+            if text.isascii():
+                words = [tokens[i] for i in positions]
+            else:
+                words = [normalize_word(message.original(i, i)) for i in positions]
+            spans = [message.spans[i] for i in positions]
+        else:
+            words, spans = [], []
+            for token, (start, end) in zip(tokens, message.spans):
+                for part in _PLACE_WORD.finditer(text, start, end):
+                    words.append(normalize_word(part.group()))
+                    spans.append(part.span())
+        found = default_gazetteer().find_in(text, words, spans)
+        if found:
+            return text[found.start:found.end]
+
+        # Whitespace-separated words after a weather word
+        if _WEATHER_WORDS.isdisjoint(tokens):
+            return None
+        parts = message.parts
+        for index, token in enumerate(tokens[:-1]):
+            if token in _WEATHER_WORDS and (not index or parts[2 * index]) and parts[2 * index + 2]:
+                location_parts = []
+                following = index + 1
+                while following < len(tokens) and len(location_parts) < 3:
+                    chunk, following = message.chunk(following)
+                    if location_parts and not chunk[0].isupper():
+                        break
+                    location_parts.append(chunk.strip("?.,!"))
+                return " ".join(location_parts)
+
+        return None
+
+
+extract_location = LocationExtractor()
+
+_MANIFEST = json.loads(BUILTIN_SKILLS.read_text(encoding="utf-8"))["skills"]["weather"]
 
 
 class WeatherAction(BaseAction):
     """
-    Provides weather information (simulated).
+    Provides weather information from a WeatherService.
+
+    Locations are resolved to canonical places by the gazetteer, so
+    "tokyo please" and "Tokio" share one cache entry; reports are cached
+    per place and concurrent lookups share one upstream fetch (see
+    weather_provider). Unknown places are looked up by name.
 
     Intent: get_weather
     Required entities: location
     """
 
-    def can_handle(self, intent: str) -> bool:
-        """Handle get_weather intent."""
-        return intent == "get_weather"
+    # Patterns, extractor, prompt and priority (10, so "what's the weather"
+    # is not taken for a knowledge question) are declared only in
+    # bot/skills/skills.json, which the bot reads without importing this
+    # module; intents and required entities come from there too.
+    intents = tuple(_MANIFEST["intents"])
+    required = tuple(_MANIFEST["required"])
+
+    def __init__(self, service: Optional[WeatherService] = None,
+                 gazetteer: Optional[Gazetteer] = None):
+        """
+        Initialize weather skill.
+
+        Args:
+            service: Cached weather source (defaults to simulated weather)
+            gazetteer: Place index (defaults to the bundled place list)
+        """
+        self.service = service if service is not None else WeatherService()
+        self.gazetteer = gazetteer if gazetteer is not None else default_gazetteer()
+
+    def _resolve(self, location: str) -> Tuple[str, str]:
+        """Return (cache key, display name) for an extracted location."""
+        place = self.gazetteer.resolve(location)
+        if place is None:
+            return location, location
+        return place.id, place.name
 
-    def required_entities(self) -> List[str]:
-        """Require location entity."""
-        return ["location"]
+    @staticmethod
+    def _format(location: str, report: WeatherReport) -> str:
+        """Render a weather report as a reply."""
+        return (f"The weather in {location} is {report.condition} "
+                f"with a temperature of {report.temperature_c}°C.")
 
     def execute(self, params: Dict[str, Any]) -> str:
         """
@@ -33,13 +154,12 @@ class WeatherAction(BaseAction):
             params: Must contain 'location' key
 
         Returns:
-            Simulated weather response
+            Weather response
         """
-        location = params.get("location", "unknown")
-
-        # Simulate weather conditions
-        conditions = ["sunny ☀️", "cloudy ☁️", "rainy 🌧️", "snowy ❄️", "partly cloudy ⛅"]
-        temp = random.randint(15, 30)
-        condition = random.choice(conditions)
+        key, name = self._resolve(params.get("location", "unknown"))
+        return self._format(name, self.service.get(key))
 
-        return f"The weather in {location} is {condition} with a temperature of {temp}°C."
+    async def execute_async(self, params: Dict[str, Any]) -> str:
+        """Execute weather query, answering cache hits without a thread hop."""
+        key, name = self._resolve(params.get("location", "unknown"))
+        return self._format(name, await self.service.get_async(key))
@@ -0,0 +1,238 @@
+# ============================================================================
+# bot/skills/weather_provider.py
+# ============================================================================
+"""Weather data layer: providers, TTL cache and request coalescing."""
+
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+
+class WeatherReport(NamedTuple):
+    """Current conditions at a location."""
+
+    location: str
+    condition: str
+    temperature_c: int
+
+
+class _Flight:
+    """An upstream fetch that concurrent callers wait on."""
+
+    __slots__ = ("done", "report", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.report: Optional[WeatherReport] = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> WeatherReport:
+        """Block until the fetch finishes; return its report or raise its error."""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.report
+
+
+class WeatherProvider(ABC):
+    """
+    Source of weather data (an upstream API client in production).
+
+    fetch() may block; WeatherService calls it at most once per location
+    at a time and caches the result.
+    """
+
+    @abstractmethod
+    def fetch(self, location: str) -> WeatherReport:
+        """
+        Fetch current weather.
+
+        Args:
+            location: Canonical place id (e.g. "tokyo-jp"), or the
+                normalized name of a place the gazetteer does not know
+
+        Returns:
+            Weather report
+
+        Raises:
+            Exception: Any upstream failure (not cached)
+        """
+        pass
+
+
+class FakeWeatherProvider(WeatherProvider):
+    """
+    Local provider returning simulated weather.
+
+    Latency can be configured to imitate an upstream API when measuring
+    cache hit rates and tail latency.
+    """
+
+    CONDITIONS = ["sunny ☀️", "cloudy ☁️", "rainy 🌧️", "snowy ❄️", "partly cloudy ⛅"]
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialize provider.
+
+        Args:
+            latency: Seconds each fetch takes
+            jitter: Extra random seconds (uniform 0..jitter) per fetch
+            seed: Random seed for reproducible reports
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def fetch(self, location: str) -> WeatherReport:
+        """Return simulated weather after the configured delay."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            condition = self._random.choice(self.CONDITIONS)
+            temperature = self._random.randint(15, 30)
+        if delay > 0:
+            time.sleep(delay)
+        return WeatherReport(location, condition, temperature)
+
+
+class WeatherService:
+    """
+    Cached, coalescing access to a WeatherProvider.
+
+    Features:
+    - Per-location TTL cache bounded to max_entries (least recently used
+      entries are evicted first)
+    - Single-flight: concurrent requests for a location that is not
+      cached share one upstream fetch; failures are passed to every
+      waiter and not cached
+    - Safe to call from many threads (sync skills run in a thread pool)
+    """
+
+    def __init__(self, provider: Optional[WeatherProvider] = None, ttl: float = 600.0,
+                 max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize service.
+
+        Args:
+            provider: Weather source (defaults to FakeWeatherProvider())
+            ttl: Seconds a report stays fresh
+            max_entries: Maximum cached locations
+            clock: Monotonic time source in seconds
+        """
+        self.provider = provider if provider is not None else FakeWeatherProvider()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._cache: "OrderedDict[str, Tuple[WeatherReport, float]]" = OrderedDict()
+        self._in_flight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(location: str) -> str:
+        """Return the cache key for a location."""
+        return " ".join(location.lower().split())
+
+    def cached(self, location: str) -> Optional[WeatherReport]:
+        """
+        Return a fresh cached report without fetching.
+
+        Args:
+            location: Location name
+
+        Returns:
+            Report, or None if not cached or expired
+        """
+        key = self.normalize(location)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= self.clock():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get(self, location: str) -> WeatherReport:
+        """
+        Return current weather, fetching at most once per location at a time.
+
+        Args:
+            location: Location name
+
+        Returns:
+            Weather report
+
+        Raises:
+            Exception: Whatever the provider raised for this fetch
+        """
+        report = self.cached(location)
+        if report is not None:
+            return report
+
+        key = self.normalize(location)
+        with self._lock:
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._in_flight[key] = _Flight()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return flight.wait()
+
+        try:
+            report = self.provider.fetch(key)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            flight.error = e
+            flight.done.set()
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._cache[key] = (report, self.clock() + self.ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        flight.report = report
+        flight.done.set()
+        return report
+
+    async def get_async(self, location: str) -> WeatherReport:
+        """
+        Return current weather from asyncio.
+
+        Cache hits are answered on the event loop; misses fetch in the
+        shared thread pool.
+
+        Args:
+            location: Location name
+
+        Returns:
+            Weather report
+        """
+        report = self.cached(location)
+        if report is not None:
+            return report
+        from bot.core.async_support import run_sync
+        return await run_sync(self.get, location)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss (upstream fetch) and coalesced counts."""
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "cached": len(self._cache)}
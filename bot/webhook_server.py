@@ -0,0 +1,341 @@
+# ============================================================================
+# bot/webhook_server.py
+# ============================================================================
+"""
+Webhook ingestion server.
+
+Accepts channel webhooks over HTTP/1.1 (stdlib asyncio only):
+
+    POST /webhook/<channel>   JSON payload -> channel.receive_message -> MainBot
+    GET  /health              liveness probe
+    GET  /metrics             Prometheus metrics (if a PrometheusSink is attached)
+
+Request bytes are received straight into a per-connection buffer
+(asyncio.BufferedProtocol) and JSON bodies are decoded from a memoryview
+of that buffer, without intermediate bytes copies. Requests on one
+connection are answered in order; keep-alive and pipelining are supported.
+
+Usage:
+    python -m bot.webhook_server [--port 8080] [--config bot/config/channels.json] [--metrics]
+                                 [--context-store redis://127.0.0.1:6379]
+                                 [--intent-model intents.model]
+"""
+
+import argparse
+import asyncio
+import json
+from collections import deque
+from typing import Any, Deque, Dict, NamedTuple, Optional, Tuple, Union
+from bot.main_bot import MainBot
+from bot.core.instrumentation import PrometheusSink
+from bot.core.outbound import BackpressureError
+
+# Largest accepted request head and body
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+# Parsed requests queued on a connection before it stops reading
+MAX_PIPELINED = 64
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 431: "Request Header Fields Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class WebhookRequest(NamedTuple):
+    """A parsed request (payload already decoded, or the status to fail with)."""
+
+    method: str
+    path: str
+    keep_alive: bool
+    payload: Any
+    error: Optional[int] = None
+
+
+class _WebhookProtocol(asyncio.BufferedProtocol):
+    """One client connection: incremental parser plus in-order responder."""
+
+    def __init__(self, server: "WebhookServer"):
+        self.server = server
+        self.transport: Optional[asyncio.Transport] = None
+        self._buffer = bytearray(64 * 1024)
+        self._view = memoryview(self._buffer)
+        self._start = 0        # first unparsed byte
+        self._end = 0          # end of received data
+        self._head: Optional[Tuple[str, str, bool, int]] = None
+        self._requests: Deque[WebhookRequest] = deque()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._paused = False
+        self._responder: Optional[asyncio.Task] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport
+        self._responder = asyncio.get_running_loop().create_task(self._respond_loop())
+        self.server._connections.add(self)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._closing = True
+        self._wakeup.set()
+        self.server._connections.discard(self)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        """Return free buffer space, compacting or growing the buffer first."""
+        if len(self._buffer) - self._end < 4096:
+            remaining = self._end - self._start
+            size = len(self._buffer)
+            if size - remaining < size // 2:
+                size *= 2
+            buffer = bytearray(size)
+            buffer[:remaining] = self._view[self._start:self._end]
+            self._buffer, self._view = buffer, memoryview(buffer)
+            self._start, self._end = 0, remaining
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """Parse every complete request now in the buffer."""
+        self._end += nbytes
+        while not self._closing:
+            request = self._parse()
+            if request is None:
+                break
+            self._push(request)
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def eof_received(self) -> bool:
+        self._closing = True
+        self._wakeup.set()
+        return True
+
+    def _push(self, request: WebhookRequest) -> None:
+        """Queue a request for the responder."""
+        self._requests.append(request)
+        self._wakeup.set()
+        if request.error is not None and not request.keep_alive:
+            self._closing = True
+            self.transport.pause_reading()
+        if len(self._requests) >= MAX_PIPELINED and not self._paused:
+            self._paused = True
+            self.transport.pause_reading()
+
+    def _parse(self) -> Optional[WebhookRequest]:
+        """Parse one request from the buffer, or return None if incomplete."""
+        if self._head is None:
+            split = self._buffer.find(b"\r\n\r\n", self._start, self._end)
+            if split < 0:
+                if self._end - self._start > MAX_HEADER_BYTES:
+                    return WebhookRequest("", "", False, None, 431)
+                return None
+            try:
+                self._head = self._parse_head(split)
+            except ValueError:
+                return WebhookRequest("", "", False, None, 400)
+            self._start = split + 4
+
+        method, path, keep_alive, length = self._head
+        if length > MAX_BODY_BYTES:
+            return WebhookRequest(method, path, False, None, 413)
+        if self._end - self._start < length:
+            return None
+
+        self._head = None
+        body_start, self._start = self._start, self._start + length
+        if method != "POST" or not length:
+            return WebhookRequest(method, path, keep_alive, None)
+        try:
+            with self._view[body_start:body_start + length] as body:
+                payload = json.loads(str(body, "utf-8"))
+        except ValueError:
+            return WebhookRequest(method, path, keep_alive, None, 400)
+        return WebhookRequest(method, path, keep_alive, payload)
+
+    def _parse_head(self, split: int) -> Tuple[str, str, bool, int]:
+        """Parse request line and headers ending at split."""
+        lines = str(self._view[self._start:split], "latin-1").split("\r\n")
+        method, path, version = lines[0].split(" ")
+        length = 0
+        keep_alive = version == "HTTP/1.1"
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection":
+                keep_alive = value.strip().lower() == "keep-alive"
+            elif name == "transfer-encoding":
+                raise ValueError("chunked request bodies are not supported")
+        return method, path, keep_alive, length
+
+    async def _respond_loop(self) -> None:
+        """Handle queued requests in order and write their responses."""
+        while True:
+            while not self._requests:
+                if self._closing:
+                    self.transport.close()
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            request = self._requests.popleft()
+            if self._paused and len(self._requests) < MAX_PIPELINED // 2:
+                self._paused = False
+                self.transport.resume_reading()
+
+            if request.error is not None:
+                status, body = request.error, {"ok": False, "error": _REASONS[request.error]}
+            else:
+                status, body = await self.server.handle(request)
+            if self.transport.is_closing():
+                return
+            self.transport.write(_encode_response(status, body, request.keep_alive))
+            if not request.keep_alive:
+                self.transport.close()
+                return
+
+
+def _encode_response(status: int, body: Union[Dict[str, Any], str], keep_alive: bool) -> bytes:
+    """Serialize a JSON response (or a plain text one if body is a string)."""
+    if isinstance(body, str):
+        data, content_type = body.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        data, content_type = json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json"
+    extra = "Retry-After: 1\r\n" if status == 503 else ""
+    return (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n{extra}\r\n").encode("latin-1") + data
+
+
+class WebhookServer:
+    """
+    HTTP server feeding channel webhooks into a MainBot.
+
+    Each payload is normalized by the channel's receive_message and
+    processed with MainBot.respond_async(), which queues the reply on the
+    same channel. When the reply queue is full the server answers 503
+    with Retry-After so the platform redelivers later.
+    """
+
+    def __init__(self, bot: MainBot, host: str = "127.0.0.1", port: int = 8080, reply: bool = True):
+        """
+        Initialize server.
+
+        Args:
+            bot: Bot to feed
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            reply: Queue replies on the channel; if False the reply is only
+                returned in the HTTP response (used by load tests)
+        """
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.reply = reply
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: set = set()
+
+    async def start(self) -> int:
+        """
+        Start listening.
+
+        Returns:
+            Bound port
+        """
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: _WebhookProtocol(self), self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        """Stop listening and close open connections."""
+        if self._server is not None:
+            self._server.close()
+            for connection in list(self._connections):
+                connection.transport.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        """Start (if needed) and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        print(f"✓ Webhook server listening on http://{self.host}:{self.port}")
+        await self._server.serve_forever()
+
+    async def handle(self, request: WebhookRequest) -> Tuple[int, Union[Dict[str, Any], str]]:
+        """
+        Handle one parsed request.
+
+        Args:
+            request: Parsed request
+
+        Returns:
+            (HTTP status, JSON body or plain text)
+        """
+        if request.path == "/health":
+            return 200, {"ok": True}
+
+        if request.path == "/metrics":
+            for sink in self.bot.instrumentation.sinks:
+                if isinstance(sink, PrometheusSink):
+                    return 200, sink.render()
+            return 404, {"ok": False, "error": "Metrics are not enabled"}
+
+        prefix, _, channel_name = request.path.partition("/webhook/")
+        channel = self.bot.channels.get(channel_name) if not prefix else None
+        if channel is None:
+            return 404, {"ok": False, "error": "Unknown webhook"}
+        if request.method != "POST":
+            return 405, {"ok": False, "error": "Use POST"}
+
+        try:
+            message = await channel.receive_message_async(request.payload)
+            user_id = str(message.get("user_id", "unknown"))
+            text = message.get("text", "")
+            if self.reply:
+                response = await self.bot.respond_async(user_id, text, channel_name)
+            else:
+                response = await self.bot.process_message_async(user_id, text, channel_name)
+        except BackpressureError as e:
+            return 503, {"ok": False, "error": str(e)}
+        except Exception as e:
+            print(f"❌ Webhook error on {channel_name}: {e}")
+            return 500, {"ok": False, "error": "Internal error"}
+
+        return 200, {"ok": True, "response": response}
+
+
+def main() -> None:
+    """Run the webhook server."""
+    parser = argparse.ArgumentParser(description="Channel webhook server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--config", default=None, help="Path to channels.json")
+    parser.add_argument("--metrics", action="store_true", help="Serve stage timings on GET /metrics")
+    parser.add_argument("--context-store", metavar="URL", default=None,
+                        help="Share conversation contexts through a Redis server (redis://host:port)")
+    parser.add_argument("--intent-model", metavar="PATH", default=None,
+                        help="Classify messages no intent pattern matches with this model")
+    args = parser.parse_args()
+
+    context_manager = None
+    if args.context_store:
+        from bot.core.context_manager import ContextManager
+        from bot.core.context_store import RedisContextStore
+        context_manager = ContextManager(store=RedisContextStore(url=args.context_store))
+    classifier = None
+    if args.intent_model:
+        from bot.core.intent_classifier import IntentClassifier
+        classifier = IntentClassifier(args.intent_model)
+    bot = MainBot(args.config, context_manager=context_manager, classifier=classifier)
+    if args.metrics:
+        bot.instrumentation.add_sink(PrometheusSink())
+    server = WebhookServer(bot, args.host, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 Goodbye!")
+
+
+if __name__ == "__main__":
+    main()
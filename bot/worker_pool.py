@@ -0,0 +1,386 @@
+# ============================================================================
+# bot/worker_pool.py
+# ============================================================================
+"""Multi-process bot runtime sharding users across worker processes."""
+
+import bisect
+import contextlib
+import hashlib
+import io
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future
+from multiprocessing import connection
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from bot.core.knowledge_engine import KnowledgeEngine
+from bot.core.knowledge_store import LogKnowledgeStore
+
+
+def _hash64(value: str) -> int:
+    """Stable 64-bit hash (Python's hash() differs between processes)."""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes.
+
+    Adding or removing a node only moves the users whose ring segment
+    changes owner, roughly 1/N of them.
+    """
+
+    def __init__(self, nodes: Iterable[int], vnodes: int = 64):
+        """
+        Build the ring.
+
+        Args:
+            nodes: Node identifiers
+            vnodes: Virtual nodes per node
+        """
+        self.nodes = sorted(nodes)
+        self.vnodes = vnodes
+        points = sorted((_hash64(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str) -> int:
+        """
+        Return the node owning key.
+
+        Args:
+            key: Shard key (user ID)
+
+        Returns:
+            Node identifier
+        """
+        if not self._owners:
+            raise LookupError("Hash ring has no nodes")
+        index = bisect.bisect(self._hashes, _hash64(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+def _worker_main(worker_id: int, inbox, replies, config_path: Optional[str],
+                 knowledge_path: Optional[str], vnodes: int) -> None:
+    """Worker process loop: one MainBot, commands handled strictly in order."""
+    from bot.main_bot import MainBot
+
+    knowledge = KnowledgeEngine(LogKnowledgeStore(knowledge_path)) if knowledge_path else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = MainBot(config_path, knowledge=knowledge)
+
+    while True:
+        command = inbox.get()
+        kind, request_id = command[0], command[1]
+        if kind == "stop":
+            replies.send((request_id, True, None))
+            break
+
+        try:
+            if kind == "message":
+                _, _, user_id, text, channel = command
+                result: Any = bot.process_message(user_id, text, channel)
+            elif kind == "export":
+                ring = HashRing(command[2], vnodes)
+                moved = [user_id for user_id in list(bot.context_manager.contexts)
+                         if ring.node_for(user_id) != worker_id]
+                result = bot.context_manager.export_contexts(moved)
+            elif kind == "import":
+                bot.context_manager.import_contexts(command[2])
+                result = None
+            else:
+                raise ValueError(f"Unknown command: {kind}")
+            replies.send((request_id, True, result))
+        except Exception as e:
+            replies.send((request_id, False, f"{type(e).__name__}: {e}"))
+
+
+class ShardedBotPool:
+    """
+    Runs N MainBot worker processes and shards users across them.
+
+    Features:
+    - Consistent hashing of user_id to a worker
+    - Per-user ordering: a user's messages go through one worker's FIFO
+    - Each worker owns its ContextManager shard
+    - Shared read-mostly knowledge via LogKnowledgeStore (knowledge_path)
+    - add_worker()/remove_worker() migrate only the contexts that move
+    - A worker that dies is restarted in place; its outstanding requests
+      fail with RuntimeError and the contexts it held are lost
+
+    Each worker replies on its own pipe, so a worker killed mid-reply
+    cannot leave a lock held that other workers need.
+
+    Without knowledge_path every worker keeps its own in-memory knowledge.
+    """
+
+    def __init__(self, workers: int = 0, config_path: Optional[str] = None,
+                 knowledge_path: Optional[str] = None, vnodes: int = 64):
+        """
+        Start the pool.
+
+        Args:
+            workers: Number of worker processes (default: CPU count)
+            config_path: channels.json passed to each worker's MainBot
+            knowledge_path: Directory of the shared LogKnowledgeStore
+            vnodes: Virtual nodes per worker on the hash ring
+        """
+        self.config_path = config_path
+        self.knowledge_path = knowledge_path
+        self.vnodes = vnodes
+
+        self._mp = multiprocessing.get_context()
+        # worker ID -> (process, command queue, reply pipe)
+        self._workers: Dict[int, Tuple[Any, Any, Any]] = {}
+        self._worker_ids = itertools.count()
+        self._request_ids = itertools.count()
+        # request ID -> (worker ID, future)
+        self._futures: Dict[int, Tuple[int, Future]] = {}
+        self._lock = threading.Lock()
+        # Guards sending to a worker against it being replaced
+        self._send_lock = threading.Lock()
+        self._stopping: Set[int] = set()
+        # Stopping workers whose exit the collector has handled
+        self._reaped: Set[int] = set()
+        self._closed = False
+        # Wakes the collector to wait on a changed set of workers
+        self._wakeup, self._wake = self._mp.Pipe(duplex=False)
+
+        if knowledge_path:
+            # Create the store once so workers do not race to initialize it,
+            # and persist its key index so they map it instead of each one
+            # indexing every key
+            store = LogKnowledgeStore(knowledge_path)
+            store.save_key_index(min_lag=1 << 16)
+            store.close()
+
+        self._collector = threading.Thread(target=self._collect, name="pool-collector", daemon=True)
+        self._collector.start()
+
+        for _ in range(workers or multiprocessing.cpu_count()):
+            self._spawn()
+        self._ring = HashRing(self._workers, vnodes)
+
+    @property
+    def worker_ids(self) -> List[int]:
+        """Return identifiers of running workers."""
+        return list(self._ring.nodes)
+
+    def _spawn(self, worker_id: Optional[int] = None) -> int:
+        """Start a worker process (a new one, or a replacement) and return its ID."""
+        if worker_id is None:
+            worker_id = next(self._worker_ids)
+        inbox = self._mp.Queue()
+        replies, sender = self._mp.Pipe(duplex=False)
+        process = self._mp.Process(
+            target=_worker_main,
+            args=(worker_id, inbox, sender, self.config_path, self.knowledge_path, self.vnodes),
+            name=f"bot-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        sender.close()
+        self._workers[worker_id] = (process, inbox, replies)
+        self._wake.send_bytes(b"")
+        return worker_id
+
+    def _collect(self) -> None:
+        """Resolve futures from worker replies and restart workers that exit."""
+        while not self._closed:
+            owners: Dict[Any, int] = {}
+            for worker_id, (process, _, replies) in list(self._workers.items()):
+                if worker_id not in self._reaped:
+                    owners[replies] = owners[process.sentinel] = worker_id
+            for ready in connection.wait([self._wakeup] + list(owners)):
+                if ready is self._wakeup:
+                    self._wakeup.recv_bytes()
+                    continue
+                entry = self._workers.get(owners[ready])
+                if entry is None or ready not in (entry[0].sentinel, entry[2]):
+                    continue  # Stopped or replaced meanwhile
+                if ready is entry[2]:
+                    try:
+                        self._resolve(ready.recv())
+                    except EOFError:
+                        pass  # The worker exited; handled through its sentinel
+                else:
+                    self._exited(owners[ready])
+
+    def _resolve(self, reply: Tuple[int, bool, Any]) -> None:
+        """Resolve the future of one worker reply."""
+        request_id, ok, result = reply
+        entry = self._futures.pop(request_id, None)
+        if entry is None:
+            return
+        if ok:
+            entry[1].set_result(result)
+        else:
+            entry[1].set_exception(RuntimeError(result))
+
+    def _exited(self, worker_id: int) -> None:
+        """Handle a worker process that exited: fail its requests and restart it."""
+        with self._send_lock:
+            process, inbox, replies = self._workers[worker_id]
+            process.join()  # Its sentinel is ready: reap it for the exit code
+            # Replies sent before exiting are still resolved
+            try:
+                while replies.poll():
+                    self._resolve(replies.recv())
+            except EOFError:
+                pass
+
+            lost = [request_id for request_id, (owner, _) in list(self._futures.items())
+                    if owner == worker_id]
+            for request_id in lost:
+                entry = self._futures.pop(request_id, None)
+                if entry is not None:
+                    entry[1].set_exception(RuntimeError(
+                        f"Worker {worker_id} exited with code {process.exitcode}"))
+            if worker_id in self._stopping:
+                self._reaped.add(worker_id)
+                return
+            print(f"⚠ Worker {worker_id} exited with code {process.exitcode}: "
+                  f"failed {len(lost)} pending request(s), restarting it")
+            inbox.cancel_join_thread()
+            inbox.close()
+            replies.close()
+            self._spawn(worker_id)
+
+    def _send(self, worker_id: int, kind: str, *args: Any) -> Future:
+        """Queue a command for a worker and return its future."""
+        future: Future = Future()
+        request_id = next(self._request_ids)
+        with self._send_lock:
+            self._futures[request_id] = (worker_id, future)
+            self._workers[worker_id][1].put((kind, request_id) + args)
+        return future
+
+    def submit(self, user_id: str, text: str, channel: str = "internal") -> Future:
+        """
+        Queue a message on the worker owning user_id.
+
+        Args:
+            user_id: User identifier
+            text: Message text
+            channel: Channel name
+
+        Returns:
+            Future resolving to the response string
+        """
+        with self._lock:
+            return self._send(self._ring.node_for(user_id), "message", user_id, text, channel)
+
+    def process_message(self, user_id: str, text: str, channel: str = "internal") -> str:
+        """
+        Process a message and wait for the response.
+
+        Args:
+            user_id: User identifier
+            text: Message text
+            channel: Channel name
+
+        Returns:
+            Response string
+        """
+        return self.submit(user_id, text, channel).result()
+
+    def _rebalance(self, worker_ids: List[int]) -> None:
+        """
+        Switch to a new ring, moving contexts whose owner changes (lock held).
+
+        A worker that exits during the migration is restarted without its
+        contexts, as after any crash; the other contexts are still moved
+        and the new ring always takes effect.
+        """
+        ring = HashRing(worker_ids, self.vnodes)
+
+        # Exports queue behind each worker's pending messages, so every
+        # context is taken after the turns that were already submitted.
+        exports = [(worker_id, self._send(worker_id, "export", worker_ids))
+                   for worker_id in self._ring.nodes]
+        moved: Dict[int, List[Tuple[Any, ...]]] = {}
+        for worker_id, future in exports:
+            try:
+                records = future.result()
+            except RuntimeError as e:
+                print(f"⚠ Could not export contexts from worker {worker_id}: {e}")
+                continue
+            for record in records:
+                moved.setdefault(ring.node_for(record[0]), []).append(record)
+
+        imports = [(worker_id, self._send(worker_id, "import", records))
+                   for worker_id, records in moved.items()]
+        for worker_id, future in imports:
+            try:
+                future.result()
+            except RuntimeError as e:
+                print(f"⚠ Could not import contexts into worker {worker_id}: {e}")
+
+        self._ring = ring
+
+    def add_worker(self) -> int:
+        """
+        Start a new worker and move its share of users onto it.
+
+        Returns:
+            New worker ID
+        """
+        with self._lock:
+            worker_id = self._spawn()
+            try:
+                self._rebalance(self._ring.nodes + [worker_id])
+            except BaseException:
+                # Not in the ring: it owns no users, so just stop it
+                self._stop_worker(worker_id)
+                raise
+            return worker_id
+
+    def remove_worker(self, worker_id: Optional[int] = None) -> int:
+        """
+        Migrate a worker's users to the others and stop it.
+
+        Args:
+            worker_id: Worker to remove (default: the newest)
+
+        Returns:
+            Removed worker ID
+        """
+        with self._lock:
+            if len(self._ring.nodes) < 2:
+                raise ValueError("Cannot remove the last worker")
+            if worker_id is None:
+                worker_id = self._ring.nodes[-1]
+            self._rebalance([node for node in self._ring.nodes if node != worker_id])
+            self._stop_worker(worker_id)
+            return worker_id
+
+    def _stop_worker(self, worker_id: int) -> None:
+        """Stop a worker after it drains its queue."""
+        self._stopping.add(worker_id)
+        # Fails instead if the worker died first; it is stopped either way
+        self._send(worker_id, "stop").exception()
+        with self._send_lock:
+            process, inbox, _ = self._workers.pop(worker_id)
+            self._stopping.discard(worker_id)
+            self._reaped.discard(worker_id)
+        self._wake.send_bytes(b"")
+        process.join()
+        inbox.close()
+
+    def close(self) -> None:
+        """Drain and stop every worker."""
+        with self._lock:
+            for worker_id in list(self._workers):
+                self._stop_worker(worker_id)
+            self._closed = True
+            self._wake.send_bytes(b"")
+        self._collector.join()
+        self._wakeup.close()
+        self._wake.close()
+
+    def __enter__(self) -> "ShardedBotPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()